@@ -1,41 +1,13 @@
-import json
-
-def divide_block(x, y, width, height, vertical_segments, horizontal_segments):
-    sub_blocks = {}
-    block_width = width / horizontal_segments
-    block_height = height / vertical_segments
-
-    block_id = 1
-    for i in range(vertical_segments):
-        for j in range(horizontal_segments):
-            sub_blocks[f"Block_{block_id}"] = {
-                "x": x + j * block_width,
-                "y": y + i * block_height,
-                "width": block_width,
-                "height": block_height
-            }
-            block_id += 1
-
-    return sub_blocks
+from block_geometry import divide_block
+from space_numbering import number_blocks
+from stream_json import write_stream
 
+# data は dict または (space_id, rect) の iterable（1件ずつ書き出すので出力は json.dump(indent=4) と同じ）
 def save_to_json(data, filename):
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    write_stream(data, filename, "pretty")
 
 def sort_blocks(blocks, order, start_number):
-    if order == "left_to_right_bottom_to_top":
-        sorted_blocks = sorted(blocks.items(), key=lambda x: (x[1]['x'], -x[1]['y']))
-    elif order == "bottom_to_top_right_to_left":
-        sorted_blocks = sorted(blocks.items(), key=lambda x: (-x[1]['y'], -x[1]['x']))
-    elif order == "right_to_left_top_to_bottom":
-        sorted_blocks = sorted(blocks.items(), key=lambda x: (-x[1]['x'], x[1]['y']))
-    elif order == "top_to_bottom_left_to_right":
-        sorted_blocks = sorted(blocks.items(), key=lambda x: (x[1]['y'], x[1]['x']))
-    else:
-        raise ValueError("Invalid sort order")
-
-    renamed_blocks = {f"a{str(idx + start_number).zfill(2)}": v for idx, (k, v) in enumerate(sorted_blocks)}
-    return renamed_blocks
+    return number_blocks(blocks, {"prefix": "a", "start": start_number, "digits": 2, "order": order})
 
 if __name__ == "__main__":
     x = 436
@@ -1,17 +1,16 @@
 import os
 import random
 
+# 拡張子によらずフォルダ内のファイルを1つ選ぶ（中身は選んだファイルだけ開く）
 def pick_random_file(folder_path):
     try:
         files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-        
+
         if not files:
             print("フォルダ内にファイルが存在しません。")
             return None
-        
-        selected_file = random.choice(files)
-        print(f"選ばれたファイル: {selected_file}")
-        return os.path.join(folder_path, selected_file)
+
+        return os.path.join(folder_path, random.choice(files))
 
     except Exception as e:
         print(f"エラーが発生しました: {e}")
@@ -34,8 +33,13 @@ def open_file_if_text(file_path):
     else:
         print("選ばれたファイルはテキストファイルではありません。")
 
+def main(folder_path=r"C:\2002248\memo\song"):
+    file_path = pick_random_file(folder_path)
+    if file_path:
+        print(f"選ばれたファイル: {os.path.basename(file_path)}")
+        open_file_if_text(file_path)
+    return file_path
+
 # 使用例（パスを適宜変更）
-folder_path = r"C:\2002248\memo\song"
-file_path = pick_random_file(folder_path)
-if file_path:
-    open_file_if_text(file_path)
+if __name__ == "__main__":
+    main()
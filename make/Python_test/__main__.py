@@ -0,0 +1,6 @@
+import sys
+
+from cli import main
+
+# python make/Python_test <command> ...（このディレクトリが sys.path の先頭に入るのでフラットな import のまま動く）
+sys.exit(main())
@@ -0,0 +1,208 @@
+from functools import lru_cache
+
+from lyric_index import normalize as fold
+
+# 曲名の回答の採点（入力のゆれ・打ち間違いを許す）
+#   perfect  大文字/小文字を除いて入力どおり一致
+#   partial  正規化（NFKC・小文字・カタカナ→ひらがな・記号と空白を除く）すると曲名か別名・読みに一致
+#   close    正規化した形が編集距離 allowed_distance（曲名の長さで決まる）以内
+#            ほかの曲名の方が同じかより近いときは wrong
+#   wrong    それ以外
+# 曲名・別名・読みの正規化は最初に1回だけ行い、形を MAX_DISTANCE + 1 個の区間に分けた表を作る
+# 編集距離 d（MAX_DISTANCE 以下）の編集は高々 d 個の区間にしかかからないので、どれか1つの区間はそのまま残り、
+# 答えの中で元の位置から d 文字以内のところに現れる。近い曲名はこの表で漏れなく引け、距離は bounded_distance で確かめる
+# 表は形1つにつき MAX_DISTANCE + 1 件なので、曲名の長さによらず曲数に比例した大きさで済む
+# 同じ答えは1回だけ採点する（部屋では同じ答えが多い）
+LEVELS = ("perfect", "partial", "close", "wrong")
+MAX_DISTANCE = 2
+
+
+# 長さに応じて許す編集距離（短い曲名は1文字違いでも別の曲になりやすい）
+def allowed_distance(length):
+    if length <= 2:
+        return 0
+    if length <= 6:
+        return 1
+    return 2
+
+
+# bound 以下なら編集距離、超えるなら None（対角線の周り bound 幅だけ計算し、行の最小値が bound を超えたら打ち切る）
+def bounded_distance(a, b, bound):
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > bound:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    over = bound + 1
+    previous = [j if j <= bound else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= bound else over
+        row_min = current[0]
+        for j in range(max(1, i - bound), min(len(b), i + bound) + 1):
+            value = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            current[j] = value if value < over else over
+            if value < row_min:
+                row_min = value
+        if row_min > bound:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= bound else None
+
+
+# 長さ length の形を MAX_DISTANCE + 1 個に分けた区間の (開始位置, 長さ) の並び（短い形では長さ 0 の区間もある）
+@lru_cache(maxsize=None)
+def _segments(length):
+    parts = MAX_DISTANCE + 1
+    bounds = [length * k // parts for k in range(parts + 1)]
+    return tuple((bounds[k], bounds[k + 1] - bounds[k]) for k in range(parts))
+
+
+# 漢字の曲名の読み（pykakasi があれば使う。なければ別名に書いた読みだけ）
+def _reading_function():
+    try:
+        import pykakasi
+    except ImportError:
+        return None
+    kakasi = pykakasi.kakasi()
+    return lambda text: "".join(item["hira"] for item in kakasi.convert(text))
+
+
+# titles: 曲名の一覧、aliases: {曲名: [別名・読み, ...]}
+class AnswerMatcher:
+    def __init__(self, titles, aliases=None, readings=True):
+        reading = _reading_function() if readings else None
+        aliases = aliases or {}
+        self.forms = {}     # 曲名 -> 正規化した形（曲名・別名・読み）
+        self.owners = {}    # 正規化した形 -> 曲名の集合
+        self.segments = {}  # (形の長さ, 区間の番号) -> {区間の文字列: [曲名, ...]}
+        for title in titles:
+            names = [title, *aliases.get(title, ())]
+            if reading:
+                names += [reading(name) for name in names]
+            forms = {fold(name) for name in names} - {""}
+            self.forms[title] = forms
+            for form in forms:
+                self.owners.setdefault(form, set()).add(title)
+                for k, (start, length) in enumerate(_segments(len(form))):
+                    titles = self.segments.setdefault((len(form), k), {}).setdefault(form[start:start + length], [])
+                    if not titles or titles[-1] != title:
+                        titles.append(title)
+        self._confusables = {}
+
+    def __len__(self):
+        return len(self.forms)
+
+    # text から編集距離 bound（MAX_DISTANCE 以下）以内かもしれない曲名（候補。距離は確かめていない）
+    def _neighbours(self, text, bound):
+        found = set()
+        size = len(text)
+        for length in range(max(size - bound, 1), size + bound + 1):
+            for k, (start, part) in enumerate(_segments(length)):
+                table = self.segments.get((length, k))
+                if not table:
+                    continue
+                for at in range(max(start - bound, 0), min(start + bound, size - part) + 1):
+                    titles = table.get(text[at:at + part])
+                    if titles:
+                        found.update(titles)
+        return found
+
+    # 正規化した形が編集距離 MAX_DISTANCE 以内の、ほかの曲名
+    def confusables(self, title):
+        found = self._confusables.get(title)
+        if found is None:
+            found = set()
+            for form in self.forms.get(title, ()):
+                found |= {other for other in self._neighbours(form, MAX_DISTANCE)
+                          if other != title and self._distance(form, other, MAX_DISTANCE) is not None}
+            found = self._confusables[title] = tuple(sorted(found))
+        return found
+
+    # bound=None なら曲名の形ごとに allowed_distance(形の長さ) まで
+    def _distance(self, text, title, bound=None):
+        best = None
+        for form in self.forms.get(title, ()):
+            limit = allowed_distance(len(form)) if bound is None else bound
+            d = bounded_distance(text, form, limit if best is None else min(limit, best))
+            if d is not None and (best is None or d < best):
+                best = d
+                if best == 0:
+                    break
+        return best
+
+    # 戻り値: (level, 編集距離)  wrong のときの距離は None
+    def grade(self, answer, title):
+        if answer.lower() == title.lower():
+            return "perfect", 0
+        text = fold(answer)
+        if not text:
+            return "wrong", None
+        if title in self.owners.get(text, ()):
+            return "partial", 0
+        if title not in self.forms:
+            return ("partial", 0) if text == fold(title) else ("wrong", None)
+        distance = self._distance(text, title)
+        if distance is None:
+            return "wrong", None
+        # ほかの曲名の方が同じかより近ければ、どの曲のつもりか決められない
+        if text in self.owners or any(self._distance(text, other, distance) is not None
+                                      for other in self._neighbours(text, distance) if other != title):
+            return "wrong", None
+        return "close", distance
+
+    # 同じ曲への回答をまとめて採点する（部屋の締め切りなど）
+    def grade_many(self, answers, title):
+        graded = {}
+        results = []
+        for answer in answers:
+            result = graded.get(answer)
+            if result is None:
+                result = graded[answer] = self.grade(answer, title)
+            results.append(result)
+        return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="曲名の回答を採点する（--bench で速度を測る）")
+    parser.add_argument("title", nargs="?")
+    parser.add_argument("answers", nargs="*")
+    parser.add_argument("--aliases-file", default="title_aliases.json")
+    parser.add_argument("--bench", type=int, default=0, metavar="ANSWERS", help="合成した曲名と回答で採点の速さを測る")
+    args = parser.parse_args()
+
+    if args.bench:
+        rng = random.Random(0)
+        chars = "あいうえおかきくけこさしすせそたちつてとなにぬねのアイウエオ夜空海星恋abcdefg"
+        titles = ["".join(rng.choice(chars) for _ in range(rng.randint(3, 12))) for _ in range(10000)]
+        start = time.perf_counter()
+        matcher = AnswerMatcher(titles, readings=False)
+        built = time.perf_counter() - start
+        title = titles[0]
+        pool = [title, title.upper(), f"「{title}」", title[:-1], title + "x", "まったく違う答え", titles[1]]
+        answers = [rng.choice(pool) + ("" if rng.random() < 0.8 else str(rng.randrange(100)))
+                   for _ in range(args.bench)]
+        start = time.perf_counter()
+        results = matcher.grade_many(answers, title)
+        per_answer = (time.perf_counter() - start) / len(answers) * 1e6
+        counts = {level: sum(1 for r in results if r[0] == level) for level in LEVELS}
+        print(f"{len(titles)} 曲: 準備 {built * 1000:.0f} ms、{len(answers)} 件の採点 {per_answer:.2f} µs/件 {counts}")
+    elif args.title:
+        aliases = {}
+        if os.path.exists(args.aliases_file):
+            with open(args.aliases_file, 'r', encoding='utf-8') as f:
+                aliases = json.load(f)
+        matcher = AnswerMatcher([args.title, *aliases], aliases)
+        for answer in args.answers:
+            print(answer, *matcher.grade(answer, args.title))
@@ -0,0 +1,148 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+DEFAULT_CACHE_FILE = "detect_cache.json"
+
+
+# 画像ファイルの内容からハッシュ値を計算する（前回から変わっていない画像はスキップするため）
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ディレクトリまたはglobパターンから対象画像の一覧を作る
+def collect_images(target):
+    if os.path.isdir(target):
+        paths = [os.path.join(target, name) for name in os.listdir(target)]
+    else:
+        paths = glob.glob(target)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+# block_size.detect_blocks と同じ二値化＋外接矩形の検出（描画・保存はしない）
+def find_blocks(image, threshold=128, min_size=0):
+    from block_detection import detect_blocks
+
+    blocks, _ = detect_blocks(image, "threshold", {"threshold": threshold}, min_size)
+    return blocks
+
+
+# ワーカープロセスで1枚分の検出を行う
+# cv2 は実際に画像を読むときに読み込む（build_place_map をキャッシュだけで回すときは不要）
+# shared: 親プロセスの image_store にデコード済みの画像があれば、その SharedImage（コピーせずに読む）
+def detect_image(image_path, threshold=128, min_size=0, shared=None):
+    if shared is not None:
+        from image_store import attach
+
+        image = attach(shared)
+    else:
+        import cv2
+
+        image = cv2.imread(image_path)
+    if image is None:
+        return {"image": image_path, "error": f"Unable to load image {image_path}"}
+
+    height, width = image.shape[:2]
+    return {
+        "image": image_path,
+        "width": width,
+        "height": height,
+        "blocks": find_blocks(image, threshold, min_size)
+    }
+
+
+def load_cache(cache_file):
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print(f"キャッシュ '{cache_file}' が壊れているため作り直します。")
+    return {}
+
+
+def save_cache(cache, cache_file):
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+
+# 親プロセスですでにデコード済みの画像の SharedImage（なければ None。ワーカーがファイルから読む）
+def shared_image(path):
+    import image_store
+
+    return image_store.lookup(path)
+
+
+# 複数画像をプロセスプールで並列に検出する
+# 戻り値は画像ごとの結果（image, hash, width, height, blocks, cached）のリスト
+def detect_batch(target, threshold=128, min_size=0, workers=None, cache_file=DEFAULT_CACHE_FILE):
+    image_paths = collect_images(target)
+    cache = load_cache(cache_file)
+    params = {"threshold": threshold, "min_size": min_size}
+
+    results = {}
+    pending = []
+    for path in image_paths:
+        key = os.path.abspath(path)
+        digest = file_hash(path)
+        entry = cache.get(key)
+        if entry and entry.get("hash") == digest and entry.get("params") == params:
+            results[path] = dict(entry["result"], image=path, hash=digest, cached=True)
+        else:
+            pending.append((path, digest))
+
+    if pending:
+        # 全部キャッシュに載っていればプロセスプール（multiprocessing）は読み込まない
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (path, digest, executor.submit(detect_image, path, threshold, min_size, shared_image(path)))
+                for path, digest in pending
+            ]
+            for path, digest, future in futures:
+                result = future.result()
+                results[path] = dict(result, hash=digest, cached=False)
+                if "error" in result:
+                    print(f"Error: {result['error']}")
+                    continue
+                cache[os.path.abspath(path)] = {
+                    "hash": digest,
+                    "params": params,
+                    "result": {k: v for k, v in result.items() if k != "image"}
+                }
+
+    if cache_file and pending:
+        save_cache(cache, cache_file)
+
+    return [results[path] for path in image_paths]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="会場マップ画像のブロックを一括検出する")
+    parser.add_argument("target", nargs="?", default="../../client/src/assets",
+                        help="画像ディレクトリまたはglobパターン（例: 'assets/east_*.jpg'）")
+    parser.add_argument("--threshold", type=int, default=128)
+    parser.add_argument("--min-size", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_FILE)
+    parser.add_argument("--output", default="detected_blocks.json")
+    args = parser.parse_args()
+
+    batch = detect_batch(args.target, args.threshold, args.min_size, args.workers, args.cache)
+    for result in batch:
+        status = "スキップ（変更なし）" if result.get("cached") else "検出"
+        print(f"{result['image']}: {len(result.get('blocks', []))} ブロック [{status}]")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(batch, f, indent=4, ensure_ascii=False)
+    print(f"{args.output} に保存しました。")
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from block_detection import detect_blocks
+from block_geometry import cells_to_dict, divide_block, divide_blocks
+from grid_renderer import render_grid
+from place_map_shards import MINIFIED
+from space_numbering import number_blocks
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BASELINE = "bench_baseline.json"
+CELL_WIDTH = 10
+CELL_HEIGHT = 8
+GAP = 6
+# 短いステージは誤差が大きいので、比率に加えて差がこれを超えたときだけ不合格にする
+MIN_TIME_DELTA_MS = 2.0
+MIN_PEAK_DELTA_KB = 64
+# 短いステージは合計でこの時間になるまで繰り返して最速値を取る
+MIN_TOTAL_SECONDS = 0.2
+
+
+# 合成の会場マップ: 2列 × 3〜6行の島を n スペース分並べた親ブロックと、その枠線を描いた画像
+def make_venue(spaces, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    remaining = spaces
+    while remaining > 0:
+        v = min(rng.randint(3, 6), (remaining + 1) // 2)
+        h = 2 if remaining >= 2 * v else 1
+        rows.append((v, h))
+        remaining -= v * h
+
+    block_count = len(rows)
+    pitch_x = 2 * CELL_WIDTH + GAP
+    pitch_y = 6 * CELL_HEIGHT + GAP
+    cols = max(1, int((block_count * pitch_y / pitch_x) ** 0.5))
+    parents = []
+    for i, (v, h) in enumerate(rows):
+        x = GAP + (i % cols) * pitch_x
+        y = GAP + (i // cols) * pitch_y
+        parents.append((x, y, h * CELL_WIDTH, v * CELL_HEIGHT))
+
+    width = GAP + cols * pitch_x
+    height = GAP + ((block_count + cols - 1) // cols) * pitch_y
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    for x, y, w, h in parents:
+        cv2.rectangle(image, (x, y), (x + w, y + h), (0, 0, 0), 1)
+
+    vertical = [v for v, _ in rows]
+    horizontal = [h for _, h in rows]
+    return parents, vertical, horizontal, image
+
+
+def divide_each(parents, vertical, horizontal):
+    cells = {}
+    for (x, y, w, h), v, hs in zip(parents, vertical, horizontal):
+        for rect in divide_block(x, y, w, h, v, hs).values():
+            cells[f"Block_{len(cells) + 1}"] = rect
+    return cells
+
+
+def divide_vectorized(parents, vertical, horizontal):
+    return cells_to_dict(divide_blocks(parents, vertical, horizontal))
+
+
+# ステージ名 -> 計測する関数（合成マップ・分割済みセル・placeMap の準備は計測に含めない）
+def build_stages(spaces, seed=0):
+    parents, vertical, horizontal, image = make_venue(spaces, seed)
+    cells = divide_vectorized(parents, vertical, horizontal)
+    spec = {"prefix": "S", "start": 1, "digits": len(str(spaces)), "order": "left_to_right_top_to_bottom"}
+    place_map = number_blocks(cells, spec)
+    return {
+        "divide_block": lambda: divide_each(parents, vertical, horizontal),
+        "divide_blocks": lambda: divide_vectorized(parents, vertical, horizontal),
+        "sort_blocks": lambda: number_blocks(cells, spec),
+        "detect_blocks": lambda: detect_blocks(image)[0],
+        "draw_grid": lambda: render_grid(image, 40),
+        "json_pretty": lambda: json.dumps(place_map, indent=4, ensure_ascii=False),
+        "json_minified": lambda: json.dumps(place_map, ensure_ascii=False, **MINIFIED),
+    }, {"blocks": len(parents), "image": f"{image.shape[1]}x{image.shape[0]}"}
+
+
+# 最速の実行時間（tracemalloc なし）と、別に1回実行したときのピークメモリ（tracemalloc で追跡できる分）
+def measure(func, repeat):
+    best = float("inf")
+    total = 0.0
+    runs = 0
+    while runs < repeat or (total < MIN_TOTAL_SECONDS and runs < 1000):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_ms": best * 1000, "peak_kb": peak / 1024}
+
+
+def run_suite(sizes=DEFAULT_SIZES, stages=None, repeat=3, seed=0):
+    results = {}
+    for spaces in sizes:
+        stage_funcs, info = build_stages(spaces, seed)
+        print(f"--- {spaces} スペース（親ブロック {info['blocks']}、画像 {info['image']}）")
+        results[str(spaces)] = {}
+        for name, func in stage_funcs.items():
+            if stages and name not in stages:
+                continue
+            result = measure(func, repeat)
+            results[str(spaces)][name] = result
+            print(f"  {name:<14} {result['time_ms']:10.2f} ms {result['peak_kb'] / 1024:10.2f} MB")
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+# 基準と比べて time_ms / peak_kb が (1 + threshold) 倍を超えたステージを不合格にする
+def compare(results, baseline, time_threshold=0.3, memory_threshold=0.1):
+    failures = []
+    for spaces, stages in results.items():
+        for name, current in stages.items():
+            base = baseline.get("results", {}).get(spaces, {}).get(name)
+            if base is None:
+                print(f"  {spaces:>7} {name:<14} 基準なし")
+                continue
+            time_ratio = current["time_ms"] / base["time_ms"] if base["time_ms"] else 1.0
+            memory_ratio = current["peak_kb"] / base["peak_kb"] if base["peak_kb"] else 1.0
+            slow = time_ratio > 1 + time_threshold and current["time_ms"] - base["time_ms"] > MIN_TIME_DELTA_MS
+            heavy = (memory_ratio > 1 + memory_threshold
+                     and current["peak_kb"] - base["peak_kb"] > MIN_PEAK_DELTA_KB)
+            status = "NG" if slow or heavy else "OK"
+            print(f"  {spaces:>7} {name:<14} 時間 {time_ratio:6.2f}x  メモリ {memory_ratio:6.2f}x  {status}")
+            if slow or heavy:
+                failures.append((spaces, name))
+    return failures
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="座標計算・画像処理・JSON 出力の各ステージを合成マップで計測する")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--stages", nargs="+", default=None, help="計測するステージ（省略時はすべて）")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="今回の結果を基準として保存する")
+    parser.add_argument("--time-threshold", type=float, default=0.3, help="許容する時間の増加率（0.3 = +30%%）")
+    parser.add_argument("--memory-threshold", type=float, default=0.1, help="許容するピークメモリの増加率")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.stages, args.repeat, args.seed)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"{args.baseline} に基準を保存しました。")
+        raise SystemExit(0)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"基準ファイル {args.baseline} がありません（--update-baseline で作成）。")
+        raise SystemExit(0)
+    if baseline.get("environment") != environment():
+        print(f"注意: 基準は別の環境で計測されています: {baseline.get('environment')}")
+
+    print("--- 基準との比較")
+    failures = compare(results, baseline, args.time_threshold, args.memory_threshold)
+    print(f"{'不合格: ' + str(len(failures)) + ' ステージ' if failures else 'すべて合格'}")
+    raise SystemExit(1 if failures else 0)
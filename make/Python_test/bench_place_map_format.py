@@ -0,0 +1,58 @@
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+
+from place_map_shards import MINIFIED, write_shards
+
+
+def parse_time(path, repeat):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(raw)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, path, repeat):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    size = len(raw)
+    gz = len(gzip.compress(raw))
+    ms = parse_time(path, repeat) * 1000
+    print(f"{label:<28} {size / 1024:8.1f} KB {gz / 1024:8.1f} KB(gzip) {ms:8.2f} ms")
+    return size, ms
+
+
+# 従来の indent=4 の placeMap.json と、最小化・ホール分割版のサイズと読み込み時間を比べる
+def run_benchmark(place_map_path, scale=1, repeat=20):
+    with open(place_map_path, 'r', encoding='utf-8') as f:
+        place_map = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        minified_path = os.path.join(tmp_dir, "placeMap.min.json")
+        with open(minified_path, 'w', encoding='utf-8') as f:
+            json.dump(place_map, f, ensure_ascii=False, **MINIFIED)
+        shard_dir = os.path.join(tmp_dir, "shards")
+        index = write_shards(place_map, shard_dir, scale)
+
+        print(f"{'形式':<28} {'サイズ':>11} {'gzip後':>17} {'parse':>11}")
+        base_size, base_ms = report("pretty (indent=4)", place_map_path, repeat)
+        report("minified", minified_path, repeat)
+        for hall_id, info in index.items():
+            size, ms = report(f"sharded: {info['name']}", os.path.join(shard_dir, info["file"]), repeat)
+            print(f"{'':<28} → 従来比 {size / base_size:6.1%} / parse {ms / base_ms:6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="placeMap の出力形式ごとのサイズ・parse 時間を比較する")
+    parser.add_argument("place_map", nargs="?", default="../../client/src/assets/placeMap.json")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.place_map, args.scale, args.repeat)
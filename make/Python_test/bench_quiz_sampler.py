@@ -0,0 +1,72 @@
+import random
+import re
+import time
+
+from quiz_sampler import RangeSampler, TitleMasker
+
+
+# 従来の show_quiz と同じ「最大100回のランダム試行」で重ならない範囲を探す
+def rejection_draw(total_valid, num_lines, used_ranges):
+    if total_valid < num_lines:
+        return None
+    for _ in range(100):
+        start = random.randint(0, total_valid - num_lines)
+        end = start + num_lines
+        overlap = any(not (end <= r_start or start >= r_end) for r_start, r_end in used_ranges)
+        if not overlap:
+            used_ranges.append((start, end))
+            return start, end
+    return None
+
+
+# 全行を使い切るまで引いたときの時間と、途中で失敗した回数（行が残っているのに取れなかった）
+def bench_sampler(total_lines, rounds):
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        used = []
+        covered = 0
+        while covered < total_lines:
+            r = rejection_draw(total_lines, random.randint(1, 3), used)
+            if r is None:
+                failures += 1
+                break
+            covered += r[1] - r[0]
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        sampler = RangeSampler(total_lines)
+        while sampler.draw(random.randint(1, 3)) is not None:
+            pass
+    new = time.perf_counter() - start
+
+    print(f"範囲選択（{total_lines} 行 × {rounds} 回、全行を使い切るまで）")
+    print(f"  従来（棄却サンプリング）: {old * 1000:8.1f} ms  途中で失敗: {failures} / {rounds}")
+    print(f"  RangeSampler          : {new * 1000:8.1f} ms  途中で失敗: 0 / {rounds}")
+
+
+def bench_masker(title, lines):
+    start = time.perf_counter()
+    for line in lines:
+        re.compile(re.escape(title), re.IGNORECASE).sub("*****", line)
+    old = time.perf_counter() - start
+
+    start = time.perf_counter()
+    masker = TitleMasker(title, ("別名",))
+    for line in lines:
+        masker.mask(line)
+    new = time.perf_counter() - start
+
+    print(f"伏せ字処理（{len(lines)} 行）")
+    print(f"  従来（行ごとに re.compile）: {old / len(lines) * 1e6:6.2f} µs / 行")
+    print(f"  TitleMasker（表記揺れ込み）: {new / len(lines) * 1e6:6.2f} µs / 行")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    bench_sampler(40, 200)
+    bench_sampler(2000, 5)
+    title = "Walking Dream"
+    lines = [f"歌詞の {i} 行目 walking dream を歌う\n" if i % 7 == 0 else f"歌詞の {i} 行目\n" for i in range(100000)]
+    bench_masker(title, lines)
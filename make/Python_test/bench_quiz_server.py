@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import statistics
+import struct
+import time
+
+from quiz_engine import QuizLibrary
+from quiz_server import QuizServer, _unmask
+
+# quiz_server の負荷試験: 同じプロセスでサーバーを立て、多数の WebSocket / HTTP クライアントで同時に遊ぶ
+#   1人用: clients 人がそれぞれ rounds 問（next → reveal x2 → answer）
+#   部屋:  1つの部屋に room_players 人が参加し、司会が出題・表示・締め切りを繰り返す
+# 歌詞は合成データ（曲名入りの行を含む 40 行 x songs 曲）
+# クライアントとサーバーを別プロセスにする場合: --serve --port N でサーバーだけ起動し、別の端末で --port N を付けて実行する
+
+
+def make_library(songs=200, lines=40, seed=0):
+    rng = random.Random(seed)
+    library = {}
+    for i in range(songs):
+        title = f"曲{i:04d}"
+        library[title] = tuple(
+            f"{title} の {j} 行目\n" if rng.random() < 0.1 else f"歌詞 {i}-{j} {'ラララ' * rng.randint(1, 5)}\n"
+            for j in range(lines)
+        )
+    return QuizLibrary(library)
+
+
+# 最小限の WebSocket クライアント（テキストのみ、クライアント→サーバーはマスクする）
+class WSClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = []
+
+    @classmethod
+    async def connect(cls, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in head.split(b"\r\n", 1)[0]:
+            raise ConnectionError(head.decode(errors="replace"))
+        return cls(reader, writer)
+
+    def send(self, message):
+        payload = json.dumps(message, ensure_ascii=False).encode()
+        mask = os.urandom(4)
+        length = len(payload)
+        header = struct.pack("!BB", 0x81, 0x80 | length) if length < 126 else struct.pack("!BBH", 0x81, 0xFE, length)
+        self.writer.write(header + mask + _unmask(payload, mask))
+
+    async def receive(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        return json.loads(await self.reader.readexactly(length))
+
+    # type の返信が来るまで待つ（途中の配信は pending に残す）
+    async def request(self, message):
+        self.send(message)
+        while True:
+            reply = await self.receive()
+            if reply.get("reply_to") == message["type"]:
+                if "error" in reply:
+                    raise RuntimeError(reply["error"])
+                return reply
+            self.pending.append(reply)
+
+    async def close(self):
+        self.writer.close()
+
+
+async def http_request(reader, writer, method, path, body=None):
+    payload = b"" if body is None else json.dumps(body).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                 + payload)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(next(line.split(b":")[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")))
+    return json.loads(await reader.readexactly(length)) if length else None
+
+
+async def play_ws(port, rounds, latencies, rng):
+    client = await WSClient.connect(port)
+    await client.request({"type": "start", "rounds": rounds})
+    for _ in range(rounds):
+        for message in ({"type": "next"}, {"type": "reveal"}, {"type": "reveal"}):
+            start = time.perf_counter()
+            await client.request(message)
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await client.request({"type": "answer", "answer": f"曲{rng.randrange(200):04d}"})
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+
+
+async def play_http(port, rounds, latencies, rng):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    session = (await http_request(reader, writer, "POST", "/sessions", {"rounds": rounds}))["session"]
+    for _ in range(rounds):
+        for message in ({"type": "next"}, {"type": "reveal"}, {"type": "answer", "answer": "x"}):
+            start = time.perf_counter()
+            await http_request(reader, writer, "POST", f"/sessions/{session}", message)
+            latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def play_room(port, players, rounds):
+    host = await WSClient.connect(port)
+    room = (await host.request({"type": "create_room"}))["room"]
+    clients = await asyncio.gather(*(WSClient.connect(port) for _ in range(players)))
+    await asyncio.gather(*(c.request({"type": "join", "room": room, "name": f"p{i}"}) for i, c in enumerate(clients)))
+
+    async def wait_for(client, kind):
+        while True:
+            event = client.pending.pop(0) if client.pending else await client.receive()
+            if event.get("type") == kind:
+                return event
+
+    spreads = []
+    for _ in range(rounds):
+        await host.request({"type": "room_next"})
+        await asyncio.gather(*(wait_for(c, "round") for c in clients))
+        await host.request({"type": "room_reveal"})
+        arrived = await asyncio.gather(*(wait_for(c, "reveal") for c in clients))
+        assert len(arrived) == players
+        await asyncio.gather(*(c.request({"type": "room_answer", "answer": "x"}) for c in clients))
+        result = await host.request({"type": "room_close"})
+        elapsed = [entry["elapsed_ms"] for entry in result["ranking"]]
+        spreads.append((min(elapsed), statistics.median(elapsed), max(elapsed)))
+        await asyncio.gather(*(wait_for(c, "result") for c in clients))
+    for c in (host, *clients):
+        await c.close()
+    return spreads
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def serve(port, rounds):
+    server = QuizServer(make_library(), rounds)
+    await server.start(port=port)
+    print(f"合成データでサーバーを起動しました（port {server.port}）")
+    await server.server.serve_forever()
+
+
+async def main(clients, http_clients, rounds, room_players, port=None):
+    server = None
+    if port is None:
+        server = QuizServer(make_library(), rounds)
+        await server.start(port=0)
+        port = server.port
+
+    latencies = []
+    rng = random.Random(0)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(play_ws(port, rounds, latencies, rng) for _ in range(clients)),
+        *(play_http(port, rounds, latencies, rng) for _ in range(http_clients)),
+    )
+    elapsed = time.perf_counter() - start
+    print(f"1人用: WebSocket {clients} 人 + HTTP {http_clients} 人 x {rounds} 問（同時に接続）")
+    print(f"  {len(latencies)} リクエスト / {elapsed:.2f} s = {len(latencies) / elapsed:,.0f} req/s  "
+          f"p50 {percentile(latencies, 0.5):.2f} ms  p99 {percentile(latencies, 0.99):.2f} ms")
+
+    if room_players:
+        spreads = await play_room(port, room_players, 3)
+        print(f"部屋: {room_players} 人で 3 問")
+        for i, (low, mid, high) in enumerate(spreads, 1):
+            print(f"  {i} 問目 回答時間 最小 {low:.1f} / 中央 {mid:.1f} / 最大 {high:.1f} ms（全員が即答）")
+    if server:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="quiz_server の同時接続・応答時間を測る")
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket の1人用セッション数")
+    parser.add_argument("--http-clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--room-players", type=int, default=500)
+    parser.add_argument("--port", type=int, default=None, help="起動済みのサーバー（省略時は同じプロセスで起動する）")
+    parser.add_argument("--serve", action="store_true", help="合成データのサーバーだけを起動する")
+    args = parser.parse_args()
+    if args.serve:
+        asyncio.run(serve(args.port or 0, args.rounds))
+    else:
+        asyncio.run(main(args.clients, args.http_clients, args.rounds, args.room_players, args.port))
@@ -0,0 +1,211 @@
+import time
+
+import cv2
+import numpy as np
+
+# 検出方法（グレースケール画像 → ブロックが白の二値画像）の登録先
+STRATEGIES = {}
+
+DEFAULT_PARAMS = {
+    "threshold": {"threshold": 128},
+    "canny": {"low": 50, "high": 150},
+    "adaptive": {"block_size": 15, "c": 5},
+    "morphology": {"threshold": 128, "kernel": 3, "iterations": 1},
+}
+
+
+def register_strategy(name):
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+# block_size.py と同じ固定しきい値の二値化
+@register_strategy("threshold")
+def threshold_strategy(gray, threshold=128):
+    _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    return binary
+
+
+# detect_blocks.py と同じ Canny エッジ
+@register_strategy("canny")
+def canny_strategy(gray, low=50, high=150):
+    return cv2.Canny(gray, low, high)
+
+
+# 明るさにムラのあるスキャン画像向けの適応的二値化
+@register_strategy("adaptive")
+def adaptive_strategy(gray, block_size=15, c=5):
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block_size, c)
+
+
+# 二値化してからクロージングで枠の切れ目をつなぐ
+@register_strategy("morphology")
+def morphology_strategy(gray, threshold=128, kernel=3, iterations=1):
+    _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    element = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel, kernel))
+    return cv2.morphologyEx(binary, cv2.MORPH_CLOSE, element, iterations=iterations)
+
+
+def _to_gray(image):
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _bounding_rects(binary, min_size, offset=(0, 0)):
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    ox, oy = offset
+    rects = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w > min_size and h > min_size:
+            rects.append((x + ox, y + oy, w, h))
+    return rects
+
+
+# scale x scale ごとの最小値で縮小する（平均だと 1〜2px の細い枠線が消えてしまうため）
+def _min_pool(gray, scale):
+    eroded = cv2.erode(gray, np.ones((scale, scale), dtype=np.uint8), anchor=(0, 0))
+    return np.ascontiguousarray(eroded[::scale, ::scale])
+
+
+# 縮小画像で大まかな候補を探し、その周辺だけを原寸で検出し直す
+def _pyramid_detect(gray, strategy, params, min_size, levels, pad):
+    scale = 2 ** levels
+    height, width = gray.shape
+    small = _min_pool(gray, scale)
+    sh, sw = small.shape
+
+    start = time.perf_counter()
+    coarse = strategy(small, **params)
+    coarse_min = max(0, min_size // scale - 1)
+    candidates = _bounding_rects(coarse, coarse_min)
+
+    # 候補の周りを広げた領域をまとめ、重なった領域は1つの ROI にする
+    roi_mask = np.zeros_like(small)
+    margin = max(1, pad // scale + 1)
+    for x, y, w, h in candidates:
+        roi_mask[max(0, y - margin):y + h + margin, max(0, x - margin):x + w + margin] = 255
+    contours, _ = cv2.findContours(roi_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    coarse_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    blocks = set()
+    roi_area = 0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        x0, y0 = x * scale, y * scale
+        x1 = width if x + w >= sw else (x + w) * scale
+        y1 = height if y + h >= sh else (y + h) * scale
+        roi_area += (x1 - x0) * (y1 - y0)
+        refined = strategy(gray[y0:y1, x0:x1], **params)
+        # ROI の端で切れたもの（画像の端は除く）は別の大きな図形の一部なので捨てる
+        for bx, by, bw, bh in _bounding_rects(refined, min_size, (x0, y0)):
+            if (bx > x0 or x0 == 0) and (by > y0 or y0 == 0) and \
+                    (bx + bw < x1 or x1 == width) and (by + bh < y1 or y1 == height):
+                blocks.add((bx, by, bw, bh))
+    refine_ms = (time.perf_counter() - start) * 1000
+
+    stats = {
+        "coarse_ms": coarse_ms,
+        "refine_ms": refine_ms,
+        "roi_count": len(contours),
+        "roi_coverage": roi_area / (width * height),
+    }
+    return list(blocks), stats
+
+
+# ブロック検出の共通入口
+# image は BGR / グレースケールの配列、または画像のパス（パスならグレースケールは image_store で共有する）
+# pyramid_levels=0 なら原寸で一度に検出、1以上なら 1/2**levels の縮小画像で候補を探してから原寸で精査する
+# 戻り値: (blocks, metrics)  blocks は {"x", "y", "width", "height"} のリスト
+def detect_blocks(image, strategy="threshold", params=None, min_size=0, pyramid_levels=0, pad=8):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Invalid strategy: {strategy}")
+    func = STRATEGIES[strategy]
+    params = dict(DEFAULT_PARAMS.get(strategy, {}), **(params or {}))
+
+    start = time.perf_counter()
+    if isinstance(image, str):
+        import image_store
+
+        gray = image_store.raster(image, "gray")
+    else:
+        gray = _to_gray(image)
+    if pyramid_levels > 0:
+        rects, stats = _pyramid_detect(gray, func, params, min_size, pyramid_levels, pad)
+    else:
+        rects = _bounding_rects(func(gray, **params), min_size)
+        stats = {"roi_count": 1, "roi_coverage": 1.0}
+    elapsed = (time.perf_counter() - start) * 1000
+
+    blocks = [{"x": x, "y": y, "width": w, "height": h} for x, y, w, h in rects]
+    metrics = dict(stats, strategy=strategy, params=params, pyramid_levels=pyramid_levels,
+                   time_ms=elapsed, count=len(blocks),
+                   min_width=min((b["width"] for b in blocks), default=0),
+                   min_height=min((b["height"] for b in blocks), default=0))
+    return blocks, metrics
+
+
+def _iou(a, b):
+    ix = max(0, min(a["x"] + a["width"], b["x"] + b["width"]) - max(a["x"], b["x"]))
+    iy = max(0, min(a["y"] + a["height"], b["y"] + b["height"]) - max(a["y"], b["y"]))
+    inter = ix * iy
+    union = a["width"] * a["height"] + b["width"] * b["height"] - inter
+    return inter / union if union else 0
+
+
+# 基準の検出結果（原寸検出や手作業の正解）と比べた再現率・適合率
+def score_against(blocks, reference, min_iou=0.8):
+    if not blocks or not reference:
+        return {"recall": 0.0 if reference else 1.0, "precision": 0.0 if blocks else 1.0}
+    by_row = {}
+    for i, ref in enumerate(reference):
+        by_row.setdefault(ref["y"] // 32, []).append(i)
+
+    matched = set()
+    hits = 0
+    for block in blocks:
+        row = block["y"] // 32
+        for r in (row - 1, row, row + 1):
+            found = next((i for i in by_row.get(r, []) if i not in matched and _iou(block, reference[i]) >= min_iou), None)
+            if found is not None:
+                matched.add(found)
+                hits += 1
+                break
+    return {"recall": hits / len(reference), "precision": hits / len(blocks)}
+
+
+# 複数の検出方法・縮小段数を同じ画像で比べる
+# recall / precision は同じ検出方法の原寸検出（pyramid_levels=0）との比較
+def compare_strategies(image, configs, min_size=0):
+    references = {}
+    results = []
+    for config in configs:
+        strategy = config.get("strategy", "threshold")
+        if strategy not in references:
+            references[strategy], _ = detect_blocks(image, strategy, config.get("params"), min_size)
+        blocks, metrics = detect_blocks(image, min_size=min_size, **config)
+        metrics.update(score_against(blocks, references[strategy]))
+        results.append(metrics)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="検出方法ごとの時間と検出数を比べる")
+    parser.add_argument("image", nargs="?", default="east_456_block.jpg")
+    parser.add_argument("--min-size", type=int, default=15)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        print(f"Error: Unable to load image {args.image}")
+    else:
+        configs = [{"strategy": name} for name in STRATEGIES]
+        configs += [{"strategy": name, "pyramid_levels": 2} for name in STRATEGIES]
+        for m in compare_strategies(image, configs, args.min_size):
+            print(f"{m['strategy']:<11} pyramid={m['pyramid_levels']} "
+                  f"{m['time_ms']:7.1f} ms  検出数 {m['count']:4d}  ROI {m['roi_count']:4d} "
+                  f"({m['roi_coverage']:.0%})  recall {m['recall']:.2f}  precision {m['precision']:.2f}")
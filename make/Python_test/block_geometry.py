@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+# numpy は複数ブロックを一括で分割するときだけ読み込む（1ブロック分の divide_block は純 Python で計算する）
+
+
+# 分割後のセル1つ分のレコード（parent は元ブロックの番号、row/col はブロック内の位置）
+@lru_cache(maxsize=None)
+def cell_dtype():
+    import numpy as np
+
+    return np.dtype([
+        ("parent", np.int32),
+        ("row", np.int32),
+        ("col", np.int32),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("width", np.float64),
+        ("height", np.float64),
+    ])
+
+
+def __getattr__(name):
+    # 従来どおり block_geometry.CELL_DTYPE でも参照できるようにする
+    if name == "CELL_DTYPE":
+        return cell_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 複数のブロックをまとめて縦横に分割し、全セルを構造化配列で返す
+# parents: (x, y, width, height) の並び、または x/y/width/height を持つ dict の並び
+# vertical_segments / horizontal_segments: 全ブロック共通の整数、またはブロックごとの配列
+def divide_blocks(parents, vertical_segments, horizontal_segments):
+    import numpy as np
+
+    rects = _as_rect_array(parents)
+    count = len(rects)
+
+    v = np.broadcast_to(np.asarray(vertical_segments, dtype=np.int64), (count,))
+    h = np.broadcast_to(np.asarray(horizontal_segments, dtype=np.int64), (count,))
+    if count and (v.min() < 1 or h.min() < 1):
+        raise ValueError("Segments must be positive")
+
+    cells_per_parent = v * h
+    total = int(cells_per_parent.sum())
+    cells = np.empty(total, dtype=cell_dtype())
+    if total == 0:
+        return cells
+
+    parent = np.repeat(np.arange(count), cells_per_parent)
+    offsets = np.cumsum(cells_per_parent) - cells_per_parent
+    local = np.arange(total) - offsets[parent]
+    h_rep = h[parent]
+    row = local // h_rep
+    col = local % h_rep
+
+    block_width = rects[:, 2] / h
+    block_height = rects[:, 3] / v
+
+    cells["parent"] = parent
+    cells["row"] = row
+    cells["col"] = col
+    cells["x"] = rects[parent, 0] + col * block_width[parent]
+    cells["y"] = rects[parent, 1] + row * block_height[parent]
+    cells["width"] = block_width[parent]
+    cells["height"] = block_height[parent]
+    return cells
+
+
+def _as_rect_array(parents):
+    import numpy as np
+
+    if isinstance(parents, np.ndarray) and parents.dtype.names:
+        return np.column_stack([parents[k].astype(np.float64) for k in ("x", "y", "width", "height")])
+
+    rows = [
+        (p["x"], p["y"], p["width"], p["height"]) if isinstance(p, dict) else tuple(p)
+        for p in parents
+    ]
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+
+
+# 構造化配列を従来の {"Block_1": {"x":..., "y":..., "width":..., "height":...}} 形式に変換する
+def cells_to_dict(cells, prefix="Block_"):
+    xs = cells["x"].tolist()
+    ys = cells["y"].tolist()
+    ws = cells["width"].tolist()
+    hs = cells["height"].tolist()
+    return {
+        f"{prefix}{i + 1}": {"x": x, "y": y, "width": w, "height": h}
+        for i, (x, y, w, h) in enumerate(zip(xs, ys, ws, hs))
+    }
+
+
+# 1ブロック分のセルを ("Block_1", rect), ... の順に1件ずつ返す（stream_json.write_stream にそのまま渡せる）
+# divide_blocks と同じ順番・同じ浮動小数点演算で計算するので、結果は一括版と一致する
+def iter_divide_block(x, y, width, height, vertical_segments, horizontal_segments, prefix="Block_"):
+    if vertical_segments < 1 or horizontal_segments < 1:
+        raise ValueError("Segments must be positive")
+    x, y = float(x), float(y)
+    block_width = width / horizontal_segments
+    block_height = height / vertical_segments
+
+    number = 1
+    for row in range(vertical_segments):
+        for col in range(horizontal_segments):
+            yield f"{prefix}{number}", {
+                "x": x + col * block_width,
+                "y": y + row * block_height,
+                "width": block_width,
+                "height": block_height,
+            }
+            number += 1
+
+
+# 従来の divide_block と同じ出力を返す（1ブロック分）
+def divide_block(x, y, width, height, vertical_segments, horizontal_segments):
+    return dict(iter_divide_block(x, y, width, height, vertical_segments, horizontal_segments))
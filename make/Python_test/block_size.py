@@ -1,10 +1,11 @@
 import cv2
-import numpy as np
 
-def detect_blocks(image_path):
-    image = cv2.imread(image_path)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    _, binary = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY_INV)
+import image_store
+
+def detect_blocks(image_path, output_path='detected_block.png'):
+    # デコードと二値化は image_store で共有する（同じ画像を別のステージで読み直さない）
+    image = image_store.load(image_path).copy()
+    binary = image_store.raster(image_path, "binary", threshold=128)
     contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     blocks = []
@@ -16,12 +17,15 @@ def detect_blocks(image_path):
         # ブロック番号を描画
         cv2.putText(image, f"{i + 1}", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
 
-    cv2.imwrite('detected_block.png', image)
+    cv2.imwrite(output_path, image)
+    # bunkatu.py などが output_path を読むときにデコードし直さなくて済むようにする
+    image_store.put(output_path, image)
     return blocks
 
 # 使用例
-image_path = 'east_456_block.jpg'  # ← ここを実際の画像パスに変更
-blocks = detect_blocks(image_path)
+if __name__ == "__main__":
+    image_path = 'east_456_block.jpg'  # ← ここを実際の画像パスに変更
+    blocks = detect_blocks(image_path)
 
-for i, (x, y, w, h) in enumerate(blocks):
-    print(f"Block {i + 1}: x={x}, y={y}, width={w}, height={h}")
+    for i, (x, y, w, h) in enumerate(blocks):
+        print(f"Block {i + 1}: x={x}, y={y}, width={w}, height={h}")
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import os
+
+from batch_detect import detect_image, file_hash, shared_image
+from block_geometry import divide_block
+from json_atomic import write_json_atomic
+from space_numbering import number_blocks
+
+DEFAULT_CACHE_DIR = ".place_map_cache"
+
+
+# 入力（JSON にできる値）から各ステージのキャッシュキーを作る
+def cache_key(stage, inputs):
+    payload = json.dumps([stage, inputs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key + ".json")
+
+    def get(self, stage, key):
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, stage, key, value):
+        write_json_atomic(value, self._path(stage, key))
+
+    # キャッシュにあればそれを返し、なければ compute() の結果を保存して返す
+    def run(self, stage, inputs, compute):
+        key = cache_key(stage, inputs)
+        value = self.get(stage, key)
+        if value is not None:
+            self.hits += 1
+            return key, value
+        self.misses += 1
+        value = compute()
+        self.put(stage, key, value)
+        return key, value
+
+
+# detect: ホール画像ごとのブロック検出（画像の中身と検出パラメータがキー）
+def detect_stage(halls, cache, workers=None):
+    detected = {}
+    pending = []
+    for hall in halls:
+        if not any("point" in island or "block" in island for island in hall.get("islands", [])):
+            continue
+        params = dict({"threshold": 128, "min_size": 0}, **hall.get("detect", {}))
+        inputs = {"image": file_hash(hall["image"]), "params": params}
+        key = cache_key("detect", inputs)
+        blocks = cache.get("detect", key)
+        if blocks is None:
+            pending.append((hall, params, key))
+        else:
+            cache.hits += 1
+            detected[hall["name"]] = blocks
+
+    if pending:
+        # 全部キャッシュに載っていればプロセスプール（multiprocessing）は読み込まない
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (hall, key, executor.submit(detect_image, hall["image"], params["threshold"], params["min_size"],
+                                            shared_image(hall["image"])))
+                for hall, params, key in pending
+            ]
+            for hall, key, future in futures:
+                result = future.result()
+                if "error" in result:
+                    raise ValueError(result["error"])
+                cache.misses += 1
+                cache.put("detect", key, result["blocks"])
+                detected[hall["name"]] = result["blocks"]
+    return detected
+
+
+# 島の元になる矩形
+#   rect:  明示の [x, y, width, height]
+#   point: [x, y] を含む検出ブロック（いくつもあれば一番小さいもの）
+#   block: 検出結果の番号（1始まり。輪郭の検出順で変わるので point を使う方がよい）
+def island_rect(island, blocks):
+    if "rect" in island:
+        x, y, w, h = island["rect"]
+        return {"x": x, "y": y, "width": w, "height": h}
+    if "point" in island:
+        px, py = island["point"]
+        found = [b for b in blocks or ()
+                 if b["x"] <= px <= b["x"] + b["width"] and b["y"] <= py <= b["y"] + b["height"]]
+        if not found:
+            raise ValueError(f"No block was detected at {island['point']}")
+        return min(found, key=lambda b: b["width"] * b["height"])
+    index = island["block"] - 1
+    if blocks is None or not 0 <= index < len(blocks):
+        raise ValueError(f"Block {island['block']} was not detected")
+    return blocks[index]
+
+
+# subdivide → number: 島ごとに、入力が変わったものだけを計算し直す
+def island_stage(island, rect, cache):
+    segments = [island.get("vertical_segments", 1), island.get("horizontal_segments", 1)]
+    subdivide_key, sub_blocks = cache.run(
+        "subdivide",
+        {"rect": rect, "segments": segments},
+        lambda: divide_block(rect["x"], rect["y"], rect["width"], rect["height"], *segments)
+    )
+    _, numbered = cache.run(
+        "number",
+        {"subdivide": subdivide_key, "spec": island["spec"]},
+        lambda: number_blocks(sub_blocks, island["spec"])
+    )
+    return numbered
+
+
+# merge: 全ホール・全島の結果を1つにまとめる（スペース番号の重複はエラー）
+def merge_stage(results):
+    merged = {}
+    for source, numbered in results:
+        for name, rect in numbered.items():
+            if name in merged:
+                raise ValueError(f"Duplicate space id {name} in {source}")
+            merged[name] = rect
+    return merged
+
+
+# validate: 保存する前に重なり・重複・座標のずれを検査する（error があれば ValueError。戻り値は warning の一覧）
+def validate_stage(place_map, strict=False):
+    from place_map_validation import check_place_map
+
+    return check_place_map(place_map, strict)
+
+
+def build_place_map(layout, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    cache = StageCache(cache_dir)
+    halls = layout["halls"]
+    detected = detect_stage(halls, cache, workers)
+
+    results = []
+    for hall in halls:
+        blocks = detected.get(hall["name"])
+        for i, island in enumerate(hall.get("islands", [])):
+            source = f"{hall['name']} island {island.get('id', i + 1)}"
+            rect = island_rect(island, blocks)
+            results.append((source, island_stage(island, rect, cache)))
+
+    return merge_stage(results), cache
+
+
+def load_layout(layout_file):
+    with open(layout_file, 'r', encoding='utf-8') as f:
+        layout = json.load(f)
+    # 画像パスはレイアウトファイルからの相対パス
+    base_dir = os.path.dirname(os.path.abspath(layout_file))
+    for hall in layout["halls"]:
+        if "image" in hall:
+            hall["image"] = os.path.join(base_dir, hall["image"])
+    return layout
+
+
+if __name__ == "__main__":
+    from place_map_shards import save_place_map
+    from spatial_index import HallGrids
+
+    parser = argparse.ArgumentParser(description="placeMap.json を detect → subdivide → number → merge → validate で生成する")
+    parser.add_argument("layout", nargs="?", default="place_map_layout.json")
+    parser.add_argument("--output", default=None, help="出力先（省略時はレイアウトの output）")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=["pretty", "minified", "ndjson", "sharded"], default="pretty",
+                        help="sharded の場合 --output はディレクトリ")
+    parser.add_argument("--scale", type=int, default=1, help="sharded 時の座標の量子化倍率")
+    parser.add_argument("--grid-index", default=None, help="ホールごとのグリッド索引の出力先（例: placeMap.grid.json）")
+    parser.add_argument("--strict", action="store_true", help="検査で warning（すき間・座標のずれ）があっても保存しない")
+    args = parser.parse_args()
+
+    layout = load_layout(args.layout)
+    output = args.output or layout.get("output", "placeMap.json")
+
+    place_map, cache = build_place_map(layout, args.cache_dir, args.workers)
+    try:
+        warnings = validate_stage(place_map, args.strict)
+    except ValueError as e:
+        raise SystemExit(f"{e}\n{output} は保存しませんでした。")
+    save_place_map(place_map, output, args.format, args.scale)
+    if args.grid_index:
+        HallGrids(place_map).save(args.grid_index)
+    print(f"{len(place_map)} スペースを {output} に保存しました。"
+          f"（キャッシュ利用: {cache.hits} / 再計算: {cache.misses}、検査の warning: {len(warnings)}）")
@@ -1,17 +1,31 @@
 import cv2
 
-# Block 1 の座標とサイズ
-x, y, w, h = 668, 768, 16, 63
-segment_height = h // 3
+import image_store
 
-# 画像の読み込み
-image = cv2.imread("detected_block.png")  # ← ここを実際の画像ファイル名に変更
+# ブロックを縦に segments 等分する分割線を描画して保存する
+def draw_division_lines(image_path, x, y, w, h, output_path, segments=3, color=(0, 255, 0), thickness=2):
+    segment_height = h // segments
 
-# 分割線を描画（赤色）
-for i in range(1, 3):
-    start_point = (x, y + i * segment_height)
-    end_point = (x + w, y + i * segment_height)
-    cv2.line(image, start_point, end_point, (0, 255, 0), 2)
+    # 画像の読み込み（block_size.py が書いたばかりの画像ならデコードし直さない）
+    try:
+        image = image_store.load(image_path).copy()
+    except FileNotFoundError:
+        print(f"Error: Unable to load image {image_path}")
+        return None
 
-# 結果を保存
-cv2.imwrite("block1_divided.png", image)
+    # 分割線を描画
+    for i in range(1, segments):
+        start_point = (x, y + i * segment_height)
+        end_point = (x + w, y + i * segment_height)
+        cv2.line(image, start_point, end_point, color, thickness)
+
+    # 結果を保存
+    cv2.imwrite(output_path, image)
+    image_store.put(output_path, image)
+    return output_path
+
+if __name__ == "__main__":
+    # Block 1 の座標とサイズ
+    x, y, w, h = 668, 768, 16, 63
+
+    draw_division_lines("detected_block.png", x, y, w, h, "block1_divided.png")  # ← ここを実際の画像ファイル名に変更
@@ -0,0 +1,402 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from json_atomic import write_json_atomic
+
+# 会場マップ・クイズ用ツールのサブコマンド CLI
+#   python make/Python_test <command> [options]
+#   python make/Python_test batch jobs.json [jobs.yaml ...]
+#   python make/Python_test --profile-startup <command> ...（起動時間と import の内訳を表示）
+# 各コマンドは同名の関数としても呼べる（run_job / run_batch で dict のジョブをそのまま実行できる）
+# cv2 などの重い依存は各コマンドの中で import するので、バッチでは最初の1回だけ読み込まれる
+
+COMMANDS = {}
+
+
+def register_command(name, help, arguments=()):
+    def decorator(func):
+        COMMANDS[name] = {"func": func, "help": help, "arguments": arguments}
+        return func
+    return decorator
+
+
+def _key_value(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"KEY=VALUE の形式で指定してください: {text}")
+    try:
+        value = json.loads(value)
+    except json.JSONDecodeError:
+        pass
+    return key, value
+
+
+def _save_image(path, image):
+    import cv2
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not cv2.imwrite(path, image):
+        raise OSError(f"Unable to write image {path}")
+
+
+@register_command("detect", "画像からブロックを検出する", [
+    (("image",), {}),
+    (("--strategy",), {"help": "threshold / canny / adaptive / morphology"}),
+    (("--param",), {"dest": "params", "action": "append", "type": _key_value, "metavar": "KEY=VALUE"}),
+    (("--min-size",), {"type": int}),
+    (("--pyramid-levels",), {"type": int}),
+    (("--output",), {"help": "検出結果を描画した画像の出力先"}),
+    (("--json",), {"dest": "json_output", "help": "ブロック一覧（JSON）の出力先"}),
+])
+def detect(image, strategy="threshold", params=None, min_size=0, pyramid_levels=0, output=None, json_output=None):
+    from block_detection import detect_blocks
+    from overlay_compositor import composite, load_image
+
+    # パスで渡すと、同じ画像を扱う後続のジョブでデコード・グレースケール化を使い回せる
+    blocks, metrics = detect_blocks(image, strategy, dict(params or {}), min_size, pyramid_levels)
+    if output:
+        labeled = [dict(block, label=str(i + 1)) for i, block in enumerate(blocks)]
+        _save_image(output, composite(load_image(image), labeled, label_rects=True))
+    if json_output:
+        write_json_atomic(blocks, json_output, indent=4)
+    return {"image": image, "count": len(blocks), "blocks": blocks, "metrics": metrics}
+
+
+@register_command("grid", "画像にグリッドと座標ラベルを描く", [
+    (("image",), {}),
+    (("output",), {}),
+    (("--grid-size",), {"type": int}),
+    (("--tiles",), {"help": "タイル画像ピラミッドの出力ディレクトリ"}),
+])
+def grid(image, output, grid_size=40, tiles=None):
+    from grid_renderer import render_grid, write_tile_pyramid
+    from overlay_compositor import load_image
+
+    grid_image = render_grid(load_image(image), grid_size)
+    _save_image(output, grid_image)
+    result = {"image": image, "output": output}
+    if tiles:
+        result["tiles"] = write_tile_pyramid(grid_image, tiles)
+    return result
+
+
+@register_command("divide", "ブロックをスペースに分割して番号を振る（A_senyou.py の非対話版）", [
+    (("x",), {"type": int}),
+    (("y",), {"type": int}),
+    (("width",), {"type": int}),
+    (("height",), {"type": int}),
+    (("--vertical",), {"type": int, "help": "縦方向の分割数"}),
+    (("--horizontal",), {"type": int, "help": "横方向の分割数"}),
+    (("--order",), {"help": "例: top_to_bottom_left_to_right"}),
+    (("--prefix",), {}),
+    (("--start",), {"type": int}),
+    (("--digits",), {"type": int}),
+    (("--serpentine",), {"action": "store_true"}),
+    (("--output",), {}),
+])
+def divide(x, y, width, height, vertical=1, horizontal=1, order="top_to_bottom_left_to_right", prefix="",
+           start=1, digits=2, serpentine=False, output=None, **spec):
+    from block_geometry import divide_block
+    from space_numbering import iter_numbered
+    from stream_json import format_for, write_stream
+
+    spec.update(prefix=prefix, start=start, digits=digits, order=order, serpentine=serpentine)
+    spaces = iter_numbered(divide_block(x, y, width, height, vertical, horizontal), spec)
+    if output:
+        # .ndjson / .jsonl なら NDJSON、それ以外は従来どおり indent=4
+        fmt = "ndjson" if format_for(output) == "ndjson" else "pretty"
+        return {"count": write_stream(spaces, output, fmt), "output": output}
+    spaces = dict(spaces)
+    return {"count": len(spaces), "spaces": spaces}
+
+
+@register_command("overlay", "画像に矩形をまとめて重ね描きする（create_line.py / bunkatu.py の一括版）", [
+    (("image",), {}),
+    (("output",), {}),
+    (("--rects",), {"dest": "rects_file", "help": "矩形の JSON（placeMap 形式またはリスト）"}),
+    (("--rect",), {"dest": "rects", "action": "append", "nargs": 4, "type": int, "metavar": ("X", "Y", "W", "H")}),
+    (("--thickness",), {"type": int}),
+    (("--label-rects",), {"action": "store_true"}),
+])
+def overlay(image, output, rects=(), lines=(), labels=(), rects_file=None, thickness=2, label_rects=False):
+    from overlay_compositor import composite
+
+    shapes = []
+    if rects_file:
+        with open(rects_file, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        shapes += [dict(rect, label=code) for code, rect in loaded.items()] if isinstance(loaded, dict) else loaded
+    for rect in rects:
+        shapes.append(rect if isinstance(rect, dict) else dict(zip(("x", "y", "width", "height"), rect)))
+    _save_image(output, composite(image, shapes, lines, labels, thickness=thickness, label_rects=label_rects))
+    return {"image": image, "output": output, "rects": len(shapes)}
+
+
+@register_command("build", "placeMap.json を生成する（build_place_map.py と同じ）", [
+    (("layout",), {"nargs": "?"}),
+    (("--output",), {}),
+    (("--cache-dir",), {}),
+    (("--workers",), {"type": int}),
+    (("--format",), {"dest": "fmt", "choices": ["pretty", "minified", "ndjson", "sharded"]}),
+    (("--scale",), {"type": int}),
+    (("--grid-index",), {}),
+    (("--strict",), {"action": "store_true", "help": "検査で warning があっても保存しない"}),
+])
+def build(layout="place_map_layout.json", output=None, cache_dir=None, workers=None, fmt="pretty", scale=1,
+          grid_index=None, strict=False):
+    from build_place_map import DEFAULT_CACHE_DIR, build_place_map, load_layout, validate_stage
+    from place_map_shards import save_place_map
+    from spatial_index import HallGrids
+
+    layout_data = load_layout(layout)
+    output = output or layout_data.get("output", "placeMap.json")
+    place_map, cache = build_place_map(layout_data, cache_dir or DEFAULT_CACHE_DIR, workers)
+    # 検査に通らなければ ValueError（出力は書かない）
+    warnings = validate_stage(place_map, strict)
+    save_place_map(place_map, output, fmt, scale)
+    if grid_index:
+        HallGrids(place_map).save(grid_index)
+    return {"output": output, "spaces": len(place_map), "cache_hits": cache.hits, "cache_misses": cache.misses,
+            "warnings": warnings}
+
+
+@register_command("validate", "placeMap の重なり・重複・すき間・座標のずれを検査する（error があれば失敗）", [
+    (("place_map",), {"nargs": "?"}),
+    (("--max-gap",), {"type": float}),
+    (("--integer",), {"action": "store_true", "help": "整数でない座標も報告する"}),
+    (("--strict",), {"action": "store_true", "help": "warning でも失敗にする"}),
+])
+def validate(place_map="../../client/src/assets/placeMap.json", max_gap=None, integer=False, strict=False):
+    from place_map_validation import MAX_GAP, check_place_map, summarize
+    from stream_json import iter_stream
+
+    # 重複したキーも見つけられるように、dict にせず1件ずつ読む
+    pairs = list(iter_stream(place_map))
+    warnings = check_place_map(pairs, strict, max_gap=MAX_GAP if max_gap is None else max_gap, integer=integer)
+    return {"place_map": place_map, "spaces": len(pairs), "counts": summarize(warnings), "warnings": warnings}
+
+
+@register_command("stats", "クイズ成績を並び替え・絞り込みして出力する（show_quiz_stats.py の非対話版）", [
+    (("--stats-file",), {}),
+    (("--sort",), {"help": "correct / incorrect / total / accuracy / avg_display"}),
+    (("--ascending",), {"action": "store_true"}),
+    (("--limit",), {"type": int}),
+    (("--song-name",), {}),
+    (("--min",), {"dest": "minimum", "action": "append", "type": _key_value, "metavar": "METRIC=VALUE"}),
+    (("--max",), {"dest": "maximum", "action": "append", "type": _key_value, "metavar": "METRIC=VALUE"}),
+    (("--output",), {}),
+])
+def stats(stats_file=None, sort=None, ascending=False, limit=None, song_name=None, minimum=(), maximum=(),
+          filters=None, output=None):
+    from show_quiz_stats import query_stats
+
+    if stats_file is None:
+        stats_file = "quiz_stats.db" if os.path.exists("quiz_stats.db") else "quiz_stats.json"
+    filters = dict(filters or {})
+    if song_name:
+        filters["song_name"] = song_name
+    for bound, pairs in (("min", minimum), ("max", maximum)):
+        for metric, value in dict(pairs).items():
+            filters.setdefault(metric, {})[bound] = value
+
+    rows = query_stats(stats_file, sort, ascending, limit, filters)
+    if output:
+        write_json_atomic(rows, output, indent=4)
+        return {"count": len(rows), "output": output}
+    return {"count": len(rows), "rows": rows}
+
+
+@register_command("resolve", "OCR テキストからスペース番号を照合する", [
+    (("texts",), {"nargs": "*"}),
+    (("--input",), {"help": "OCR テキストのファイル（1行1件）"}),
+    (("--place-map",), {}),
+    (("--max-distance",), {"type": int}),
+])
+def resolve(texts=(), input=None, place_map="../../client/src/assets/placeMap.json", max_distance=2):
+    from ocr_resolver import load_resolver
+
+    # 照合器はファイルごとにキャッシュされるので、バッチ中の2件目以降は作り直さない
+    resolver = load_resolver(place_map, max_distance)
+    texts = list(texts)
+    if input:
+        with open(input, 'r', encoding='utf-8') as f:
+            texts += [line.rstrip("\n") for line in f]
+    results = resolver.resolve_many(texts)
+    return {
+        "count": len(texts),
+        "resolved": sum(1 for matches in results for m in matches if m["code"]),
+        "results": [{"text": text, "matches": matches} for text, matches in zip(texts, results)],
+    }
+
+
+@register_command("route", "スペースを回る順番を決める（--input で複数人分をまとめて計画する）", [
+    (("stops",), {"nargs": "*"}),
+    (("--start",), {}),
+    (("--input",), {"help": "[{\"user\", \"stops\": [...], \"start\"}, ...] の JSON"}),
+    (("--place-map",), {}),
+    (("--workers",), {"type": int}),
+    (("--output",), {}),
+])
+def route(stops=(), start=None, input=None, place_map="../../client/src/assets/placeMap.json", workers=None,
+          output=None):
+    from route_planner import plan_routes
+
+    with open(place_map, 'r', encoding='utf-8') as f:
+        rects = json.load(f)
+    requests = []
+    if stops:
+        requests.append({"user": None, "stops": list(stops), "start": start})
+    if input:
+        with open(input, 'r', encoding='utf-8') as f:
+            requests += json.load(f)
+    routes = plan_routes(rects, requests, workers)
+    if output:
+        write_json_atomic(routes, output, indent=4)
+        return {"count": len(routes), "output": output}
+    return {"count": len(routes), "routes": routes}
+
+
+@register_command("lyrics", "歌詞をフレーズで検索する（全文索引は差分だけ更新する）", [
+    (("phrases",), {"nargs": "+"}),
+    (("--folder",), {}),
+    (("--index-dir",), {}),
+    (("--limit",), {"type": int}),
+])
+def lyrics(phrases, folder=None, index_dir="lyric_index", limit=None):
+    from lyric_index import LyricIndex
+    from song_corpus import SongCorpus
+
+    if folder is None:
+        from Quiz_song import DEFAULT_FOLDER as folder
+    with LyricIndex(SongCorpus(folder), index_dir) as index:
+        results = {phrase: index.search(phrase, limit) for phrase in phrases}
+    return {
+        "count": sum(len(found) for found in results.values()),
+        "results": [{"phrase": phrase, "matches": [{"song": song, "line": line_no, "text": text}
+                                                   for song, line_no, text in found]}
+                    for phrase, found in results.items()],
+    }
+
+
+@register_command("quiz", "歌詞クイズを遊ぶ（対話）", [
+    (("--folder",), {"dest": "folder_path"}),
+    (("--rounds",), {"type": int}),
+])
+def quiz(**options):
+    import Quiz_song
+
+    return Quiz_song.main(**options)
+
+
+# ジョブ1件を実行する  job: {"command": "grid", "image": ..., "output": ...}（キーは引数名。"-" は "_" と同じ扱い）
+def run_job(job, defaults=None):
+    job = dict(defaults or {}, **job)
+    name = job.pop("command", None)
+    job.pop("id", None)
+    if name not in COMMANDS:
+        raise ValueError(f"Invalid command: {name}")
+    kwargs = {key.replace("-", "_"): value for key, value in job.items()}
+    return COMMANDS[name]["func"](**kwargs)
+
+
+# 複数のジョブを同じプロセスで順に実行する（失敗したジョブは error を記録して続行）
+def run_batch(jobs, defaults=None, stop_on_error=False, log=None):
+    results = []
+    for i, job in enumerate(jobs):
+        job_id = job.get("id", i + 1)
+        start = time.perf_counter()
+        try:
+            entry = {"id": job_id, "command": job.get("command"), "ok": True, "result": run_job(job, defaults)}
+        except Exception as e:
+            entry = {"id": job_id, "command": job.get("command"), "ok": False, "error": f"{type(e).__name__}: {e}"}
+        entry["time_ms"] = (time.perf_counter() - start) * 1000
+        results.append(entry)
+        if log:
+            status = "ok" if entry["ok"] else entry["error"]
+            log(f"[{i + 1}/{len(jobs)}] {entry['command']} {job_id}: {status} ({entry['time_ms']:.1f} ms)")
+        if stop_on_error and not entry["ok"]:
+            break
+    return results
+
+
+# ジョブファイル（JSON / YAML）を読む
+# 形式: [job, ...] または {"defaults": {...}, "jobs": [job, ...]}（defaults は全ジョブに共通の引数）
+def load_jobs(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit(f"{path}: YAML のジョブファイルを読むには PyYAML が必要です（pip install pyyaml）")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, list):
+        return data, {}
+    return data.get("jobs", []), data.get("defaults", {})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python make/Python_test", description="会場マップ・クイズ用ツール")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="コマンドを別プロセスで実行し、起動時間と import の内訳を表示する")
+    parser.add_argument("--startup-budget", type=float, default=None, metavar="MS",
+                        help="--profile-startup の目標時間（超えたら終了コード 1）")
+    subparsers = parser.add_subparsers(dest="command", required=True, prog=parser.prog)
+    for name, command in COMMANDS.items():
+        # 指定されなかった引数は渡さない（関数側の既定値を使う）
+        sub = subparsers.add_parser(name, help=command["help"], argument_default=argparse.SUPPRESS)
+        for flags, options in command["arguments"]:
+            sub.add_argument(*flags, **options)
+
+    batch = subparsers.add_parser("batch", help="ジョブファイルのジョブを1プロセスでまとめて実行する")
+    batch.add_argument("job_files", nargs="+")
+    batch.add_argument("--output", default=None, help="結果一覧（JSON）の出力先")
+    batch.add_argument("--stop-on-error", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = vars(build_parser().parse_args(argv))
+    name = args.pop("command")
+
+    profile = args.pop("profile_startup")
+    budget_ms = args.pop("startup_budget")
+    if profile:
+        from startup_profile import DEFAULT_BUDGET_MS, format_report, profile_startup
+
+        command_argv = argv[argv.index(name):]
+        report = profile_startup(command_argv)
+        budget_ms = DEFAULT_BUDGET_MS if budget_ms is None else budget_ms
+        print(format_report(report, budget_ms), file=sys.stderr)
+        over_budget = report["wall_ms"] - report["baseline_ms"] > budget_ms
+        return 1 if report["returncode"] or over_budget else 0
+
+    if name != "batch":
+        result = run_job(dict(args, command=name))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    results = []
+    for job_file in args["job_files"]:
+        jobs, defaults = load_jobs(job_file)
+        log = lambda message: print(message, file=sys.stderr)
+        results += run_batch(jobs, defaults, args["stop_on_error"], log)
+        if args["stop_on_error"] and not all(r["ok"] for r in results):
+            break
+
+    failed = sum(not r["ok"] for r in results)
+    print(f"{len(results) - failed} / {len(results)} ジョブ成功", file=sys.stderr)
+    if args["output"]:
+        write_json_atomic(results, args["output"], indent=4)
+    else:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
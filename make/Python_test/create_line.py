@@ -1,21 +1,30 @@
-from PIL import Image, ImageDraw
+# 画像に矩形の枠線を1つ描画して保存する（PIL は描画するときに読み込む）
+def draw_rectangle(image_path, x, y, width, height, output_path, outline="lightgreen", line_width=3):
+    from PIL import Image, ImageDraw
 
-# 画像を読み込む
-image_path = 'east_7.jpg'  # ここに画像ファイルのパスを指定
-image = Image.open(image_path)
+    import image_store
 
-# 描画用のオブジェクトを作成
-draw = ImageDraw.Draw(image)
+    # 画像を読み込む（デコード済みの RGB を image_store から借りる。fromarray は読み取り専用の配列をコピーする）
+    image = Image.fromarray(image_store.raster(image_path, "rgb"))
 
-# 矩形の座標とサイズ
-x, y = 5, 1111
-width, height = 24, 23
+    # 描画用のオブジェクトを作成
+    draw = ImageDraw.Draw(image)
 
-# 緑色の枠線で矩形を描画
-draw.rectangle([x, y, x + width, y + height], outline="lightgreen", width=3)
+    # 枠線で矩形を描画
+    draw.rectangle([x, y, x + width, y + height], outline=outline, width=line_width)
 
-# 画像を保存
-output_path = 'output_image.png'
-image.save(output_path)
+    # 画像を保存
+    image.save(output_path)
+    return output_path
 
-print(f"緑色の矩形を描画した画像を {output_path} に保存しました。")
+if __name__ == "__main__":
+    image_path = 'east_7.jpg'  # ここに画像ファイルのパスを指定
+
+    # 矩形の座標とサイズ
+    x, y = 5, 1111
+    width, height = 24, 23
+
+    # 緑色の枠線で矩形を描画
+    output_path = draw_rectangle(image_path, x, y, width, height, 'output_image.png')
+
+    print(f"緑色の矩形を描画した画像を {output_path} に保存しました。")
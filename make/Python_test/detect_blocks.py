@@ -1,14 +1,15 @@
 import cv2
-import numpy as np
+
+import image_store
 
 def detect_blocks(image_path, output_path):
-    image = cv2.imread(image_path)
-    if image is None:
+    try:
+        image = image_store.load(image_path).copy()
+    except FileNotFoundError:
         print(f"Error: Unable to load image {image_path}")
         return
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    edges = cv2.Canny(gray, 50, 150)
+    edges = image_store.raster(image_path, "edges", low=50, high=150)
 
     contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -21,4 +22,5 @@ def detect_blocks(image_path, output_path):
     print(f"Detected blocks image saved as {output_path}")
 
 # 実行例
-detect_blocks('e1_test4.png', 'detected_blocks.png')
+if __name__ == "__main__":
+    detect_blocks('e1_test4.png', 'detected_blocks.png')
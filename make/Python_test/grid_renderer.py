@@ -0,0 +1,92 @@
+import json
+import os
+from functools import lru_cache
+
+import cv2
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+# ラベルの描画サイズ（同じ文字列・フォント設定なら結果は同じなのでキャッシュする）
+@lru_cache(maxsize=65536)
+def text_size(text, font_scale=0.5, thickness=1):
+    (w, h), _ = cv2.getTextSize(text, FONT, font_scale, thickness)
+    return w, h
+
+
+# draw_grid.draw_grid と同じ見た目のグリッドを描く
+# 線はセルごとの cv2.rectangle ではなく配列のスライスで一括で引く（先に線を引くので、セルからはみ出したラベルも隣の線で欠けない）
+def render_grid(image, grid_size=40, line_color=(255, 0, 0), font_color=(0, 0, 255),
+                font_scale=0.5, font_thickness=1):
+    height, width = image.shape[:2]
+    grid_image = image.copy()
+    grid_image[::grid_size, :] = line_color
+    grid_image[:, ::grid_size] = line_color
+
+    col_labels = [str(col + 1) for col in range(0, (width + grid_size - 1) // grid_size)]
+    for y in range(0, height, grid_size):
+        row_label = chr(65 + (y // grid_size))
+        for x, col_label in zip(range(0, width, grid_size), col_labels):
+            label = f"{row_label}-{col_label}"
+            label_w, label_h = text_size(label, font_scale, font_thickness)
+            text_x = x + (grid_size - label_w) // 2
+            text_y = y + (grid_size + label_h) // 2
+            cv2.putText(grid_image, label, (text_x, text_y), FONT, font_scale, font_color, font_thickness)
+
+    return grid_image
+
+
+# 256px タイルの画像ピラミッドを書き出す（z=0 が原寸、z が1つ増えるごとに 1/2）
+# 出力: output_dir/{z}/{row}_{col}.png と output_dir/tiles.json
+def write_tile_pyramid(image, output_dir, tile_size=256, ext=".png"):
+    levels = []
+    level_image = image
+    z = 0
+    while True:
+        height, width = level_image.shape[:2]
+        rows = (height + tile_size - 1) // tile_size
+        cols = (width + tile_size - 1) // tile_size
+        level_dir = os.path.join(output_dir, str(z))
+        os.makedirs(level_dir, exist_ok=True)
+        for row in range(rows):
+            for col in range(cols):
+                tile = level_image[row * tile_size:(row + 1) * tile_size, col * tile_size:(col + 1) * tile_size]
+                cv2.imwrite(os.path.join(level_dir, f"{row}_{col}{ext}"), tile)
+        levels.append({"z": z, "width": width, "height": height, "rows": rows, "cols": cols})
+
+        if rows == 1 and cols == 1:
+            break
+        level_image = cv2.resize(level_image, (max(1, width // 2), max(1, height // 2)),
+                                 interpolation=cv2.INTER_AREA)
+        z += 1
+
+    meta = {"tile_size": tile_size, "ext": ext, "levels": levels}
+    with open(os.path.join(output_dir, "tiles.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=4)
+    return meta
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="グリッドを描いた画像とタイルピラミッドを作る")
+    parser.add_argument("image", nargs="?", default="map.png")
+    parser.add_argument("--output", default="map_with_grid.png")
+    parser.add_argument("--grid-size", type=int, default=40)
+    parser.add_argument("--tiles", default=None, help="タイルの出力ディレクトリ")
+    parser.add_argument("--tile-size", type=int, default=256)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        print(f"Error: Unable to load image {args.image}")
+    else:
+        start = time.perf_counter()
+        grid_image = render_grid(image, args.grid_size)
+        print(f"グリッド描画: {(time.perf_counter() - start) * 1000:.1f} ms")
+        cv2.imwrite(args.output, grid_image)
+        print(f"Grid image saved as {args.output}")
+        if args.tiles:
+            meta = write_tile_pyramid(grid_image, args.tiles, args.tile_size)
+            print(f"{len(meta['levels'])} 段のタイルを {args.tiles} に保存しました。")
@@ -0,0 +1,298 @@
+import os
+import weakref
+from collections import OrderedDict, namedtuple
+
+# 会場画像のデコード結果と、そこから作るラスタ（グレースケール・二値・エッジなど）を共有メモリに置いて使い回す
+#   - 同じ画像（パス・更新時刻・サイズが同じ）は1プロセスで1回だけデコードする
+#   - 派生ラスタは (画像, 種類, パラメータ) ごとに1回だけ計算する
+#   - 合計バイト数が budget を超えたら、最近使っていないものから捨てる（LRU）
+#   - 返す ndarray は読み取り専用（描画は必ずコピーに対して行う）
+#   - handle() で得た SharedImage を渡せば、ワーカープロセスは attach() でコピーせずに同じ配列を読める
+# cv2 / numpy / multiprocessing.shared_memory は実際に画像を扱うときに読み込む（lookup だけなら不要）
+DEFAULT_BUDGET_BYTES = 512 << 20
+BASE = "image"
+# 書き出した画素がそのまま読み戻せる形式（put で登録してよいもの）
+LOSSLESS_EXTENSIONS = (".png", ".bmp", ".tif", ".tiff", ".pgm", ".ppm", ".pbm")
+
+# ワーカーに渡す共有メモリの情報（pickle できる）
+SharedImage = namedtuple("SharedImage", ["name", "shape", "dtype"])
+
+# 派生ラスタの作り方の登録先（種類 -> (元にする種類, 関数)）
+RASTERS = {}
+
+
+def register_raster(name, source=BASE):
+    def decorator(func):
+        RASTERS[name] = (source, func)
+        return func
+    return decorator
+
+
+@register_raster("gray")
+def gray_raster(image):
+    import cv2
+
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+# block_size.py と同じ固定しきい値の二値化（ブロックが白）
+@register_raster("binary", source="gray")
+def binary_raster(gray, threshold=128):
+    import cv2
+
+    _, binary = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    return binary
+
+
+# detect_blocks.py と同じ Canny エッジ
+@register_raster("edges", source="gray")
+def edges_raster(gray, low=50, high=150):
+    import cv2
+
+    return cv2.Canny(gray, low, high)
+
+
+# PIL（create_line.py）に渡す RGB
+@register_raster("rgb")
+def rgb_raster(image):
+    import cv2
+
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB if image.ndim == 2 else cv2.COLOR_BGR2RGB)
+
+
+# 共有メモリを ndarray として見せる
+# 配列が参照されなくなったときに共有メモリを閉じる（先に close すると配列から読めなくなるため）
+def _wrap(shm, shape, dtype):
+    import numpy as np
+
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    array.setflags(write=False)
+    weakref.finalize(array, shm.close)
+    return array
+
+
+def _to_shared(array):
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, _wrap(shm, array.shape, array.dtype)
+
+
+# ワーカー側: 同じ共有メモリを何度も開き直さないように、最近使ったものを残しておく
+_attached = OrderedDict()
+MAX_ATTACHED = 16
+
+
+# handle() で得た SharedImage から読み取り専用の ndarray を作る（コピーしない）
+def attach(shared):
+    from multiprocessing import shared_memory
+
+    array = _attached.get(shared.name)
+    if array is not None:
+        _attached.move_to_end(shared.name)
+        return array
+    array = _wrap(shared_memory.SharedMemory(name=shared.name), tuple(shared.shape), shared.dtype)
+    _attached[shared.name] = array
+    if len(_attached) > MAX_ATTACHED:
+        _attached.popitem(last=False)
+    return array
+
+
+def _file_key(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def _params_key(params):
+    return tuple(sorted(params.items()))
+
+
+def _unlink_all(entries):
+    for shm, _ in entries.values():
+        shm.unlink()
+    entries.clear()
+
+
+class ImageStore:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # キー -> (共有メモリ, 配列)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.evictions = 0
+        # ストアが消えるとき（プロセス終了時を含む）に共有メモリの名前を消す
+        self._finalizer = weakref.finalize(self, _unlink_all, self.entries)
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key, array):
+        self._remove(key)
+        shm, shared = _to_shared(array)
+        self.entries[key] = (shm, shared)
+        self.nbytes += shared.nbytes
+        # 1つで予算を超えるものも今回の呼び出し元には返すが、残さない
+        while self.nbytes > self.budget_bytes and self.entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+        return shared
+
+    # 共有メモリの名前を消す（使用中の配列があれば、そちらが参照されなくなるまでメモリは残る）
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        shm, shared = entry
+        self.nbytes -= shared.nbytes
+        shm.unlink()
+
+    def _base_key(self, path):
+        try:
+            return _file_key(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Unable to load image {path}") from None
+
+    # デコード済みの画像（BGR、読み取り専用）
+    def load(self, path):
+        return self.raster(path, BASE)
+
+    # 派生ラスタ（kind は RASTERS の名前、params はその関数の引数）
+    def raster(self, path, kind=BASE, **params):
+        return self._raster(self._base_key(path), kind, params)
+
+    def _raster(self, base_key, kind, params):
+        key = base_key if kind == BASE else (base_key, kind, _params_key(params))
+        array = self._get(key)
+        if array is not None:
+            self.hits += 1
+            return array
+        self.misses += 1
+
+        if kind == BASE:
+            import cv2
+
+            image = cv2.imread(base_key[0])
+            if image is None:
+                raise FileNotFoundError(f"Unable to load image {base_key[0]}")
+            self.decodes += 1
+            return self._put(key, image)
+
+        if kind not in RASTERS:
+            raise ValueError(f"Invalid raster kind: {kind}")
+        source, func = RASTERS[kind]
+        return self._put(key, func(self._raster(base_key, source, {}), **params))
+
+    # 書き出したばかりの画像を、読み直さずに使えるように登録する（path は書き込み済みであること）
+    # 以前の内容から作った派生ラスタはキーの更新時刻が変わるので使われなくなり、いずれ LRU で消える
+    # .jpg などの非可逆形式はファイルの画素が image と違うので登録せず、次の load でデコードさせる
+    def put(self, path, image):
+        key = self._base_key(path)
+        if os.path.splitext(path)[1].lower() not in LOSSLESS_EXTENSIONS:
+            self._remove(key)
+            return image
+        return self._put(key, image)
+
+    # ワーカーに渡す SharedImage（なければデコード・計算する。1つで予算を超える場合は None）
+    def handle(self, path, kind=BASE, **params):
+        key = self._base_key(path)
+        self._raster(key, kind, params)
+        return self._shared(key if kind == BASE else (key, kind, _params_key(params)))
+
+    # すでに読み込み済みなら SharedImage、なければ None（デコードはしない）
+    def lookup(self, path, kind=BASE, **params):
+        try:
+            key = _file_key(path)
+        except OSError:
+            return None
+        return self._shared(key if kind == BASE else (key, kind, _params_key(params)))
+
+    def _shared(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        shm, array = entry
+        return SharedImage(shm.name, array.shape, array.dtype.str)
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "decodes": self.decodes,
+            "evictions": self.evictions,
+        }
+
+    # 共有メモリをすべて解放する
+    def clear(self):
+        _unlink_all(self.entries)
+        self.nbytes = 0
+
+
+_store = None
+
+
+# プロセス全体で共有するストア（IMAGE_STORE_BUDGET_MB で予算を変えられる）
+def get_store():
+    global _store
+    if _store is None:
+        budget_mb = os.environ.get("IMAGE_STORE_BUDGET_MB")
+        _store = ImageStore(int(budget_mb) << 20 if budget_mb else DEFAULT_BUDGET_BYTES)
+    return _store
+
+
+def load(path):
+    return get_store().load(path)
+
+
+def raster(path, kind=BASE, **params):
+    return get_store().raster(path, kind, **params)
+
+
+def put(path, image):
+    return get_store().put(path, image)
+
+
+def lookup(path, kind=BASE, **params):
+    # ストアを作っていなければ何も読み込んでいない
+    return _store.lookup(path, kind, **params) if _store is not None else None
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="同じ画像を各ステージで読む場合の、デコード回数と時間を比べる")
+    parser.add_argument("images", nargs="*", default=["east_456.jpg", "south_12.jpg", "west_12.jpg"])
+    parser.add_argument("--stages", type=int, default=4, help="1枚あたりの読み込み回数")
+    args = parser.parse_args()
+
+    import cv2
+
+    start = time.perf_counter()
+    for path in args.images:
+        for _ in range(args.stages):
+            image = cv2.imread(path)
+            cv2.threshold(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), 128, 255, cv2.THRESH_BINARY_INV)
+    direct_ms = (time.perf_counter() - start) * 1000
+
+    store = get_store()
+    start = time.perf_counter()
+    for path in args.images:
+        for _ in range(args.stages):
+            store.load(path)
+            store.raster(path, "binary", threshold=128)
+    stored_ms = (time.perf_counter() - start) * 1000
+
+    print(f"毎回デコード: {direct_ms:.1f} ms / ストア経由: {stored_ms:.1f} ms")
+    print(store.stats())
@@ -0,0 +1,19 @@
+import contextlib
+import json
+import os
+
+# JSON の書き出し（cli・build_place_map・place_map_shards で共通。起動を軽くするため標準ライブラリだけを読み込む）
+
+
+# 途中で落ちても壊れたファイルが残らないように、一時ファイルに書いてから置き換える
+def write_json_atomic(data, filename, indent=None, **dump_kwargs):
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    tmp_path = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False, **dump_kwargs)
+        os.replace(tmp_path, filename)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
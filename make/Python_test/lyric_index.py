@@ -0,0 +1,324 @@
+import bisect
+import json
+import mmap
+import os
+import re
+import unicodedata
+from array import array
+from collections import defaultdict
+from functools import partial
+
+from quiz_sampler import MASK
+
+DEFAULT_INDEX_DIR = "lyric_index"
+INDEX_VERSION = 2
+MAX_SEGMENTS = 8
+MAX_DEAD_RATIO = 0.5
+
+# 歌詞の全文索引（文字 2-gram の転置索引。分かち書きなしで日本語を引ける）
+#   索引の単位は有効行（SongCorpus と同じく空行を除いた行）。行には通し番号（line id）を振る
+#   index_dir/
+#     meta.json        曲ごとの {mtime_ns, size, base（最初の line id）, count（行数）} とセグメントの一覧
+#     seg_N.lex.json   2-gram -> [postings の先頭位置, 件数]
+#     seg_N.post       line id（uint32、昇順）を 2-gram ごとに並べたもの。mmap して必要な範囲だけ読む
+# 更新は追記型: 変わった曲・増えた曲には新しい line id を振って新しいセグメントに書き、古い line id は
+# meta.json から外すだけにする（どの曲にも属さない line id は検索結果から除く）
+# セグメントが MAX_SEGMENTS を超えるか、使われない line id が多くなったら1つのセグメントに作り直す
+# 検索は 2-gram の postings の共通部分で候補の行を絞り、行を読み直して正規化した文字列で確かめる
+
+
+# カタカナ -> ひらがな（quiz_sampler と同じ対応を str.translate 用の表にしたもの）
+_KANA_TABLE = {c: c - 0x60 for c in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+# 全角/半角・大文字/小文字・カタカナ/ひらがなの違いと、空白・記号を無視する
+def normalize(text):
+    return re.sub(r'[^\w]', '', unicodedata.normalize("NFKC", text).lower().translate(_KANA_TABLE))
+
+
+def grams(text):
+    if len(text) == 1:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class _Segment:
+    def __init__(self, index_dir, number):
+        self.number = number
+        with open(os.path.join(index_dir, f"seg_{number}.lex.json"), 'r', encoding='utf-8') as f:
+            self.lexicon = json.load(f)
+        self.file = open(os.path.join(index_dir, f"seg_{number}.post"), 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.postings = memoryview(self.map).cast('I') if self.map else memoryview(b"").cast('I')
+
+    def get(self, gram):
+        entry = self.lexicon.get(gram)
+        if entry is None:
+            return ()
+        start, count = entry
+        return self.postings[start:start + count]
+
+    # 1文字の検索語: その文字を含む 2-gram をすべて集める
+    def containing(self, char):
+        for gram, (start, count) in self.lexicon.items():
+            if char in gram:
+                yield self.postings[start:start + count]
+
+    def close(self):
+        self.postings.release()
+        if self.map:
+            self.map.close()
+        self.file.close()
+
+
+def _write_segment(index_dir, number, postings):
+    lexicon = {}
+    position = 0
+    tmp_file = os.path.join(index_dir, f"seg_{number}.post.tmp")
+    with open(tmp_file, 'wb') as f:
+        for gram in sorted(postings):
+            ids = postings[gram]
+            lexicon[gram] = [position, len(ids)]
+            ids.tofile(f)
+            position += len(ids)
+    os.replace(tmp_file, os.path.join(index_dir, f"seg_{number}.post"))
+    tmp_file = os.path.join(index_dir, f"seg_{number}.lex.json.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(lexicon, ensure_ascii=False, separators=(",", ":")))
+    os.replace(tmp_file, os.path.join(index_dir, f"seg_{number}.lex.json"))
+
+
+class LyricIndex:
+    def __init__(self, corpus, index_dir=DEFAULT_INDEX_DIR):
+        self.corpus = corpus
+        self.index_dir = index_dir
+        self.songs = {}
+        self.next_line_id = 0
+        self.next_segment = 0
+        self.segments = []
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+        self._reorder()
+        self.update()
+
+    def _load(self):
+        meta_file = os.path.join(self.index_dir, "meta.json")
+        if not os.path.exists(meta_file):
+            return
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except json.JSONDecodeError:
+            print(f"索引 '{meta_file}' が壊れているため作り直します。")
+            return
+        if meta.get("version") != INDEX_VERSION or meta.get("folder") != os.path.abspath(self.corpus.folder_path):
+            return
+        segments = []
+        try:
+            for number in meta["segments"]:
+                segments.append(_Segment(self.index_dir, number))
+        except (FileNotFoundError, json.JSONDecodeError):
+            for segment in segments:
+                segment.close()
+            print(f"索引 '{self.index_dir}' のセグメントが欠けているため作り直します。")
+            return
+        self.songs = meta["songs"]
+        self.next_line_id = meta["next_line_id"]
+        self.next_segment = meta["next_segment"]
+        self.segments = segments
+
+    def _save(self):
+        meta = {
+            "version": INDEX_VERSION,
+            "folder": os.path.abspath(self.corpus.folder_path),
+            "next_line_id": self.next_line_id,
+            "next_segment": self.next_segment,
+            "segments": [segment.number for segment in self.segments],
+            "songs": self.songs,
+        }
+        meta_file = os.path.join(self.index_dir, "meta.json")
+        with open(meta_file + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_file + ".tmp", meta_file)
+        # meta.json から外れたセグメントのファイルを消す
+        live = {f"seg_{segment.number}.{ext}" for segment in self.segments for ext in ("post", "lex.json")}
+        for name in os.listdir(self.index_dir):
+            if name.startswith("seg_") and name not in live:
+                os.remove(os.path.join(self.index_dir, name))
+
+    # line id -> 曲 を二分探索で引くための並び
+    def _reorder(self):
+        order = sorted(self.songs.items(), key=lambda item: item[1]["base"])
+        self._bases = [entry["base"] for _, entry in order]
+        self._names = [name for name, _ in order]
+
+    def _add_segment(self, names):
+        postings = defaultdict(partial(array, 'I'))
+        for name in names:
+            entry = self.corpus.songs[name]
+            count = len(entry["offsets"]) // 2
+            base = self.next_line_id
+            self.next_line_id += count
+            self.songs[name] = {"mtime_ns": entry["mtime_ns"], "size": entry["size"], "base": base, "count": count}
+            lines = self.corpus.valid_lines(os.path.join(self.corpus.folder_path, name))
+            for line_no, line in enumerate(lines):
+                line_id = base + line_no
+                for gram in grams(normalize(line)):
+                    postings[gram].append(line_id)
+        if postings:
+            _write_segment(self.index_dir, self.next_segment, postings)
+            self.segments.append(_Segment(self.index_dir, self.next_segment))
+            self.next_segment += 1
+
+    # 歌詞フォルダ（SongCorpus の索引）との差分だけを反映する（戻り値: 索引し直した曲数, 削除した曲数）
+    def update(self):
+        changed = [
+            name for name, entry in self.corpus.songs.items()
+            if name not in self.songs
+            or (self.songs[name]["mtime_ns"], self.songs[name]["size"]) != (entry["mtime_ns"], entry["size"])
+        ]
+        removed = [name for name in self.songs if name not in self.corpus.songs]
+        if not changed and not removed:
+            return 0, 0
+        for name in removed:
+            del self.songs[name]
+        live = sum(entry["count"] for name, entry in self.songs.items() if name not in changed)
+        dead = self.next_line_id - live
+        if len(self.segments) >= MAX_SEGMENTS or dead > MAX_DEAD_RATIO * max(live, 1):
+            self.compact()
+        else:
+            self._add_segment(sorted(changed))
+            self._reorder()
+            self._save()
+        return len(changed), len(removed)
+
+    # 全曲を1つのセグメントに作り直す
+    def compact(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        self.songs = {}
+        self.next_line_id = 0
+        self._add_segment(sorted(self.corpus.songs))
+        self._reorder()
+        self._save()
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # line id -> (曲のファイル名, 有効行の番号)。索引から外れた行なら None
+    def _locate(self, line_id):
+        i = bisect.bisect_right(self._bases, line_id) - 1
+        if i < 0:
+            return None
+        name = self._names[i]
+        line_no = line_id - self.songs[name]["base"]
+        return (name, line_no) if line_no < self.songs[name]["count"] else None
+
+    def _candidates(self, text):
+        if len(text) == 1:
+            return {line_id for segment in self.segments for ids in segment.containing(text) for line_id in ids}
+        # 件数の少ない 2-gram から共通部分をとる
+        lists = []
+        for gram in grams(text):
+            ids = [segment.get(gram) for segment in self.segments]
+            if not any(len(part) for part in ids):
+                return set()
+            lists.append(ids)
+        lists.sort(key=lambda ids: sum(len(part) for part in ids))
+        result = None
+        for ids in lists:
+            found = {line_id for part in ids for line_id in part}
+            result = found if result is None else result & found
+            if not result:
+                break
+        return result
+
+    # 候補の行を曲ごとにまとめて読み、正規化した行に text が含まれるものを返す
+    def _verify(self, line_ids, matches):
+        by_song = {}
+        for line_id in line_ids:
+            located = self._locate(line_id)
+            if located:
+                by_song.setdefault(located[0], []).append(located[1])
+        for name in sorted(by_song):
+            line_nos = sorted(by_song[name])
+            path = os.path.join(self.corpus.folder_path, name)
+            lines = self.corpus.read_lines(path, line_nos[0], line_nos[-1] + 1)
+            for line_no in line_nos:
+                line = lines[line_no - line_nos[0]]
+                if matches(normalize(line)):
+                    yield name, line_no, line
+
+    # フレーズ検索。戻り値: [(曲名, 有効行の番号（1始まり）, 行), ...]
+    def search(self, phrase, limit=None):
+        text = normalize(phrase)
+        if not text:
+            return []
+        results = []
+        for name, line_no, line in self._verify(self._candidates(text), lambda norm: text in norm):
+            results.append((os.path.splitext(name)[0], line_no + 1, line.rstrip("\n")))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    # 伏せ字の入った行（show_quiz の表示）と同じ並びの行を持つ曲名の集合
+    # 伏せ字の前後の断片が、同じ行にこの順で現れる曲を探す
+    def songs_matching_line(self, masked_line):
+        parts = [normalize(part) for part in masked_line.split(MASK)]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None
+        longest = max(parts, key=len)
+        pattern = re.compile(".*".join(map(re.escape, parts)))
+        return {os.path.splitext(name)[0]
+                for name, _, _ in self._verify(self._candidates(longest), lambda norm: pattern.search(norm))}
+
+    # 表示した行（伏せ字済み）がすべて含まれる、正解以外の曲の一覧（1曲以上あれば問題があいまい）
+    def ambiguous(self, masked_lines, title=None):
+        songs = None
+        for line in masked_lines:
+            found = self.songs_matching_line(line)
+            if found is None:
+                continue
+            songs = found if songs is None else songs & found
+            if not songs:
+                return []
+        return sorted((songs or set()) - {title})
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from song_corpus import SongCorpus
+
+    parser = argparse.ArgumentParser(description="歌詞の全文索引を作り、フレーズで検索する")
+    parser.add_argument("phrase", nargs="*")
+    parser.add_argument("--folder", default=r"C:\2002248\memo\song")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--compact", action="store_true", help="索引を1つのセグメントに作り直す")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with LyricIndex(SongCorpus(args.folder), args.index_dir) as index:
+        if args.compact:
+            index.compact()
+        print(f"{len(index.songs)} 曲 / {len(index.segments)} セグメントの索引を用意しました"
+              f"（{(time.perf_counter() - start) * 1000:.1f} ms）")
+        for phrase in args.phrase:
+            start = time.perf_counter()
+            results = index.search(phrase, args.limit)
+            print(f"\n「{phrase}」 {len(results)} 件（{(time.perf_counter() - start) * 1000:.1f} ms）")
+            for title, line_no, line in results:
+                print(f"  {title}:{line_no}  {line}")
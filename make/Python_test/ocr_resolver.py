@@ -0,0 +1,239 @@
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+# OCR（Tesseract）の結果から placeMap のスペース番号（例: "ア01", "A12", "あ05", "a33"）を拾う
+#   1. 正規化: 全角/半角（NFKC）、漢字・記号の見間違い（口→ロ、力→カ など）、番号部分の英字→数字（O→0, l→1 など）
+#   2. 完全一致: dict で O(1)
+#   3. 編集距離 2 以内（見間違い2文字まで、または通常の編集1回）: 事前に作った表から候補を引いて距離を確かめる
+#      - 見間違いで変わりうる表記 → スペース番号
+#      - 1文字消した表記 → スペース番号（symmetric delete。挿入・削除・置換1回を dict 引きで見つける）
+#   4. max_distance が 2 を超える場合: BK 木で探す
+
+# 常に置き換えてよい見間違い（スペース番号に漢字・記号は出てこない）
+CHAR_FIXES = str.maketrans({
+    "口": "ロ", "力": "カ", "工": "エ", "二": "ニ", "八": "ハ", "卜": "ト", "夕": "タ", "才": "オ",
+    "一": "ー", "−": "ー", "‐": "ー", "―": "ー", "ｰ": "ー", "~": "ー", "〜": "ー",
+})
+
+# 番号部分でだけ数字とみなす英字・記号
+DIGIT_FIXES = str.maketrans({
+    "O": "0", "o": "0", "D": "0", "Q": "0", "I": "1", "l": "1", "i": "1", "|": "1", "!": "1",
+    "Z": "2", "z": "2", "S": "5", "s": "5", "B": "8", "G": "6", "b": "6", "q": "9", "g": "9",
+})
+
+# どちらも正しい番号になりうる見間違い（置き換えずに、編集距離のコストを下げて扱う）
+CONFUSABLE_PAIRS = [
+    ("ア", "マ"), ("ソ", "ン"), ("シ", "ツ"), ("ウ", "ワ"), ("コ", "ロ"), ("エ", "ユ"), ("チ", "テ"),
+    ("ク", "ケ"), ("ヘ", "へ"), ("リ", "り"), ("ベ", "べ"), ("ペ", "ぺ"), ("ぬ", "め"),
+    ("ね", "れ"), ("わ", "れ"), ("は", "ほ"), ("る", "ろ"), ("さ", "ち"), ("い", "り"),
+    ("1", "7"), ("3", "8"), ("5", "6"), ("6", "8"), ("0", "8"),
+]
+CONFUSABLE = {}
+for a, b in CONFUSABLE_PAIRS:
+    CONFUSABLE.setdefault(a, set()).add(b)
+    CONFUSABLE.setdefault(b, set()).add(a)
+# 英字の大文字/小文字（東7 の A〜W と南 の a〜t）も見間違いとして扱う
+for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    CONFUSABLE.setdefault(c, set()).add(c.lower())
+    CONFUSABLE.setdefault(c.lower(), set()).add(c)
+
+# 編集距離のコスト（整数にするため通常の編集を 2、見間違いの置換を 1 とする）
+EDIT_COST = 2
+CONFUSION_COST = 1
+DEFAULT_MAX_DISTANCE = 2
+
+# 頭文字（カナ・ひらがな・英字）＋区切り（空白・ハイフン）＋番号らしき文字列＋机の半分（a / b、省略可）
+TOKEN_PATTERN = re.compile(
+    r"([ァ-ヶぁ-ゖA-Za-z])[\s\-ー・.]*([0-9OoDQIli|!ZzSsBGbqg]{1,3})(?:([ab])(?![A-Za-z]))?(?![0-9])")
+HALF_PATTERN = re.compile(r"(.*[0-9])([ab])")
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text).translate(CHAR_FIXES)
+
+
+# OCR テキストからスペース番号らしき部分を取り出す（番号部分の英字は数字に直す）
+# 番号部分に本物の数字が1つもないもの（"ア01ab" の "ab" など）は拾わない
+# 数字の直後の a / b は机の半分なので、数字に直さずに付けたまま返す（"ア01b" -> "ア01b"）
+def extract_tokens(text):
+    tokens = []
+    for prefix, digits, half in TOKEN_PATTERN.findall(normalize(text)):
+        if not any(c.isdigit() for c in digits):
+            continue
+        if not half and len(digits) > 1 and digits[-1] == "b" and digits[-2].isdigit():
+            digits, half = digits[:-1], "b"
+        tokens.append(prefix + digits.translate(DIGIT_FIXES) + half)
+    return tokens
+
+
+# トークンをスペース番号の部分と机の半分（"a" / "b"。なければ None）に分ける
+def split_half(token):
+    match = HALF_PATTERN.fullmatch(token)
+    return (match.group(1), match.group(2)) if match else (token, None)
+
+
+def _substitution_cost(a, b):
+    if a == b:
+        return 0
+    return CONFUSION_COST if b in CONFUSABLE.get(a, ()) else EDIT_COST
+
+
+# 見間違いを安くした重み付き編集距離（置換コストは対称で三角不等式も満たすので、BK 木の距離に使える）
+def edit_distance(a, b):
+    previous = [j * EDIT_COST for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [i * EDIT_COST]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + EDIT_COST,
+                current[j - 1] + EDIT_COST,
+                previous[j - 1] + _substitution_cost(ca, cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+# 編集距離の BK 木（ノードは [語, {距離: 子ノード}]）
+class BKTree:
+    def __init__(self, words=(), distance=edit_distance):
+        self.distance = distance
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = [word, {}]
+            return
+        node = self.root
+        while True:
+            d = self.distance(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [word, {}]
+                return
+            node = child
+
+    # query から max_distance 以内の (距離, 語) を距離の小さい順に
+    def search(self, query, max_distance):
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            word, children = stack.pop()
+            d = self.distance(query, word)
+            if d <= max_distance:
+                found.append((d, word))
+            for child_d, child in children.items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+def _confusion_variants(code, depth):
+    variants = {code}
+    for _ in range(depth):
+        variants |= {
+            v[:i] + alt + v[i + 1:]
+            for v in variants for i, c in enumerate(v) for alt in CONFUSABLE.get(c, ())
+        }
+    variants.discard(code)
+    return variants
+
+
+# スペース番号の一覧から作る照合器
+class SpaceResolver:
+    def __init__(self, codes, max_distance=DEFAULT_MAX_DISTANCE):
+        self.codes = set(codes)
+        self.max_distance = max_distance
+        # 見間違い（2文字まで）で変わりうる表記 → 元の番号
+        self.confusions = {}
+        # i 文字目を消した表記 → 元の番号（(i, 表記) は置換、表記だけは OCR 側で1文字抜けた場合に使う）
+        self.deletes = {}
+        self.deleted = {}
+        for code in self.codes:
+            for variant in _confusion_variants(code, min(2, max_distance // CONFUSION_COST)):
+                self.confusions.setdefault(variant, set()).add(code)
+            for i in range(len(code)):
+                shorter = code[:i] + code[i + 1:]
+                self.deletes.setdefault((i, shorter), set()).add(code)
+                self.deleted.setdefault(shorter, set()).add(code)
+        self.tree = BKTree(sorted(self.codes)) if max_distance > EDIT_COST else None
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+
+    # 編集距離 max_distance（2 以下）以内の (距離, 番号) を表から集める
+    def _near(self, token):
+        candidates = set(self.confusions.get(token, ())) | self.deleted.get(token, set())
+        for i in range(len(token)):
+            shorter = token[:i] + token[i + 1:]
+            if shorter in self.codes:
+                candidates.add(shorter)
+            candidates |= self.deletes.get((i, shorter), set())
+        found = [(edit_distance(token, code), code) for code in candidates]
+        return sorted(f for f in found if f[0] <= self.max_distance)
+
+    # 1つのトークンを照合する
+    # 戻り値: {"input", "code"（曖昧・該当なしなら None）, "distance", "method", "candidates"}
+    def _resolve(self, token):
+        if token in self.codes:
+            return {"input": token, "code": token, "distance": 0, "method": "exact", "candidates": [token]}
+
+        found = self.tree.search(token, self.max_distance) if self.tree else self._near(token)
+        if not found:
+            return {"input": token, "code": None, "distance": None, "method": "none", "candidates": []}
+        best = found[0][0]
+        candidates = [word for d, word in found if d == best]
+        code = candidates[0] if len(candidates) == 1 else None
+        # 見間違いだけで説明できる場合は confusion、それ以外は fuzzy
+        method = "confusion" if best < EDIT_COST or token in self.confusions else "fuzzy"
+        return {"input": token, "code": code, "distance": best, "method": method, "candidates": candidates}
+
+    # OCR テキスト1件分: 含まれるスペース番号らしき部分をすべて照合する（机の半分は "half" に入れる）
+    def resolve_text(self, text):
+        matches = []
+        for token in extract_tokens(text):
+            code, half = split_half(token)
+            matches.append(dict(self.resolve(code), half=half))
+        return matches
+
+    # 複数の OCR テキストをまとめて照合する（同じトークンの照合結果はキャッシュを使い回す）
+    def resolve_many(self, texts):
+        return [self.resolve_text(text) for text in texts]
+
+
+@lru_cache(maxsize=8)
+def _cached_resolver(place_map_path, mtime_ns, size, max_distance):
+    from stream_json import iter_stream
+
+    return SpaceResolver((code for code, _ in iter_stream(place_map_path)), max_distance)
+
+
+# placeMap（json / ndjson）のキーから照合器を作る（同じファイルが変わっていなければ作り直さない）
+def load_resolver(place_map_path, max_distance=DEFAULT_MAX_DISTANCE):
+    stat = os.stat(place_map_path)
+    return _cached_resolver(os.path.abspath(place_map_path), stat.st_mtime_ns, stat.st_size, max_distance)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="OCR テキスト（1行1件）からスペース番号を照合する")
+    parser.add_argument("texts", nargs="?", default=None, help="入力ファイル（省略時は標準入力）")
+    parser.add_argument("--place-map", default="../../client/src/assets/placeMap.json")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="通常の編集1回 = 2、見間違いの置換1回 = 1")
+    args = parser.parse_args()
+
+    resolver = load_resolver(args.place_map, args.max_distance)
+    source = open(args.texts, 'r', encoding='utf-8') if args.texts else sys.stdin
+    with source:
+        for line in source:
+            matches = resolver.resolve_text(line)
+            print(json.dumps({"text": line.rstrip("\n"), "matches": matches}, ensure_ascii=False))
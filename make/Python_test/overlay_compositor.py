@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+DEFAULT_COLOR = (0, 255, 0)  # BGR（block_size.py / bunkatu.py と同じ緑）
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+# デコード済みの会場画像（image_store で共有。読み取り専用なので描画は必ずコピーに対して行う）
+def load_image(image_path):
+    import image_store
+
+    return image_store.load(image_path)
+
+
+def _as_rect_list(rects):
+    # placeMap.json / divide_block の {"ア01": {"x":..., ...}} もそのまま受け取る
+    if isinstance(rects, dict):
+        return [dict(rect, label=rect.get("label", code)) for code, rect in rects.items()]
+    return list(rects)
+
+
+def _color_key(shape, default):
+    return tuple(int(c) for c in shape.get("color", default))
+
+
+# 枠線（thickness px、矩形の内側に描く）と塗りを色ごとのマスクにまとめる
+def _rect_masks(shape_hw, rects, color, thickness):
+    height, width = shape_hw
+    outlines = {}
+    fills = {}
+    for rect in rects:
+        x0 = max(int(round(rect["x"])), 0)
+        y0 = max(int(round(rect["y"])), 0)
+        x1 = min(int(round(rect["x"] + rect["width"])), width)
+        y1 = min(int(round(rect["y"] + rect["height"])), height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        key = _color_key(rect, color)
+        if "fill" in rect:
+            fills.setdefault((key, float(rect["fill"])), []).append((y0, y1, x0, x1))
+        t = rect.get("thickness", thickness)
+        if t <= 0:
+            continue
+        mask = outlines.get(key)
+        if mask is None:
+            mask = outlines[key] = np.zeros((height, width), dtype=bool)
+        mask[y0:min(y0 + t, y1), x0:x1] = True
+        mask[max(y1 - t, y0):y1, x0:x1] = True
+        mask[y0:y1, x0:min(x0 + t, x1)] = True
+        mask[y0:y1, max(x1 - t, x0):x1] = True
+    return outlines, fills
+
+
+# ベース画像に矩形・線・ラベルをまとめて描いた新しい画像を返す（ベース画像自体は変更しない）
+# rects:  [{"x", "y", "width", "height", "color"?, "thickness"?, "fill"?(0〜1 の不透明度), "label"?}, ...]
+#         または placeMap 形式の dict
+# lines:  [((x1, y1), (x2, y2)) または {"start": (x1, y1), "end": (x2, y2), "color"?, "thickness"?}, ...]
+# labels: [{"text", "x", "y", "color"?, "scale"?}, ...]
+def composite(base, rects=(), lines=(), labels=(), color=DEFAULT_COLOR, thickness=2,
+              label_rects=False):
+    image = load_image(base) if isinstance(base, str) else base
+    canvas = image.copy()
+    rects = _as_rect_list(rects)
+
+    outlines, fills = _rect_masks(canvas.shape[:2], rects, color, thickness)
+    for (key, alpha), boxes in fills.items():
+        fill_mask = np.zeros(canvas.shape[:2], dtype=bool)
+        for y0, y1, x0, x1 in boxes:
+            fill_mask[y0:y1, x0:x1] = True
+        blended = canvas[fill_mask] * (1 - alpha) + np.array(key) * alpha
+        canvas[fill_mask] = blended.astype(np.uint8)
+    for key, mask in outlines.items():
+        canvas[mask] = key
+
+    for line in lines:
+        if isinstance(line, dict):
+            start, end = line["start"], line["end"]
+            line_color = _color_key(line, color)
+            line_thickness = line.get("thickness", thickness)
+        else:
+            start, end = line
+            line_color, line_thickness = color, thickness
+        cv2.line(canvas, tuple(map(int, start)), tuple(map(int, end)), line_color, line_thickness)
+
+    all_labels = list(labels)
+    if label_rects:
+        all_labels += [
+            {"text": str(r["label"]), "x": r["x"], "y": r["y"] - 4, "color": r.get("color", color)}
+            for r in rects if "label" in r
+        ]
+    for label in all_labels:
+        cv2.putText(canvas, label["text"], (int(label["x"]), int(label["y"])), FONT,
+                    label.get("scale", 0.5), _color_key(label, color), label.get("thickness", 1))
+
+    return canvas
+
+
+# 1回のデコードから複数パターンの重ね描きを順に作る（購入ルートごと・ユーザーごとなど）
+# variants: {"name": {"rects": ..., "lines": ..., "labels": ...}, ...} または (name, dict) の並び
+def render_variants(base, variants, **options):
+    image = load_image(base) if isinstance(base, str) else base
+    items = variants.items() if isinstance(variants, dict) else variants
+    for name, overlay in items:
+        yield name, composite(
+            image,
+            overlay.get("rects", ()),
+            overlay.get("lines", ()),
+            overlay.get("labels", ()),
+            **options
+        )
+
+
+if __name__ == "__main__":
+    import json
+
+    # create_line.py / bunkatu.py の描画を1回のデコードでまとめて行う例
+    with open("sorted_sub_block_coordinates.json", 'r', encoding='utf-8') as f:
+        spaces = json.load(f)
+
+    image = composite(
+        "east_456.jpg",
+        rects=spaces,
+        lines=[((668, 768 + 21), (684, 768 + 21)), ((668, 768 + 42), (684, 768 + 42))],
+        label_rects=True,
+    )
+    cv2.imwrite("output_image.png", image)
+    print("output_image.png に保存しました。")
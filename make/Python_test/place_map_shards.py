@@ -0,0 +1,125 @@
+import argparse
+import json
+import math
+import os
+import re
+
+from json_atomic import write_json_atomic
+
+# ホールの振り分け（client/src/views/VenueMap.vue の venues[].filter と同じ文字範囲）
+HALLS = [
+    {"id": "east456", "name": "東456", "pattern": "^[ア-ヨ]"},
+    {"id": "east7", "name": "東7", "pattern": "^[A-W]"},
+    {"id": "west12", "name": "西12", "pattern": "^[あ-め]"},
+    {"id": "south12", "name": "南12", "pattern": "^[a-t]"},
+]
+OTHER_HALL = {"id": "other", "name": "その他", "pattern": ""}
+
+MINIFIED = {"separators": (",", ":")}
+
+
+def hall_of(code, halls=HALLS):
+    for hall in halls:
+        if re.match(hall["pattern"], code):
+            return hall
+    return OTHER_HALL
+
+
+# 辺の座標を scale 倍して整数に丸める
+# 浮動小数点の誤差（318.50000000000006 など）を落としてから .5 を切り上げる（round() の偶数丸めだと、
+# 接している2つのスペースの辺が同じ値でも誤差の向きで別の整数になり、すき間・重なりができる）
+def _edge(value, scale):
+    return math.floor(round(value * scale, 6) + 0.5)
+
+
+# {"ア01": {"x":..., ...}, ...} を列指向の1ホール分にする
+# 座標は scale 倍して整数に丸める（scale=1 なら px 単位の整数）
+# 幅・高さは別々に丸めず、左右・上下の辺を丸めてから差をとる（接しているスペースは丸めた後も接したまま）
+def to_columnar(place_map, hall_name, scale=1):
+    codes = list(place_map)
+    rects = list(place_map.values())
+    x0 = [_edge(r["x"], scale) for r in rects]
+    y0 = [_edge(r["y"], scale) for r in rects]
+    return {
+        "hall": hall_name,
+        "scale": scale,
+        "codes": codes,
+        "x": x0,
+        "y": y0,
+        "w": [_edge(r["x"] + r["width"], scale) - x for r, x in zip(rects, x0)],
+        "h": [_edge(r["y"] + r["height"], scale) - y for r, y in zip(rects, y0)],
+    }
+
+
+def from_columnar(shard):
+    scale = shard.get("scale", 1)
+    columns = zip(shard["codes"], shard["x"], shard["y"], shard["w"], shard["h"])
+    if scale == 1:
+        return {code: {"x": x, "y": y, "width": w, "height": h} for code, x, y, w, h in columns}
+    return {
+        code: {"x": x / scale, "y": y / scale, "width": w / scale, "height": h / scale}
+        for code, x, y, w, h in columns
+    }
+
+
+def split_by_hall(place_map, halls=HALLS):
+    shards = {}
+    for code, rect in place_map.items():
+        hall = hall_of(code, halls)
+        shards.setdefault(hall["id"], (hall, {}))[1][code] = rect
+    return shards
+
+
+# ホールごとに最小化した JSON と、どのファイルに何があるかの index.json を書き出す
+def write_shards(place_map, output_dir, scale=1, halls=HALLS):
+    os.makedirs(output_dir, exist_ok=True)
+    index = {}
+    for hall_id, (hall, codes) in split_by_hall(place_map, halls).items():
+        filename = f"{hall_id}.json"
+        write_json_atomic(to_columnar(codes, hall["name"], scale), os.path.join(output_dir, filename), **MINIFIED)
+        index[hall_id] = {
+            "name": hall["name"],
+            "pattern": hall["pattern"],
+            "file": filename,
+            "count": len(codes),
+        }
+    write_json_atomic(index, os.path.join(output_dir, "index.json"), **MINIFIED)
+    return index
+
+
+# 1つのホールだけを読み込む
+def load_shard(output_dir, hall_id):
+    with open(os.path.join(output_dir, f"{hall_id}.json"), 'r', encoding='utf-8') as f:
+        return from_columnar(json.load(f))
+
+
+# 出力形式: pretty（従来の indent=4）/ minified（1ファイル）/ ndjson（1行1スペース）/ sharded（ホールごと）
+def save_place_map(place_map, output, fmt="pretty", scale=1):
+    if fmt == "ndjson":
+        from stream_json import write_stream
+
+        write_stream(place_map, output, "ndjson")
+    elif fmt == "pretty":
+        write_json_atomic(place_map, output, indent=4)
+    elif fmt == "minified":
+        write_json_atomic(place_map, output, **MINIFIED)
+    elif fmt == "sharded":
+        write_shards(place_map, output, scale)
+    else:
+        raise ValueError(f"Invalid output format: {fmt}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="既存の placeMap.json をホールごとの最小化ファイルに分割する")
+    parser.add_argument("place_map", nargs="?", default="../../client/src/assets/placeMap.json")
+    parser.add_argument("--output-dir", default="placeMap_shards")
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.place_map, 'r', encoding='utf-8') as f:
+        place_map = json.load(f)
+
+    index = write_shards(place_map, args.output_dir, args.scale)
+    for hall_id, info in index.items():
+        size = os.path.getsize(os.path.join(args.output_dir, info["file"]))
+        print(f"{info['name']}: {info['count']} スペース, {size / 1024:.1f} KB")
@@ -0,0 +1,158 @@
+import math
+
+from place_map_shards import HALLS, hall_of
+from spatial_index import SpaceGrid
+
+# 生成した placeMap（divide_block → sort_blocks / build_place_map の出力）の検査
+#   duplicate   同じスペース番号が2回以上ある（json.load では後のものに黙って上書きされる）          error
+#   invalid     x / y / width / height が欠けている・数値でない・幅や高さが 0 以下                    error
+#   overlap     2つのスペースが重なっている（辺が接しているだけなら重なりではない）                    error
+#   gap         同じ列/行で隣り合うスペースの間に max_gap 以下のすき間がある（接しているはずのもの）  warning
+#   drift       座標が整数から浮動小数点の誤差程度だけずれている（例: 125.00000000000001）            warning
+#   fractional  座標が整数でない（divide_block の割り切れない分割など。integer=True のときだけ）      warning
+# ホールごとに座標系（元の画像）が違うので、重なり・すき間は同じホールのスペース同士でだけ調べる
+# 重なり・すき間は SpaceGrid（一様グリッド）で近くのスペースだけと比べるので O(n) 程度で済む
+ERROR_KINDS = ("duplicate", "invalid", "overlap")
+RECT_KEYS = ("x", "y", "width", "height")
+DRIFT_TOLERANCE = 1e-6
+OVERLAP_TOLERANCE = 1e-6
+MAX_GAP = 2.0
+
+
+def _issue(kind, ids, detail):
+    return {"kind": kind, "severity": "error" if kind in ERROR_KINDS else "warning", "ids": ids, "detail": detail}
+
+
+def _check_rect(space_id, rect, drift_tolerance, integer):
+    if not isinstance(rect, dict):
+        return None, [_issue("invalid", [space_id], f"矩形が dict ではありません: {rect!r}")]
+    values = []
+    for key in RECT_KEYS:
+        value = rect.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            return None, [_issue("invalid", [space_id], f"{key} が不正です: {value!r}")]
+        values.append(value)
+    if values[2] <= 0 or values[3] <= 0:
+        return None, [_issue("invalid", [space_id], f"幅・高さが 0 以下です: {values[2]} x {values[3]}")]
+
+    issues = []
+    drifted = [k for k, v in zip(RECT_KEYS, values) if 0 < abs(v - round(v)) <= drift_tolerance]
+    fractional = [k for k, v in zip(RECT_KEYS, values) if abs(v - round(v)) > drift_tolerance]
+    if drifted:
+        issues.append(_issue("drift", [space_id], ", ".join(f"{k}={rect[k]!r}" for k in drifted)))
+    if fractional and integer:
+        issues.append(_issue("fractional", [space_id], ", ".join(f"{k}={rect[k]!r}" for k in fractional)))
+    return tuple(values), issues
+
+
+# 2つの矩形の辺と辺のすき間（重なっていれば負）
+def _separation(a0, a1, b0, b1):
+    return max(a0, b0) - min(a1, b1)
+
+
+# 1ホール分の重なり・すき間（rects: {通し番号: rect}、ids: 通し番号 -> スペース番号）
+def _check_layout(rects, ids, max_gap, overlap_tolerance):
+    issues = []
+    grid = SpaceGrid(rects)
+    for i, (x, y, w, h) in zip(grid.codes, grid.rects):
+        for j in grid.query(x - max_gap, y - max_gap, w + 2 * max_gap, h + 2 * max_gap):
+            if j <= i:
+                continue
+            jx, jy, jw, jh = rects[j]["x"], rects[j]["y"], rects[j]["width"], rects[j]["height"]
+            sep_x = _separation(x, x + w, jx, jx + jw)
+            sep_y = _separation(y, y + h, jy, jy + jh)
+            if sep_x < -overlap_tolerance and sep_y < -overlap_tolerance:
+                issues.append(_issue("overlap", [ids[i], ids[j]], f"{-sep_x:g} x {-sep_y:g} px 重なっています"))
+                continue
+            # 同じ行（y と高さがそろっている）で横に、または同じ列で縦に、少しだけ離れている
+            same_row = abs(y - jy) <= overlap_tolerance and abs(h - jh) <= overlap_tolerance
+            same_col = abs(x - jx) <= overlap_tolerance and abs(w - jw) <= overlap_tolerance
+            gap = sep_x if same_row else sep_y if same_col else None
+            if gap is not None and overlap_tolerance < gap <= max_gap:
+                issues.append(_issue("gap", [ids[i], ids[j]], f"{gap:g} px のすき間があります"))
+    return issues
+
+
+# pairs: (space_id, rect) の並び（stream_json.iter_stream の結果など。重複もそのまま渡す）または dict
+# 戻り値: 問題の一覧 [{"kind", "severity", "ids", "detail"}, ...]
+def validate(pairs, max_gap=MAX_GAP, drift_tolerance=DRIFT_TOLERANCE, overlap_tolerance=OVERLAP_TOLERANCE,
+             integer=False, halls=HALLS):
+    items = pairs.items() if isinstance(pairs, dict) else pairs
+    issues = []
+    seen = {}
+    ids = []
+    by_hall = {}
+    for space_id, rect in items:
+        if space_id in seen:
+            seen[space_id] += 1
+            if seen[space_id] == 2:
+                issues.append(_issue("duplicate", [space_id], "同じスペース番号が複数あります"))
+        else:
+            seen[space_id] = 1
+        values, rect_issues = _check_rect(space_id, rect, drift_tolerance, integer)
+        issues += rect_issues
+        if values is not None:
+            # 重複した番号も別のスペースとして重なりを調べる
+            hall_id = hall_of(str(space_id), halls)["id"]
+            by_hall.setdefault(hall_id, {})[len(ids)] = dict(zip(RECT_KEYS, values))
+            ids.append(space_id)
+
+    for rects in by_hall.values():
+        issues += _check_layout(rects, ids, max_gap, overlap_tolerance)
+    return issues
+
+
+def summarize(issues):
+    counts = {}
+    for issue in issues:
+        counts[issue["kind"]] = counts.get(issue["kind"], 0) + 1
+    return counts
+
+
+def format_issues(issues, limit=20):
+    lines = [f"  [{i['severity']}] {i['kind']:<10} {' / '.join(map(str, i['ids']))}: {i['detail']}" for i in issues[:limit]]
+    if len(issues) > limit:
+        lines.append(f"  ...ほか {len(issues) - limit} 件")
+    return "\n".join(lines)
+
+
+# ビルドの最後に通す検査: error があれば（strict なら warning でも）ValueError。戻り値は warning の一覧
+def check_place_map(pairs, strict=False, **options):
+    issues = validate(pairs, **options)
+    failures = [i for i in issues if strict or i["severity"] == "error"]
+    if failures:
+        counts = ", ".join(f"{kind} {n}" for kind, n in summarize(failures).items())
+        raise ValueError(f"placeMap の検査で {len(failures)} 件の問題がありました（{counts}）\n"
+                         + format_issues(failures))
+    return issues
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    from stream_json import iter_stream
+
+    parser = argparse.ArgumentParser(description="placeMap（json / ndjson）の重複・重なり・すき間・座標のずれを調べる")
+    parser.add_argument("place_map", nargs="?", default="../../client/src/assets/placeMap.json")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP, help="これ以下のすき間を gap として報告する（px）")
+    parser.add_argument("--integer", action="store_true", help="整数でない座標も報告する")
+    parser.add_argument("--strict", action="store_true", help="warning があっても終了コード 1 にする")
+    parser.add_argument("--json", dest="json_output", default=None, help="問題の一覧（JSON）の出力先")
+    parser.add_argument("--limit", type=int, default=20, help="表示する件数")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pairs = list(iter_stream(args.place_map))
+    issues = validate(pairs, args.max_gap, integer=args.integer)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"{len(pairs)} スペースを検査しました（{elapsed:.1f} ms）: {summarize(issues) or '問題なし'}")
+    if issues:
+        print(format_issues(issues, args.limit))
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(issues, f, indent=4, ensure_ascii=False)
+    failed = any(args.strict or i["severity"] == "error" for i in issues)
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,356 @@
+import os
+import random
+import re
+import uuid
+
+from answer_matcher import AnswerMatcher
+from quiz_sampler import RangeSampler, masker_for
+
+# 歌詞クイズの進行（入出力から切り離した状態機械）
+#   ターミナル（Quiz_song.show_quiz）と quiz_server（HTTP / WebSocket）の両方がこれを使う
+#   1問の状態: showing（行を表示中）→ answering（回答待ち）→ finished
+MAX_TIMES = 3
+MAX_LINES = 3
+SHOWING = "showing"
+ANSWERING = "answering"
+FINISHED = "finished"
+
+
+# 今の状態ではできない操作（表示回数の上限・回答済みの問題への回答など）
+class QuizError(ValueError):
+    pass
+
+
+def normalize(text):
+    return re.sub(r'[^\w]', '', text.lower())
+
+
+# matcher（answer_matcher.AnswerMatcher）を渡すと、打ち間違いなど近い答えを "close" として認める
+def evaluate_answer(user_answer, correct_answer, matcher=None):
+    if matcher is not None:
+        match, distance = matcher.grade(user_answer, correct_answer)
+        return match, None if match == "wrong" else {"perfect": 0, "partial": 1}.get(match, 1 + distance)
+    if user_answer.lower() == correct_answer.lower():
+        return "perfect", 0
+    elif normalize(user_answer) == normalize(correct_answer):
+        return "partial", 1
+    else:
+        return "wrong", None
+
+
+# 正解時の得点（1回目の表示で 10 点、表示が1回増えるごとに -3 点）
+def base_point(display_count):
+    return max(10 - (display_count - 1) * 3, 0)
+
+
+# 全セッションで共有する歌詞データ（読み取り専用）
+# songs: {曲名: 空行を除いた行のタプル}、aliases: {曲名: [別名, ...]}
+# selector: song_selector.SongSelector（成績に応じて選ぶ。なければ一様に選ぶ）
+class QuizLibrary:
+    def __init__(self, songs, aliases=None, selector=None):
+        self.songs = songs
+        self.titles = sorted(songs)
+        self.aliases = {title: tuple(names) for title, names in (aliases or {}).items()}
+        self.selector = selector
+        self._matcher = None
+
+    # SongCorpus の全曲を読み込んでおく（問題ごとにファイルを読まない）
+    @classmethod
+    def from_corpus(cls, corpus, aliases=None, selector=None):
+        songs = {
+            os.path.splitext(os.path.basename(path))[0]: tuple(corpus.valid_lines(path))
+            for path in corpus.paths
+        }
+        return cls(songs, aliases, selector)
+
+    def __len__(self):
+        return len(self.titles)
+
+    # 全曲の曲名・別名から作る採点器（最初に使うときに1回だけ作る。quiz_server は起動時に別スレッドで作っておく）
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = AnswerMatcher(self.titles, self.aliases)
+        return self._matcher
+
+    def pick(self, rng=random):
+        if not self.titles:
+            raise QuizError("曲がありません")
+        if self.selector is not None:
+            return self.selector.draw()
+        return rng.choice(self.titles)
+
+    # 回答の結果を選択の重みに反映する
+    def record(self, title, correct, display_count):
+        if self.selector is not None:
+            self.selector.update(title, correct, display_count)
+
+    def new_round(self, title=None, rng=random, **options):
+        title = title or self.pick(rng)
+        lines = self.songs[title]
+        return QuizRound(title, len(lines), lambda start, end: lines[start:end],
+                         self.aliases.get(title, ()), rng=rng, matcher=self.matcher, **options)
+
+
+# 1問分の進行
+# get_lines(start, end): 有効行の start〜end-1 番目（SongCorpus.read_lines と同じ）
+# min_reveals: 回答モードに入るまでに必要な表示回数（ターミナル版は 0、サーバーは 1）
+# matcher: 回答の採点器（なければ完全一致・正規化での一致だけ）
+class QuizRound:
+    def __init__(self, title, line_count, get_lines, aliases=(), max_times=MAX_TIMES, min_reveals=0, rng=random,
+                 matcher=None):
+        self.title = title
+        self.line_count = line_count
+        self.get_lines = get_lines
+        self.max_times = max_times
+        self.min_reveals = min_reveals
+        self.rng = rng
+        self.matcher = matcher
+        self.masker = masker_for(title, tuple(aliases))
+        self.sampler = RangeSampler(line_count, MAX_LINES, rng)
+        self.state = SHOWING
+        self.shown = []  # [(start, end, 元の行, 伏せ字の行), ...]  start / end は1始まりの行番号
+        self.result = None
+
+    @property
+    def display_count(self):
+        return len(self.shown)
+
+    # 次の範囲を表示する。戻り値: {"index", "start", "end", "lines"（伏せ字済み）}
+    # 重ならない行が残っていなければ None を返して回答モードに移る
+    def reveal(self, num_lines=None):
+        if self.state != SHOWING:
+            raise QuizError("表示はもうできません")
+        drawn = self.sampler.draw(num_lines or self.rng.randint(1, MAX_LINES))
+        if drawn is None:
+            self.state = ANSWERING
+            return None
+        start, end = drawn
+        lines = self.get_lines(start, end)
+        masked = [self.masker.mask(line) for line in lines]
+        self.shown.append((start + 1, end, lines, masked))
+        if self.display_count >= self.max_times:
+            self.state = ANSWERING
+        return {"index": self.display_count, "start": start + 1, "end": end, "lines": masked}
+
+    def start_answer(self):
+        if self.state == FINISHED:
+            raise QuizError("回答済みです")
+        if self.display_count < self.min_reveals:
+            raise QuizError(f"{self.min_reveals} 回以上表示してから回答してください")
+        self.state = ANSWERING
+
+    # 回答して問題を終える。戻り値: {"match", "correct", "points", "display_count", "title", "shown"}
+    def answer(self, user_answer):
+        self.start_answer()
+        match, _ = evaluate_answer(user_answer.strip(), self.title, self.matcher)
+        correct = match != "wrong"
+        self.result = {
+            "match": match,
+            "correct": correct,
+            "points": base_point(self.display_count) if correct else 0,
+            "display_count": self.display_count,
+            "title": self.title,
+            "shown": [{"start": s, "end": e, "lines": list(lines)} for s, e, lines, _ in self.shown],
+        }
+        self.state = FINISHED
+        return self.result
+
+    # クライアントに見せてよい情報（回答前は曲名と元の行を含めない）
+    def view(self):
+        view = {
+            "state": self.state,
+            "line_count": self.line_count,
+            "display_count": self.display_count,
+            "max_times": self.max_times,
+            "shown": [{"start": s, "end": e, "lines": [line.strip() for line in masked]}
+                      for s, e, _, masked in self.shown],
+        }
+        if self.result is not None:
+            view["result"] = self.result
+        return view
+
+
+# 1人分のセッション（rounds 問を順に出題して成績を集計する）
+# on_result(title, correct, display_count, points, session_id): 回答ごとに呼ばれる（成績 DB への記録など）
+class QuizSession:
+    def __init__(self, library, rounds=10, rng=None, session_id=None, on_result=None, **round_options):
+        self.library = library
+        self.rounds = rounds
+        self.rng = rng or random.Random()
+        self.session_id = session_id or uuid.uuid4().hex
+        self.on_result = on_result
+        self.round_options = round_options
+        self.round_number = 0
+        self.round = None
+        self.stats = {"correct": 0, "incorrect": 0, "total_score": 0, "display_counts": []}
+
+    @property
+    def finished(self):
+        return self.round_number >= self.rounds and (self.round is None or self.round.state == FINISHED)
+
+    def next_round(self):
+        if self.round is not None and self.round.state != FINISHED:
+            raise QuizError("前の問題に回答していません")
+        if self.round_number >= self.rounds:
+            raise QuizError("全問終了しました")
+        self.round_number += 1
+        self.round = self.library.new_round(rng=self.rng, **self.round_options)
+        return self.view()
+
+    def _current(self):
+        if self.round is None:
+            raise QuizError("問題が始まっていません（next）")
+        return self.round
+
+    def answer(self, user_answer):
+        result = self._current().answer(user_answer)
+        if result["correct"]:
+            self.stats["correct"] += 1
+            self.stats["total_score"] += result["points"]
+            self.stats["display_counts"].append(result["display_count"])
+        else:
+            self.stats["incorrect"] += 1
+        self.library.record(result["title"], result["correct"], result["display_count"])
+        if self.on_result:
+            self.on_result(result["title"], result["correct"], result["display_count"], result["points"],
+                           self.session_id)
+        return dict(result, round=self.round_number, summary=self.summary())
+
+    def summary(self):
+        counts = self.stats["display_counts"]
+        return {
+            "rounds": self.rounds,
+            "played": self.round_number,
+            "correct": self.stats["correct"],
+            "incorrect": self.stats["incorrect"],
+            "total_score": self.stats["total_score"],
+            "max_score": self.rounds * 10,
+            "avg_display": sum(counts) / len(counts) if counts else 0,
+        }
+
+    def view(self):
+        return {
+            "session": self.session_id,
+            "round": self.round_number,
+            "finished": self.finished,
+            "question": self.round.view() if self.round else None,
+            "summary": self.summary(),
+        }
+
+    # {"type": "next" | "reveal" | "answer_mode" | "answer" | "state", ...} を処理して返信を返す
+    def handle(self, message):
+        kind = message.get("type")
+        if kind == "next":
+            return self.next_round()
+        if kind == "reveal":
+            shown = self._current().reveal()
+            return {"shown": shown, "question": self.round.view()}
+        if kind == "answer_mode":
+            self._current().start_answer()
+            return {"question": self.round.view()}
+        if kind == "answer":
+            return self.answer(str(message.get("answer", "")))
+        if kind == "state":
+            return self.view()
+        raise QuizError(f"Invalid message type: {kind}")
+
+
+# 会場の全員で同じ問題を解く部屋
+# 司会（host）が出題・表示・締め切りを行い、参加者はそれぞれ1回だけ回答する
+# 得点は回答した時点の表示回数で決まり（1人用と同じ base_point）、同点は回答までの時間が短い順
+# elapsed_ms はサーバーがその参加者に最後の表示を送った時刻から回答を受け取った時刻まで（通信の順番で不公平にならない）
+# 締め切った回答は1人用と同じく library.record と on_result に渡す（session_id は "部屋:参加者"）
+class QuizRoom:
+    def __init__(self, library, room_id=None, rng=None, max_times=MAX_TIMES, on_result=None):
+        self.library = library
+        self.room_id = room_id or uuid.uuid4().hex[:8]
+        self.rng = rng or random.Random()
+        self.max_times = max_times
+        self.on_result = on_result
+        self.players = {}
+        self.round = None
+        self.round_number = 0
+        self.answers = {}
+
+    def join(self, player_id, name):
+        player = self.players.setdefault(player_id, {"name": name, "score": 0, "correct": 0})
+        player["name"] = name
+        return {"room": self.room_id, "players": len(self.players), "round": self.round_number}
+
+    def leave(self, player_id):
+        self.players.pop(player_id, None)
+
+    def next_round(self):
+        if self.round is not None and self.round.state != FINISHED:
+            raise QuizError("前の問題を締め切っていません")
+        self.round_number += 1
+        self.round = self.library.new_round(rng=self.rng, max_times=self.max_times)
+        self.answers = {}
+        return {"round": self.round_number, "line_count": self.round.line_count, "max_times": self.max_times}
+
+    def _current(self):
+        if self.round is None or self.round.state == FINISHED:
+            raise QuizError("出題中の問題がありません")
+        return self.round
+
+    def reveal(self):
+        current = self._current()
+        if current.state != SHOWING:
+            raise QuizError("表示はもうできません")
+        shown = current.reveal()
+        if shown is None:
+            return None
+        return dict(shown, lines=[line.strip() for line in shown["lines"]])
+
+    # 参加者の回答（曲名は締め切るまで本人にも知らせない）
+    def answer(self, player_id, user_answer, elapsed_ms):
+        current = self._current()
+        if player_id not in self.players:
+            raise QuizError("部屋に参加していません")
+        if player_id in self.answers:
+            raise QuizError("回答済みです")
+        if current.display_count == 0:
+            raise QuizError("表示が始まっていません")
+        match, _ = evaluate_answer(user_answer.strip(), current.title, self.library.matcher)
+        correct = match != "wrong"
+        self.answers[player_id] = {
+            "match": match,
+            "correct": correct,
+            "points": base_point(current.display_count) if correct else 0,
+            "display_count": current.display_count,
+            "elapsed_ms": elapsed_ms,
+        }
+        return {"accepted": True, "display_count": current.display_count, "answered": len(self.answers)}
+
+    # 締め切って結果を返す（曲名・表示した元の行・この問題の順位・累計順位）
+    def close_round(self):
+        current = self._current()
+        current.state = FINISHED
+        for player_id, entry in self.answers.items():
+            player = self.players.get(player_id)
+            if player is None:
+                continue
+            if entry["correct"]:
+                player["score"] += entry["points"]
+                player["correct"] += 1
+            self.library.record(current.title, entry["correct"], entry["display_count"])
+            if self.on_result:
+                self.on_result(current.title, entry["correct"], entry["display_count"], entry["points"],
+                               f"{self.room_id}:{player_id}")
+        ranking = sorted(
+            ((player_id, entry) for player_id, entry in self.answers.items() if player_id in self.players),
+            key=lambda item: (-item[1]["points"], item[1]["elapsed_ms"])
+        )
+        return {
+            "round": self.round_number,
+            "title": current.title,
+            "shown": [{"start": s, "end": e, "lines": [line.strip() for line in lines]}
+                      for s, e, lines, _ in current.shown],
+            "ranking": [dict(entry, name=self.players[player_id]["name"]) for player_id, entry in ranking],
+            "leaderboard": self.leaderboard(),
+        }
+
+    def leaderboard(self, limit=20):
+        players = sorted(self.players.values(), key=lambda p: (-p["score"], -p["correct"], p["name"]))
+        return [dict(p) for p in players[:limit]]
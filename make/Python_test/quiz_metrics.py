@@ -0,0 +1,145 @@
+import heapq
+import json
+import os
+from bisect import bisect_left, bisect_right
+
+METRICS = ["correct", "incorrect", "total", "accuracy", "avg_display"]
+DEFAULT_CACHE_FILE = "quiz_metrics_index.json"
+INDEX_VERSION = 1
+
+
+def _grams(text):
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+# show_quiz_stats の compute_metrics の結果に索引を付けたもの
+#   - 指標ごとに値の昇順に並べた行番号（範囲検索は二分探索、全件ランキングはそのまま切り出し）
+#   - 曲名（小文字）の1文字・2文字 n-gram → 行番号（部分一致検索の候補絞り込み）
+class MetricsIndex:
+    def __init__(self, rows, order=None, grams=None):
+        self.rows = rows
+        self.names = [row["song"].lower() for row in rows]
+        if order is None:
+            order = {m: sorted(range(len(rows)), key=lambda i, m=m: rows[i][m]) for m in METRICS}
+        self.order = order
+        self.values = {m: [rows[i][m] for i in ids] for m, ids in order.items()}
+        if grams is None:
+            grams = {}
+            for i, name in enumerate(self.names):
+                for gram in _grams(name):
+                    grams.setdefault(gram, []).append(i)
+        self.grams = grams
+
+    def to_dict(self):
+        return {"rows": self.rows, "order": self.order, "grams": self.grams}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["rows"], data["order"], data["grams"])
+
+    # 曲名に substring を含む行番号の集合
+    def search_name(self, substring):
+        query = substring.lower()
+        if not query:
+            return set(range(len(self.rows)))
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = sorted((self.grams.get(g, []) for g in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return {i for i in candidates if query in self.names[i]}
+
+    # 指標の値が min〜max（両端含む）の行番号の集合
+    def range_ids(self, metric, min_val=None, max_val=None):
+        values = self.values[metric]
+        lo = 0 if min_val is None else bisect_left(values, min_val)
+        hi = len(values) if max_val is None else bisect_right(values, max_val)
+        return set(self.order[metric][lo:hi])
+
+    # filter_by_conditions と同じ条件に一致する行番号の集合（条件なしなら None = 全件）
+    def filter_ids(self, filters):
+        candidate_sets = []
+        if "song_name" in filters:
+            candidate_sets.append(self.search_name(filters["song_name"]))
+        for metric in METRICS:
+            if metric in filters:
+                candidate_sets.append(self.range_ids(metric, filters[metric].get("min"), filters[metric].get("max")))
+        if not candidate_sets:
+            return None
+
+        candidate_sets.sort(key=len)
+        ids = candidate_sets[0]
+        for other in candidate_sets[1:]:
+            ids = ids & other
+        return ids
+
+    # filter_by_conditions と同じ条件・同じ並び（元の順番）で絞り込む
+    def filter(self, filters):
+        ids = self.filter_ids(filters)
+        if ids is None:
+            return list(self.rows)
+        return [self.rows[i] for i in sorted(ids)]
+
+    # 上位 n 件（sorted(..., reverse=not ascending)[:n] と同じ結果。n が 0 / None ならすべて）
+    # 全件が対象なら並べ済みの索引から切り出し、絞り込み後ならヒープで n 件だけ取り出す
+    def top_n(self, metric, n=None, ascending=False, ids=None):
+        n = n or None
+        if ids is None:
+            if ascending:
+                ordered = self.order[metric]
+            else:
+                # 同じ値の中では元の順番を保つ（sorted の reverse=True と同じ）
+                ordered = self._descending(metric)
+            selected = ordered if n is None else ordered[:n]
+            return [self.rows[i] for i in selected]
+
+        ids = sorted(ids)
+        if n is None:
+            selected = sorted(ids, key=lambda i: self.rows[i][metric], reverse=not ascending)
+        elif ascending:
+            selected = heapq.nsmallest(n, ids, key=lambda i: self.rows[i][metric])
+        else:
+            selected = heapq.nlargest(n, ids, key=lambda i: self.rows[i][metric])
+        return [self.rows[i] for i in selected]
+
+    def _descending(self, metric):
+        ordered = self.order[metric]
+        values = self.values[metric]
+        result = []
+        end = len(ordered)
+        while end > 0:
+            start = bisect_left(values, values[end - 1], 0, end)
+            result.extend(ordered[start:end])
+            end = start
+        return result
+
+
+# 成績ファイルが変わっていなければ保存済みの索引を、変わっていれば作り直して保存する
+def load_or_build(stats_file, load_stats, compute_metrics, cache_file=DEFAULT_CACHE_FILE):
+    source = {"path": os.path.abspath(stats_file)}
+    # SQLite（WAL）の場合、書き込みはまず -wal ファイルに入るのでそちらの変化も見る
+    for path in (stats_file, stats_file + "-wal"):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            source[path] = [stat.st_mtime_ns, stat.st_size]
+
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("source") == source:
+                return MetricsIndex.from_dict(data)
+        except (json.JSONDecodeError, KeyError):
+            pass
+
+    index = MetricsIndex(compute_metrics(load_stats(stats_file)))
+    if cache_file:
+        tmp_file = cache_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(index.to_dict(), version=INDEX_VERSION, source=source), f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    return index
@@ -0,0 +1,136 @@
+import random
+import re
+import unicodedata
+from functools import lru_cache
+
+MASK = "*****"
+
+
+# 区間ごとの重み（その区間から取れる窓の数）を持つ Fenwick 木
+class FenwickTree:
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    # 重みの並びから O(n) で作る（1つずつ add すると O(n log n)）
+    @classmethod
+    def from_weights(cls, weights):
+        tree = cls(len(weights))
+        for i, weight in enumerate(weights, 1):
+            tree.tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= tree.size:
+                tree.tree[parent] += tree.tree[i]
+        tree.total = sum(weights)
+        return tree
+
+    def add(self, index, delta):
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    # 累積和が value を超える最初の位置と、その位置より前の累積和
+    def find(self, value):
+        pos = 0
+        remaining = value
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self.tree[nxt]
+            step >>= 1
+        return pos, value - remaining
+
+
+# まだ表示していない行の区間を管理し、重ならない 1〜max_window 行の範囲を O(log n) で引く
+class RangeSampler:
+    def __init__(self, total_lines, max_window=3, rng=random):
+        self.total_lines = total_lines
+        self.max_window = max_window
+        self.rng = rng
+        # 区間は1回引くごとに高々1つ増えるので、行数 + 1 個分の枠を用意しておく
+        self.slots = [(0, total_lines)]
+        self.trees = {k: FenwickTree(total_lines + 1) for k in range(1, max_window + 1)}
+        self._set_slot(0, 0, total_lines, old=(0, 0))
+
+    def _set_slot(self, index, start, end, old):
+        for k, tree in self.trees.items():
+            delta = max(0, end - start - k + 1) - max(0, old[1] - old[0] - k + 1)
+            if delta:
+                tree.add(index, delta)
+
+    def free_lines(self):
+        return self.trees[1].total
+
+    def can_draw(self, num_lines):
+        return num_lines in self.trees and self.trees[num_lines].total > 0
+
+    # num_lines 行の範囲 (start, end) を返す。取れなければ短い範囲で引き直し、1行も残っていなければ None
+    def draw(self, num_lines):
+        for k in range(min(num_lines, self.max_window), 0, -1):
+            tree = self.trees[k]
+            if tree.total == 0:
+                continue
+            r = self.rng.randrange(tree.total)
+            index, before = tree.find(r)
+            slot_start, slot_end = self.slots[index]
+            start = slot_start + (r - before)
+            end = start + k
+
+            self._set_slot(index, slot_start, start, old=(slot_start, slot_end))
+            self.slots[index] = (slot_start, start)
+            if end < slot_end:
+                self.slots.append((end, slot_end))
+                self._set_slot(len(self.slots) - 1, end, slot_end, old=(0, 0))
+            return start, end
+        return None
+
+    # 残っている区間を先頭から順に
+    def free_intervals(self):
+        return sorted((s, e) for s, e in self.slots if s < e)
+
+
+def _katakana_to_hiragana(text):
+    return "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+
+
+def _hiragana_to_katakana(text):
+    return "".join(chr(ord(c) + 0x60) if "ぁ" <= c <= "ゖ" else c for c in text)
+
+
+def _to_fullwidth(text):
+    return "".join(
+        "　" if c == " " else chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c
+        for c in text
+    )
+
+
+# 曲名・別名から、全角/半角・ひらがな/カタカナの揺れを含めた表記の一覧を作る
+def title_variants(title, aliases=()):
+    variants = set()
+    for name in (title, *aliases):
+        if not name:
+            continue
+        for base in (name, unicodedata.normalize("NFKC", name)):
+            for v in (base, _to_fullwidth(base)):
+                variants.update((v, _katakana_to_hiragana(v), _hiragana_to_katakana(v)))
+    return sorted(variants, key=len, reverse=True)
+
+
+# 曲ごとに1回だけパターンを作って、行ごとの伏せ字処理に使い回す
+class TitleMasker:
+    def __init__(self, title, aliases=()):
+        variants = title_variants(title, aliases)
+        self.pattern = re.compile("|".join(map(re.escape, variants)), re.IGNORECASE) if variants else None
+
+    def mask(self, line):
+        return self.pattern.sub(MASK, line) if self.pattern else line
+
+
+@lru_cache(maxsize=256)
+def masker_for(title, aliases=()):
+    return TitleMasker(title, aliases)
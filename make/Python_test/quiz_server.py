@@ -0,0 +1,551 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from quiz_engine import QuizError, QuizLibrary, QuizRoom, QuizSession
+
+# 歌詞クイズのサーバー（asyncio、1プロセスで数千セッション）
+#   HTTP（1人用）:
+#     POST   /sessions           {"rounds"?}              セッションを作る
+#     GET    /sessions/{id}                               状態
+#     POST   /sessions/{id}      {"type": "next" | "reveal" | "answer_mode" | "answer", "answer"?}
+#     DELETE /sessions/{id}
+#     GET    /health
+#   WebSocket（GET /ws、1メッセージ = 1 JSON。返信には "reply_to" と、送られてきた "id" を付ける）:
+#     1人用: {"type": "start", "rounds"?} / {"type": "resume", "session"} のあとは HTTP と同じ type
+#     部屋:  司会 {"type": "create_room"} / {"type": "room_next"} / {"type": "room_reveal"} / {"type": "room_close"}
+#            参加者 {"type": "join", "room", "name"} / {"type": "room_answer", "answer"}
+#            サーバーから参加者へ {"type": "round" | "reveal" | "result" | "room_closed", ...} を配信する
+# 歌詞データ（QuizLibrary）は全セッションで共有し、問題ごとにファイルを読まない
+# 成績 DB への記録（1人用・部屋の両方）は専用スレッドでまとめて行い、イベントループを止めない
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_BODY = 64 * 1024
+MAX_FRAME = 64 * 1024
+MAX_MESSAGE = 256 * 1024  # 継続フレームをつないだ後の1メッセージの上限
+MAX_WRITE_BUFFER = 1 << 20
+SESSION_TTL = 30 * 60
+SWEEP_INTERVAL = 60
+DEFAULT_PORT = 8765
+
+CORS_HEADERS = (
+    "Access-Control-Allow-Origin: *",
+    "Access-Control-Allow-Headers: Content-Type",
+    "Access-Control-Allow-Methods: GET, POST, DELETE, OPTIONS",
+)
+
+
+# HTTP のエラー（ステータスとメッセージ）
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _http_response(status, body=None, headers=()):
+    payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", *CORS_HEADERS, *headers]
+    if body is not None:
+        lines.append("Content-Type: application/json; charset=utf-8")
+    lines.append(f"Content-Length: {len(payload)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + payload
+
+
+# 戻り値: (method, path, headers, body)。接続が閉じられていれば None
+async def _read_request(reader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large")
+    request_line, *header_lines = head.decode('latin-1').split("\r\n")
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid request line")
+    headers = {}
+    for line in header_lines:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length") or "0"
+    if not length.isdigit():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    length = int(length)
+    if length > MAX_BODY:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+# 問題数（省略時は default）。受け付けるのは正の整数（JSON の整数か数字だけの文字列）だけで、それ以外は 400
+def _rounds(value, default):
+    if value is None:
+        return default
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid rounds: {value!r}")
+    return value
+
+
+def _json_body(body):
+    if not body:
+        return {}
+    try:
+        message = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid JSON")
+    if not isinstance(message, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "JSON object expected")
+    return message
+
+
+# --- WebSocket（RFC 6455 のうち、テキスト・close・ping/pong だけ） ---
+
+def _ws_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def _ws_frame(opcode, payload):
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _unmask(payload, mask):
+    if not payload:
+        return payload
+    n = len(payload)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+
+
+# 戻り値: (fin, opcode, payload)
+async def _read_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_FRAME:
+        raise ValueError("Frame too large")
+    if not second & 0x80:
+        raise ValueError("Client frames must be masked")
+    mask = await reader.readexactly(4)
+    return bool(first & 0x80), first & 0x0F, _unmask(await reader.readexactly(length), mask)
+
+
+# 成績 DB（quiz_stats_store）への記録をまとめて専用スレッドで書く
+class StatsWriter:
+    def __init__(self, stats_file):
+        self.stats_file = stats_file
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-stats")
+        self.store = None
+        self.task = None
+        self.written = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    # QuizSession の on_result と同じ引数
+    def record(self, song, correct, display_count, score, session):
+        self.queue.put_nowait((song, correct, display_count, score, session))
+
+    def _write(self, records):
+        if self.store is None:
+            from quiz_stats_store import open_store
+
+            self.store = open_store(self.stats_file)
+        self.store.record_many(records)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            records = [await self.queue.get()]
+            while not self.queue.empty():
+                records.append(self.queue.get_nowait())
+            try:
+                await loop.run_in_executor(self.executor, self._write, records)
+                self.written += len(records)
+            except Exception as e:
+                print(f"成績の記録に失敗しました（{len(records)} 件）: {e}")
+
+    async def close(self):
+        if self.task:
+            while not self.queue.empty():
+                await asyncio.sleep(0.01)
+            self.task.cancel()
+        loop = asyncio.get_running_loop()
+        if self.store is not None:
+            await loop.run_in_executor(self.executor, self.store.close)
+        self.executor.shutdown(wait=True)
+
+
+# WebSocket 1本分
+class _Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.id = os.urandom(8).hex()
+        self.session = None
+        self.room = None
+        self.host = False
+        self.name = None
+        self.sent_at = None  # 部屋の最後の表示をこの接続に送った時刻（回答時間の起点）
+
+    def send(self, message):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        # 読み出しの遅いクライアントのために送信バッファを溜め込まない
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            transport.abort()
+            return
+        self.writer.write(_ws_frame(0x1, json.dumps(message, ensure_ascii=False).encode('utf-8')))
+
+
+class QuizServer:
+    def __init__(self, library, rounds=10, stats_file=None, session_ttl=SESSION_TTL):
+        self.library = library
+        self.rounds = rounds
+        self.session_ttl = session_ttl
+        self.stats = StatsWriter(stats_file) if stats_file else None
+        self.sessions = {}  # id -> [QuizSession, 最後に使った時刻]
+        self.rooms = {}     # id -> (QuizRoom, 司会の接続, {player_id: 接続})
+        self.connections = 0
+        self.live = set()   # 開いている WebSocket（_Connection）
+        self.writers = set()
+        self.server = None
+        self._sweeper = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, backlog=2048):
+        # 採点器（全曲名の表）は作るのに時間がかかるので、最初の問題でイベントループを止めないよう別スレッドで先に作る
+        await asyncio.get_running_loop().run_in_executor(None, lambda: self.library.matcher)
+        if self.stats:
+            self.stats.start()
+        self.server = await asyncio.start_server(self._handle, host, port, backlog=backlog, limit=MAX_BODY)
+        self._sweeper = asyncio.create_task(self._sweep())
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self.server:
+            self.server.close()
+            # 開いている接続を閉じ、各接続の処理が終わるのを待つ
+            for writer in list(self.writers):
+                writer.close()
+            for _ in range(100):
+                if not self.connections:
+                    break
+                await asyncio.sleep(0.01)
+            await self.server.wait_closed()
+        if self.stats:
+            await self.stats.close()
+
+    # 一定時間使われていないセッションを消す（WebSocket がつながっているセッションは残す）
+    async def _sweep(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            cutoff = loop.time() - self.session_ttl
+            attached = {conn.session.session_id for conn in self.live if conn.session is not None}
+            for session_id in [k for k, (_, used) in self.sessions.items() if used < cutoff and k not in attached]:
+                del self.sessions[session_id]
+
+    # --- セッション ---
+
+    def create_session(self, rounds=None):
+        session = QuizSession(self.library, _rounds(rounds, self.rounds),
+                              on_result=self.stats.record if self.stats else None, min_reveals=1)
+        self.sessions[session.session_id] = [session, asyncio.get_running_loop().time()]
+        return session
+
+    def get_session(self, session_id):
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown session: {session_id}")
+        entry[1] = asyncio.get_running_loop().time()
+        return entry[0]
+
+    def health(self):
+        return {"ok": True, "songs": len(self.library), "sessions": len(self.sessions), "rooms": len(self.rooms),
+                "connections": self.connections}
+
+    # --- HTTP ---
+
+    def _route(self, method, path, body):
+        parts = [p for p in path.split("/") if p]
+        if method == "OPTIONS":
+            return HTTPStatus.NO_CONTENT, None
+        if parts == ["health"] and method == "GET":
+            return HTTPStatus.OK, self.health()
+        if parts == ["sessions"] and method == "POST":
+            return HTTPStatus.CREATED, self.create_session(_json_body(body).get("rounds")).view()
+        if len(parts) == 2 and parts[0] == "sessions":
+            if method == "GET":
+                return HTTPStatus.OK, self.get_session(parts[1]).view()
+            if method == "POST":
+                return HTTPStatus.OK, self.get_session(parts[1]).handle(_json_body(body))
+            if method == "DELETE":
+                self.get_session(parts[1])
+                del self.sessions[parts[1]]
+                return HTTPStatus.NO_CONTENT, None
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                        await self._websocket(reader, writer, headers)
+                        break
+                    status, result = self._route(method, path, body)
+                except HTTPError as e:
+                    status, result = e.status, {"error": str(e)}
+                    headers = {"connection": "close"}
+                except QuizError as e:
+                    status, result = HTTPStatus.CONFLICT, {"error": str(e)}
+                writer.write(_http_response(status, result))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            self.writers.discard(writer)
+            writer.close()
+
+    # --- WebSocket ---
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing Sec-WebSocket-Key")
+        writer.write(_http_response(HTTPStatus.SWITCHING_PROTOCOLS, headers=(
+            "Upgrade: websocket", "Connection: Upgrade", f"Sec-WebSocket-Accept: {_ws_accept(key)}")))
+        await writer.drain()
+
+        loop = asyncio.get_running_loop()
+        conn = _Connection(writer)
+        self.live.add(conn)
+        fragments = []
+        size = 0
+        try:
+            while True:
+                try:
+                    fin, opcode, payload = await _read_frame(reader)
+                except ValueError:
+                    writer.write(_ws_frame(0x8, struct.pack("!H", 1009)))
+                    break
+                # 受け取った時刻（回答時間はメッセージを解釈する前の時刻で測る）
+                received = loop.time()
+                if opcode == 0x8:
+                    writer.write(_ws_frame(0x8, payload[:2]))
+                    break
+                if opcode == 0x9:
+                    writer.write(_ws_frame(0xA, payload))
+                    continue
+                if opcode in (0x1, 0x2, 0x0):
+                    size += len(payload)
+                    if size > MAX_MESSAGE:
+                        writer.write(_ws_frame(0x8, struct.pack("!H", 1009)))
+                        break
+                    fragments.append(payload)
+                    if not fin:
+                        continue
+                    data, fragments, size = b"".join(fragments), [], 0
+                    self._ws_message(conn, data, received)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.live.discard(conn)
+            self._disconnect(conn)
+
+    def _ws_message(self, conn, data, received):
+        try:
+            message = json.loads(data)
+            if not isinstance(message, dict):
+                raise ValueError("JSON object expected")
+        except (ValueError, UnicodeDecodeError) as e:
+            conn.send({"type": "error", "error": f"Invalid message: {e}"})
+            return
+        kind = message.get("type")
+        try:
+            reply = self._dispatch(conn, kind, message, received)
+        except (QuizError, HTTPError) as e:
+            reply = {"error": str(e)}
+        except Exception as e:
+            # 想定外の失敗でも接続は切らない（ほかのメッセージ・部屋の配信は続ける）
+            print(f"メッセージ {kind!r} の処理に失敗しました: {e!r}")
+            reply = {"error": "Internal error"}
+        if reply is not None:
+            reply = dict(reply, reply_to=kind)
+            if "id" in message:
+                reply["id"] = message["id"]
+            conn.send(reply)
+
+    def _dispatch(self, conn, kind, message, received):
+        if kind == "start":
+            conn.session = self.create_session(message.get("rounds"))
+            return conn.session.view()
+        if kind == "resume":
+            conn.session = self.get_session(str(message.get("session")))
+            return conn.session.view()
+        if kind in ("next", "reveal", "answer_mode", "answer", "state"):
+            if conn.session is None:
+                raise QuizError("セッションがありません（start）")
+            # DELETE /sessions/{id} で消されたセッションならエラーを返す
+            session_id, conn.session = conn.session.session_id, None
+            conn.session = self.get_session(session_id)
+            return conn.session.handle(message)
+        if kind == "create_room":
+            # 今いる部屋からは抜ける（司会なら部屋を閉じる）
+            self._leave_room(conn)
+            room = QuizRoom(self.library, on_result=self.stats.record if self.stats else None)
+            self.rooms[room.room_id] = (room, conn, {})
+            conn.room, conn.host = room.room_id, True
+            return {"room": room.room_id}
+        if kind == "join":
+            room_id = str(message.get("room"))
+            if room_id not in self.rooms:
+                raise QuizError(f"Unknown room: {room_id}")
+            if conn.room != room_id:
+                self._leave_room(conn)
+            room, _, members = self.rooms[room_id]
+            conn.room, conn.name = room_id, str(message.get("name") or "guest")[:40]
+            members[conn.id] = conn
+            return room.join(conn.id, conn.name)
+        if kind in ("room_next", "room_reveal", "room_close"):
+            return self._host_action(conn, kind)
+        if kind == "room_answer":
+            room, _, members = self._room_of(conn)
+            if conn.sent_at is None:
+                raise QuizError("表示が始まっていません")
+            elapsed_ms = (received - conn.sent_at) * 1000
+            return room.answer(conn.id, str(message.get("answer", "")), elapsed_ms)
+        raise QuizError(f"Invalid message type: {kind}")
+
+    def _room_of(self, conn):
+        if conn.room not in self.rooms:
+            raise QuizError("部屋に参加していません")
+        return self.rooms[conn.room]
+
+    # 司会の操作を全参加者に配信する
+    def _host_action(self, conn, kind):
+        room, host, members = self._room_of(conn)
+        if host is not conn:
+            raise QuizError("司会だけができる操作です")
+        loop = asyncio.get_running_loop()
+        if kind == "room_next":
+            event = dict(room.next_round(), type="round")
+            for member in members.values():
+                member.sent_at = None
+        elif kind == "room_reveal":
+            shown = room.reveal()
+            if shown is None:
+                return {"shown": None}
+            event = dict(shown, type="reveal")
+        else:
+            event = dict(room.close_round(), type="result")
+        # 参加者ごとに送った時刻を記録する（全員に書き終えるまで待たない。同じ表示への回答時間を公平に測る）
+        for member in members.values():
+            member.send(event)
+            if kind == "room_reveal":
+                member.sent_at = loop.time()
+        return dict(event, players=len(members))
+
+    # 部屋から抜ける（切断時と、別の部屋を作る・別の部屋に入るとき）。司会が抜けると部屋を閉じる
+    def _leave_room(self, conn):
+        room_id, conn.room, conn.host, conn.sent_at = conn.room, None, False, None
+        if room_id not in self.rooms:
+            return
+        room, host, members = self.rooms[room_id]
+        if host is conn:
+            for member in members.values():
+                member.send({"type": "room_closed", "room": room.room_id})
+                member.room = None
+            del self.rooms[room_id]
+        else:
+            members.pop(conn.id, None)
+            room.leave(conn.id)
+
+    def _disconnect(self, conn):
+        self._leave_room(conn)
+
+
+# 歌詞フォルダ（と曲名の別名）から共有の歌詞データを作る
+# stats_file を渡すと、全員の成績から間違えやすい曲ほど出やすくする（song_selector）
+def load_library(folder_path, aliases_file="title_aliases.json", stats_file=None):
+    from song_corpus import SongCorpus
+
+    aliases = {}
+    if aliases_file and os.path.exists(aliases_file):
+        with open(aliases_file, 'r', encoding='utf-8') as f:
+            aliases = json.load(f)
+    library = QuizLibrary.from_corpus(SongCorpus(folder_path), aliases)
+    if stats_file:
+        from quiz_stats_store import open_store
+        from song_selector import SongSelector
+
+        with open_store(stats_file) as store:
+            library.selector = SongSelector(library.titles, store.stats())
+    return library
+
+
+async def run_server(library, host="127.0.0.1", port=DEFAULT_PORT, rounds=10, stats_file="quiz_stats.db"):
+    server = QuizServer(library, rounds, stats_file)
+    await server.start(host, port)
+    print(f"{len(library)} 曲でクイズサーバーを起動しました: http://{host}:{server.port}/ （WebSocket: /ws）")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Quiz_song import DEFAULT_FOLDER
+
+    parser = argparse.ArgumentParser(description="歌詞クイズを HTTP / WebSocket で多人数に出題する")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--stats-file", default="quiz_stats.db", help="空文字なら成績を記録しない")
+    parser.add_argument("--aliases-file", default="title_aliases.json")
+    parser.add_argument("--uniform", action="store_true", help="成績によらず一様に出題する")
+    args = parser.parse_args()
+
+    try:
+        library = load_library(args.folder, args.aliases_file, None if args.uniform else args.stats_file or None)
+        asyncio.run(run_server(library, args.host, args.port, args.rounds, args.stats_file or None))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_DB_FILE = "quiz_stats.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT,
+    song TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    display_count INTEGER NOT NULL,
+    score INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS song_stats (
+    song TEXT PRIMARY KEY,
+    correct INTEGER NOT NULL DEFAULT 0,
+    incorrect INTEGER NOT NULL DEFAULT 0,
+    display_sum INTEGER NOT NULL DEFAULT 0,
+    display_n INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS display_hist (
+    song TEXT NOT NULL,
+    display_count INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (song, display_count)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+LEGACY_IMPORTED = "legacy_imported"
+
+
+# クイズの累積成績（SQLite / WAL モード）
+# 回答ごとにイベントを1行追記し、同じトランザクションで曲ごとの集計（回数・合計・ヒストグラム）を更新する
+# 途中で落ちても記録済みの回答は残り、複数のセッションから同時に書き込んでも上書きし合わない
+# read_only=True なら読み出し専用で開く（スキーマの作成もしない。成績の表示など）
+class QuizStatsStore:
+    def __init__(self, db_file=DEFAULT_DB_FILE, timeout=10.0, read_only=False):
+        self.db_file = db_file
+        if read_only:
+            uri = Path(os.path.abspath(db_file)).as_uri() + "?mode=ro"
+            self.conn = sqlite3.connect(uri, timeout=timeout, isolation_level=None, uri=True)
+            return
+        self.conn = sqlite3.connect(db_file, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.conn.executescript(SCHEMA)
+        # meta ができる前の DB は、作ったときに quiz_stats.json を取り込み済み
+        if "song_stats" in tables and "meta" not in tables:
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)", (LEGACY_IMPORTED, ""))
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _transaction(self, func):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func()
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return result
+
+    # 1回分の回答を記録する（表示回数の集計は正解時のみ。従来の display_counts と同じ）
+    def record(self, song, correct, display_count, score=0, session=None):
+        def write():
+            self.conn.execute(
+                "INSERT INTO events (ts, session, song, correct, display_count, score) VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), session, song, int(bool(correct)), display_count, score),
+            )
+            self._add_aggregate(song, 1 if correct else 0, 0 if correct else 1,
+                                {display_count: 1} if correct else {})
+        self._transaction(write)
+
+    # 複数の回答をまとめて1トランザクションで記録する（quiz_server のように回答が続けて届く場合）
+    # records: (song, correct, display_count, score, session) の並び
+    def record_many(self, records):
+        def write():
+            now = time.time()
+            for song, correct, display_count, score, session in records:
+                self.conn.execute(
+                    "INSERT INTO events (ts, session, song, correct, display_count, score) VALUES (?, ?, ?, ?, ?, ?)",
+                    (now, session, song, int(bool(correct)), display_count, score),
+                )
+                self._add_aggregate(song, 1 if correct else 0, 0 if correct else 1,
+                                    {display_count: 1} if correct else {})
+        self._transaction(write)
+
+    def _add_aggregate(self, song, correct, incorrect, hist):
+        display_sum = sum(k * n for k, n in hist.items())
+        display_n = sum(hist.values())
+        self.conn.execute(
+            "INSERT INTO song_stats (song, correct, incorrect, display_sum, display_n) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(song) DO UPDATE SET correct = correct + excluded.correct, "
+            "incorrect = incorrect + excluded.incorrect, display_sum = display_sum + excluded.display_sum, "
+            "display_n = display_n + excluded.display_n",
+            (song, correct, incorrect, display_sum, display_n),
+        )
+        for display_count, n in hist.items():
+            self.conn.execute(
+                "INSERT INTO display_hist (song, display_count, n) VALUES (?, ?, ?) "
+                "ON CONFLICT(song, display_count) DO UPDATE SET n = n + excluded.n",
+                (song, display_count, n),
+            )
+
+    # 曲ごとの集計 {"曲名": {"correct", "incorrect", "display_sum", "display_n", "display_hist"}}
+    def stats(self):
+        result = {
+            song: {"correct": c, "incorrect": i, "display_sum": s, "display_n": n, "display_hist": {}}
+            for song, c, i, s, n in self.conn.execute(
+                "SELECT song, correct, incorrect, display_sum, display_n FROM song_stats")
+        }
+        for song, display_count, n in self.conn.execute("SELECT song, display_count, n FROM display_hist"):
+            result[song]["display_hist"][display_count] = n
+        return result
+
+    def song(self, song):
+        row = self.conn.execute(
+            "SELECT correct, incorrect, display_sum, display_n FROM song_stats WHERE song = ?", (song,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("correct", "incorrect", "display_sum", "display_n"), row))
+
+    # 従来の quiz_stats.json（display_counts は生のリスト）を取り込む
+    # once=True なら取り込み済みの印（meta.legacy_imported）を同じトランザクションで確かめて書くので、
+    # 失敗すれば次回やり直し、同時に起動しても二重には取り込まない（取り込み済みなら None）
+    def import_legacy(self, json_file, once=False):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+
+        def write():
+            if once:
+                if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (LEGACY_IMPORTED,)).fetchone():
+                    return None
+                self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                  (LEGACY_IMPORTED, os.path.abspath(json_file)))
+            for song, data in legacy.items():
+                hist = {}
+                for count in data.get("display_counts", []):
+                    hist[count] = hist.get(count, 0) + 1
+                self._add_aggregate(song, data.get("correct", 0), data.get("incorrect", 0), hist)
+            return len(legacy)
+        return self._transaction(write)
+
+    def legacy_imported(self):
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (LEGACY_IMPORTED,)).fetchone() is not None
+
+    # 従来形式の dict に戻す（display_counts はヒストグラムから復元するので順番は保存されない）
+    def export_legacy(self):
+        return {
+            song: {
+                "correct": data["correct"],
+                "incorrect": data["incorrect"],
+                "display_counts": [k for k in sorted(data["display_hist"]) for _ in range(data["display_hist"][k])],
+            }
+            for song, data in self.stats().items()
+        }
+
+    # イベントログを整理する（集計には影響しない）
+    # keep_days 日より古いイベントを削除し、WAL をチェックポイントしてファイルを縮める
+    def compact(self, keep_days=None):
+        if keep_days is None:
+            deleted = self.conn.execute("DELETE FROM events").rowcount
+        else:
+            cutoff = time.time() - keep_days * 86400
+            deleted = self.conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("VACUUM")
+        return deleted
+
+
+# DB がまだなければ作り、従来の quiz_stats.json があれば一度だけ取り込む（取り込み済みかは DB の meta で判断する）
+def open_store(db_file=DEFAULT_DB_FILE, legacy_file="quiz_stats.json"):
+    store = QuizStatsStore(db_file)
+    if legacy_file and os.path.exists(legacy_file) and not store.legacy_imported():
+        count = store.import_legacy(legacy_file, once=True)
+        if count is not None:
+            print(f"{legacy_file} から {count} 曲分の成績を取り込みました。")
+    return store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="クイズ成績 DB の管理")
+    parser.add_argument("--db", default=DEFAULT_DB_FILE)
+    parser.add_argument("--compact", type=float, default=None, metavar="DAYS",
+                        help="DAYS 日より古いイベントを削除する（0 で全イベント）")
+    parser.add_argument("--export", default=None, help="従来形式の JSON に書き出す")
+    args = parser.parse_args()
+
+    with open_store(args.db) as store:
+        if args.compact is not None:
+            print(f"{store.compact(args.compact or None)} 件のイベントを削除しました。")
+        if args.export:
+            with open(args.export, 'w', encoding='utf-8') as f:
+                json.dump(store.export_legacy(), f, ensure_ascii=False, indent=2)
+            print(f"{args.export} に保存しました。")
@@ -0,0 +1,367 @@
+import math
+import statistics
+from array import array
+from functools import lru_cache
+
+from place_map_shards import HALLS, hall_of
+from place_map_validation import MAX_GAP, RECT_KEYS
+
+# 買い回りの順番（スペース番号の一覧 -> 歩く距離が短くなる訪問順）
+#   ホールごとにスペースの矩形を机（通れない所）としてグリッドに描き、残りのセルを通路とする
+#   スペースの入口は矩形のすぐ外側の通路セル。通路セル間の距離は BFS（上下左右、1セル = cell_size px）
+#   ホールの間は出入口（exits）どうしの距離表 HALL_LINKS を最短路にした表を最初に作っておく
+#   別のホールのスペースへは「出入口まで + ホール間 + 出入口から」で数える
+# 訪問順は最近傍法で作ってから 2-opt と Or-opt（1〜3 か所の並びを別の位置へ移す）で改善する
+# 距離の単位は地図の px（机の幅 18.5 px ≒ 1.8 m なので、10 px ≒ 1 m として HALL_LINKS を決めている）
+HALL_LINKS = [
+    ("east456", "east7", 1500),
+    ("east456", "west12", 3500),
+    ("west12", "south12", 1000),
+    ("south12", "other", 500),
+]
+UNREACHABLE = 10 ** 9
+FIELD_CACHE_SIZE = 512
+OR_OPT_LENGTHS = (1, 2, 3)
+
+
+def _valid_rect(rect):
+    return isinstance(rect, dict) and all(
+        isinstance(rect.get(key), (int, float)) and not isinstance(rect.get(key), bool) for key in RECT_KEYS
+    ) and rect["width"] > 0 and rect["height"] > 0
+
+
+# 1ホール分の通路グリッド
+# 外周は通れるセルを1周、その外を壁にしておくので、隣のセルを調べるときに範囲外の確認がいらない
+class HallGrid:
+    def __init__(self, rects, cell_size=None, padding=MAX_GAP):
+        if not rects:
+            raise ValueError("rects is empty")
+        if cell_size is None:
+            # 机1つの短い辺を1セルにする（通路は机の幅以上あるので途切れない）
+            cell_size = statistics.median(min(r["width"], r["height"]) for r in rects.values())
+        self.cell_size = cell_size
+        self.rects = rects
+        self.origin_x = min(r["x"] for r in rects.values()) - 2 * cell_size
+        self.origin_y = min(r["y"] for r in rects.values()) - 2 * cell_size
+        self.cols = int((max(r["x"] + r["width"] for r in rects.values()) - self.origin_x) // cell_size) + 3
+        self.rows = int((max(r["y"] + r["height"] for r in rects.values()) - self.origin_y) // cell_size) + 3
+
+        free = bytearray([1]) * (self.cols * self.rows)
+        for c in range(self.cols):
+            free[c] = free[(self.rows - 1) * self.cols + c] = 0
+        for r in range(self.rows):
+            free[r * self.cols] = free[r * self.cols + self.cols - 1] = 0
+        # セルの中心が机（すき間 padding 以下は埋めて1つの島とみなす）に入っていれば通れない
+        for rect in rects.values():
+            x0, x1 = rect["x"] - padding, rect["x"] + rect["width"] + padding
+            y0, y1 = rect["y"] - padding, rect["y"] + rect["height"] + padding
+            for row in range(self._row(y0), self._row(y1) + 1):
+                cy = self.origin_y + (row + 0.5) * cell_size
+                if not y0 <= cy <= y1:
+                    continue
+                for col in range(self._col(x0), self._col(x1) + 1):
+                    cx = self.origin_x + (col + 0.5) * cell_size
+                    if x0 <= cx <= x1:
+                        free[row * self.cols + col] = 0
+        self.free = free
+        self._access = {}
+        self.field = lru_cache(maxsize=FIELD_CACHE_SIZE)(self._field)
+
+    def _col(self, x):
+        return min(max(int((x - self.origin_x) // self.cell_size), 0), self.cols - 1)
+
+    def _row(self, y):
+        return min(max(int((y - self.origin_y) // self.cell_size), 0), self.rows - 1)
+
+    def center(self, cell):
+        row, col = divmod(cell, self.cols)
+        return self.origin_x + (col + 0.5) * self.cell_size, self.origin_y + (row + 0.5) * self.cell_size
+
+    # (x, y) にいちばん近い通路セル（近いセルから輪状に広げて探す）
+    def nearest_free(self, x, y):
+        col, row = self._col(x), self._row(y)
+        for ring in range(max(self.cols, self.rows)):
+            found = [
+                r * self.cols + c
+                for r in range(max(row - ring, 0), min(row + ring, self.rows - 1) + 1)
+                for c in range(max(col - ring, 0), min(col + ring, self.cols - 1) + 1)
+                if max(abs(r - row), abs(c - col)) == ring and self.free[r * self.cols + c]
+            ]
+            if found:
+                return min(found, key=lambda cell: math.dist(self.center(cell), (x, y)))
+        raise ValueError("通路がありません")
+
+    # スペースの入口（矩形の中心にいちばん近い通路セル）
+    def access(self, code):
+        cell = self._access.get(code)
+        if cell is None:
+            rect = self.rects[code]
+            cell = self._access[code] = self.nearest_free(rect["x"] + rect["width"] / 2,
+                                                          rect["y"] + rect["height"] / 2)
+        return cell
+
+    # source セルから全セルまでの歩数（届かないセルは -1）
+    def _field(self, source):
+        cols = self.cols
+        free = self.free
+        steps = array('i', [-1]) * len(free)
+        steps[source] = 0
+        frontier = [source]
+        step = 0
+        while frontier:
+            step += 1
+            next_frontier = []
+            for cell in frontier:
+                for neighbor in (cell - 1, cell + 1, cell - cols, cell + cols):
+                    if free[neighbor] and steps[neighbor] < 0:
+                        steps[neighbor] = step
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return steps
+
+    def distance(self, a, b):
+        steps = self.field(a)[b]
+        return steps * self.cell_size if steps >= 0 else UNREACHABLE
+
+
+# ホール間の最短距離（Floyd–Warshall。つながっていなければ UNREACHABLE）
+def hall_distances(hall_ids, links=HALL_LINKS):
+    table = {a: {b: 0 if a == b else UNREACHABLE for b in hall_ids} for a in hall_ids}
+    for a, b, d in links:
+        if a in table and b in table:
+            table[a][b] = table[b][a] = min(table[a][b], d)
+    for k in hall_ids:
+        for a in hall_ids:
+            for b in hall_ids:
+                if table[a][k] + table[k][b] < table[a][b]:
+                    table[a][b] = table[a][k] + table[k][b]
+    return table
+
+
+# --- 訪問順（dist は対称な距離行列。閉路 tour を改善する） ---
+
+def _tour_length(dist, tour):
+    return sum(dist[tour[i - 1]][tour[i]] for i in range(len(tour)))
+
+
+def nearest_neighbor(dist, start=0):
+    remaining = set(range(len(dist))) - {start}
+    tour = [start]
+    while remaining:
+        row = dist[tour[-1]]
+        nearest = min(remaining, key=row.__getitem__)
+        remaining.remove(nearest)
+        tour.append(nearest)
+    return tour
+
+
+# 2本の辺をつなぎ替えて区間を反転する（改善がなくなるまで）
+def two_opt(dist, tour):
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            a, b = tour[i], tour[i + 1]
+            row_a, row_b = dist[a], dist[b]
+            ab = row_a[b]
+            for j in range(i + 2, n if i else n - 1):
+                c, d = tour[j], tour[(j + 1) % n]
+                delta = row_a[c] + row_b[d] - ab - dist[c][d]
+                if delta < -1e-9:
+                    tour[i + 1:j + 1] = reversed(tour[i + 1:j + 1])
+                    b = tour[i + 1]
+                    row_b = dist[b]
+                    ab = row_a[b]
+                    improved = True
+    return tour
+
+
+# 連続した 1〜3 か所を抜き出し、別の辺の間へ（向きも含めて）差し込む
+def or_opt(dist, tour):
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for length in OR_OPT_LENGTHS:
+            if length >= n - 2:
+                continue
+            i = 0
+            while i < n:
+                segment = [tour[(i + k) % n] for k in range(length)]
+                prev, nxt = tour[i - 1], tour[(i + length) % n]
+                first, last = segment[0], segment[-1]
+                removed = dist[prev][first] + dist[last][nxt] - dist[prev][nxt]
+                rest = [tour[(i + length + k) % n] for k in range(n - length)]
+                best, best_at, best_reversed = -1e-9, None, False
+                for k in range(len(rest) - 1):
+                    p, q = rest[k], rest[k + 1]
+                    base = dist[p][q]
+                    forward = dist[p][first] + dist[last][q] - base - removed
+                    backward = dist[p][last] + dist[first][q] - base - removed
+                    if forward < best:
+                        best, best_at, best_reversed = forward, k, False
+                    if backward < best:
+                        best, best_at, best_reversed = backward, k, True
+                if best_at is not None:
+                    moved = segment[::-1] if best_reversed else segment
+                    tour[:] = rest[:best_at + 1] + moved + rest[best_at + 1:]
+                    improved = True
+                i += 1
+    return tour
+
+
+# 距離行列の全地点を回る順番（start から始めて、終わりはどこでもよい）
+# 仮の地点を1つ足して閉路にする: 仮の地点と start の距離は 0、ほかとは同じ大きな値
+def solve_order(dist, start=None):
+    n = len(dist)
+    if n <= 2:
+        return list(range(n)) if start in (None, 0) else [start] + [i for i in range(n) if i != start]
+    far = 0 if start is None else max(max(row) for row in dist) * n + 1
+    extended = [row + [0 if start is None or i == start else far] for i, row in enumerate(dist)]
+    extended.append([0 if start is None or i == start else far for i in range(n)] + [0])
+    tour = nearest_neighbor(extended, n)
+    for _ in range(3):
+        before = _tour_length(extended, tour)
+        two_opt(extended, tour)
+        or_opt(extended, tour)
+        if _tour_length(extended, tour) >= before - 1e-9:
+            break
+    at = tour.index(n)
+    order = tour[at + 1:] + tour[:at]
+    if start is not None and order[0] != start:
+        order.reverse()
+    return order
+
+
+class RoutePlanner:
+    def __init__(self, place_map, links=HALL_LINKS, exits=None, cell_size=None, halls=HALLS):
+        self.hall_ids = {}
+        by_hall = {}
+        for code, rect in place_map.items():
+            if not _valid_rect(rect):
+                continue
+            hall_id = hall_of(code, halls)["id"]
+            self.hall_ids[code] = hall_id
+            by_hall.setdefault(hall_id, {})[code] = rect
+        self.grids = {hall_id: HallGrid(rects, cell_size) for hall_id, rects in by_hall.items()}
+        self.halls = hall_distances(sorted(self.grids), links)
+        # 出入口: exits {ホール: [x, y]}（なければホールの下端の中央）
+        self.exits = {}
+        for hall_id, grid in self.grids.items():
+            rects = by_hall[hall_id].values()
+            x, y = (exits or {}).get(hall_id) or (
+                (min(r["x"] for r in rects) + max(r["x"] + r["width"] for r in rects)) / 2,
+                max(r["y"] + r["height"] for r in rects),
+            )
+            self.exits[hall_id] = grid.nearest_free(x, y)
+
+    def _check(self, code):
+        if code not in self.hall_ids:
+            raise ValueError(f"Unknown space: {code}")
+        return self.hall_ids[code]
+
+    def distance(self, a, b):
+        hall_a, hall_b = self._check(a), self._check(b)
+        grid_a, grid_b = self.grids[hall_a], self.grids[hall_b]
+        if hall_a == hall_b:
+            return grid_a.distance(grid_a.access(a), grid_a.access(b))
+        return (grid_a.distance(grid_a.access(a), self.exits[hall_a]) + self.halls[hall_a][hall_b]
+                + grid_b.distance(self.exits[hall_b], grid_b.access(b)))
+
+    def distance_matrix(self, codes):
+        return [[0 if i == j else self.distance(a, b) for j, b in enumerate(codes)] for i, a in enumerate(codes)]
+
+    # stops: スペース番号の一覧（重複は1回にまとめる）、start: 最初にいる場所のスペース番号（任意）
+    # 戻り値: {"order", "distance"（px）, "legs"（区間ごとの距離）, "halls"（通るホールの順）, "unreachable"}
+    def plan(self, stops, start=None):
+        codes = list(dict.fromkeys(stops))
+        if start is not None and start not in codes:
+            codes.insert(0, start)
+        for code in codes:
+            self._check(code)
+        dist = self.distance_matrix(codes)
+        order = [codes[i] for i in solve_order(dist, None if start is None else codes.index(start))]
+        legs = [dist[codes.index(a)][codes.index(b)] for a, b in zip(order, order[1:])]
+        halls = [self.hall_ids[code] for code in order]
+        return {
+            "order": order,
+            "distance": sum(legs),
+            "legs": legs,
+            "halls": [h for i, h in enumerate(halls) if i == 0 or h != halls[i - 1]],
+            "unreachable": [code for code, leg in zip(order[1:], legs) if leg >= UNREACHABLE],
+        }
+
+
+# --- 複数人分をまとめて計画する（プロセスごとに RoutePlanner を1回だけ作る） ---
+
+_planner = None
+
+
+def _init_worker(place_map, options):
+    global _planner
+    _planner = RoutePlanner(place_map, **options)
+
+
+def _plan_one(request):
+    try:
+        return dict(_planner.plan(request["stops"], request.get("start")), user=request.get("user"))
+    except ValueError as e:
+        return {"user": request.get("user"), "error": str(e)}
+
+
+# requests: [{"user", "stops": [...], "start"}, ...]  戻り値は同じ順の計画（失敗したものは error）
+def plan_routes(place_map, requests, workers=None, **options):
+    if workers == 1 or len(requests) <= 1:
+        _init_worker(place_map, options)
+        return [_plan_one(request) for request in requests]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(place_map, options)) as executor:
+        return list(executor.map(_plan_one, requests, chunksize=max(1, len(requests) // 32)))
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="スペースを回る順番を決める（--bench で速度を測る）")
+    parser.add_argument("stops", nargs="*")
+    parser.add_argument("--place-map", default="../../client/src/assets/placeMap.json")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--bench", type=int, default=0, metavar="STOPS", help="ランダムな STOPS か所で測る")
+    parser.add_argument("--users", type=int, default=0, help="--bench と一緒に: この人数分をまとめて計画する")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.place_map, 'r', encoding='utf-8') as f:
+        place_map = json.load(f)
+
+    start = time.perf_counter()
+    planner = RoutePlanner(place_map)
+    print(f"{len(planner.hall_ids)} スペース / {len(planner.grids)} ホールの通路を作りました"
+          f"（{(time.perf_counter() - start) * 1000:.0f} ms）")
+
+    if args.bench:
+        rng = random.Random(0)
+        codes = sorted(planner.hall_ids)
+        stops = rng.sample(codes, args.bench)
+        start = time.perf_counter()
+        route = planner.plan(stops)
+        elapsed = time.perf_counter() - start
+        naive = sum(planner.distance(a, b) for a, b in zip(stops, stops[1:]))
+        print(f"{args.bench} か所: {elapsed * 1000:.0f} ms、距離 {route['distance']:.0f} px"
+              f"（入力順なら {naive:.0f} px）ホール {' → '.join(route['halls'])}")
+        if args.users:
+            requests = [{"user": i, "stops": rng.sample(codes, args.bench)} for i in range(args.users)]
+            start = time.perf_counter()
+            routes = plan_routes(place_map, requests, args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"{args.users} 人分: {elapsed:.2f} s（{elapsed / args.users * 1000:.0f} ms/人）")
+    elif args.stops:
+        route = planner.plan(args.stops, args.start)
+        print(" → ".join(route["order"]))
+        print(f"距離 {route['distance']:.0f} px、ホール {' → '.join(route['halls'])}")
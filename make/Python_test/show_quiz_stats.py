@@ -1,6 +1,17 @@
 import json
+import os
+
+from quiz_metrics import load_or_build
+from quiz_stats_store import QuizStatsStore
 
 def load_stats(file_path):
+    # quiz_stats.db（集計済み）があればそちらを読む
+    if file_path.endswith(".db"):
+        if not os.path.exists(file_path):
+            print(f"ファイル '{file_path}' が見つかりません。")
+            return {}
+        with QuizStatsStore(file_path, read_only=True) as store:
+            return store.stats()
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -18,8 +29,12 @@ def compute_metrics(stats):
         incorrect = data.get("incorrect", 0)
         total = correct + incorrect
         accuracy = (correct / total * 100) if total > 0 else 0
-        display_counts = data.get("display_counts", [])
-        avg_display = (sum(display_counts) / len(display_counts)) if display_counts else 0
+        if "display_n" in data:
+            display_n = data["display_n"]
+            avg_display = (data["display_sum"] / display_n) if display_n else 0
+        else:
+            display_counts = data.get("display_counts", [])
+            avg_display = (sum(display_counts) / len(display_counts)) if display_counts else 0
         computed.append({
             "song": song,
             "correct": correct,
@@ -151,13 +166,25 @@ def display_filtered_stats(filtered_stats):
         print(f"  正答率: {entry['accuracy']:.1f}%")
         print(f"  平均表示回数（正解時）: {entry['avg_display']:.2f}")
 
+# 対話なしで成績を取り出す（sort_key を省略すると元の順番のまま。limit が 0 / None ならすべて）
+def query_stats(stats_file, sort_key=None, ascending=False, limit=None, filters=None):
+    index = load_or_build(stats_file, load_stats, compute_metrics)
+    ids = index.filter_ids(filters or {})
+    if sort_key is None:
+        rows = index.rows if ids is None else [index.rows[i] for i in sorted(ids)]
+        return rows[:limit] if limit else rows
+    return index.top_n(sort_key, limit, ascending, ids)
+
 def main():
-    stats_file = "quiz_stats.json"
-    stats = load_stats(stats_file)
-    if not stats:
+    stats_file = "quiz_stats.db" if os.path.exists("quiz_stats.db") else "quiz_stats.json"
+    if not os.path.exists(stats_file):
+        print(f"ファイル '{stats_file}' が見つかりません。")
         return
 
-    computed_stats = compute_metrics(stats)
+    # 指標と索引は成績ファイルが変わったときだけ作り直す
+    index = load_or_build(stats_file, load_stats, compute_metrics)
+    if not index.rows:
+        return
 
     print("=== クイズ成績表示プログラム ===")
     print("1. ランキング表示（並び替え・件数指定）")
@@ -168,11 +195,11 @@ def main():
         sort_key = get_sort_key()
         ascending = get_sort_order()
         limit = get_display_limit()
-        sorted_stats = sorted(computed_stats, key=lambda x: x[sort_key], reverse=not ascending)
+        sorted_stats = index.top_n(sort_key, limit, ascending)
         display_stats(sorted_stats, limit)
     elif mode == "2":
         filters = get_filter_conditions()
-        filtered = filter_by_conditions(computed_stats, filters)
+        filtered = index.filter(filters)
         display_filtered_stats(filtered)
     else:
         print("無効な選択です。終了します。")
@@ -0,0 +1,173 @@
+import base64
+import json
+import os
+import random
+import re
+from array import array
+
+DEFAULT_INDEX_FILE = "song_index.json"
+INDEX_VERSION = 2
+
+# 1行（テキストモードの readlines() と同じく \r\n・\r・\n のどれでも区切る）
+LINE_PATTERN = re.compile(rb"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+
+
+# 1曲分のファイルから「空行でない行」の開始・終了バイト位置を集める
+def scan_valid_lines(path):
+    offsets = array('Q')
+    with open(path, 'rb') as f:
+        data = f.read()
+    for match in LINE_PATTERN.finditer(data):
+        if match.group().decode('utf-8').strip() != '':
+            offsets.append(match.start())
+            offsets.append(match.end())
+    return offsets
+
+
+# 行末の \r\n・\r を \n にそろえる（テキストモードで読んだ行と同じにする）
+def _universal_newline(line):
+    if line.endswith(("\r", "\n")):
+        return line.rstrip("\r\n") + "\n"
+    return line
+
+
+def _pack(offsets):
+    return base64.b64encode(offsets.tobytes()).decode('ascii')
+
+
+def _unpack(text):
+    offsets = array('Q')
+    offsets.frombytes(base64.b64decode(text))
+    return offsets
+
+
+# 歌詞フォルダの索引
+# 起動時に1回だけフォルダを走査し、更新日時・サイズが変わったファイルだけ読み直す
+# 曲の選択は O(1)、行の取り出しは索引の位置へ seek するだけ
+class SongCorpus:
+    def __init__(self, folder_path, index_file=DEFAULT_INDEX_FILE, extensions=(".txt",)):
+        self.folder_path = folder_path
+        self.index_file = index_file
+        self.extensions = extensions
+        self.songs = {}
+        self.unreadable = {}  # 読めなかったファイル -> {mtime_ns, size}（変わるまで読み直さない）
+        self.paths = []
+        self._load_index()
+        self.refresh()
+
+    def _load_index(self):
+        if not self.index_file or not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"索引 '{self.index_file}' が壊れているため作り直します。")
+            return
+        if data.get("version") != INDEX_VERSION or data.get("folder") != os.path.abspath(self.folder_path):
+            return
+        for name, entry in data["songs"].items():
+            entry["offsets"] = _unpack(entry["offsets"])
+            self.songs[name] = entry
+        self.unreadable = data.get("unreadable", {})
+
+    def save(self):
+        if not self.index_file:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "folder": os.path.abspath(self.folder_path),
+            "songs": {name: dict(entry, offsets=_pack(entry["offsets"])) for name, entry in self.songs.items()},
+            "unreadable": self.unreadable,
+        }
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    # フォルダと索引の差分だけを反映する（戻り値: 読み直した曲数, 削除した曲数）
+    def refresh(self):
+        seen = set()
+        updated = 0
+        dirty = False
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if self.extensions and not entry.name.endswith(self.extensions):
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                known = self.songs.get(entry.name) or self.unreadable.get(entry.name)
+                if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                    continue
+                dirty = True
+                try:
+                    offsets = scan_valid_lines(entry.path)
+                except (UnicodeDecodeError, OSError) as e:
+                    print(f"{entry.name} を読み込めませんでした: {e}")
+                    self.songs.pop(entry.name, None)
+                    self.unreadable[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+                    continue
+                self.unreadable.pop(entry.name, None)
+                self.songs[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "offsets": offsets}
+                updated += 1
+
+        removed = [name for name in self.songs if name not in seen]
+        for name in removed:
+            del self.songs[name]
+        for name in [name for name in self.unreadable if name not in seen]:
+            del self.unreadable[name]
+            dirty = True
+
+        self.paths = [os.path.join(self.folder_path, name) for name in sorted(self.songs)]
+        if dirty or removed:
+            self.save()
+        return updated, len(removed)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def pick_random(self):
+        if not self.paths:
+            print("テキストファイルが見つかりません。")
+            return None
+        return random.choice(self.paths)
+
+    def line_count(self, file_path):
+        return len(self.songs[os.path.basename(file_path)]["offsets"]) // 2
+
+    # 有効行（空行を除いた行）の start〜end-1 番目を返す（readlines() と同じく改行付き）
+    def read_lines(self, file_path, start, end):
+        offsets = self.songs[os.path.basename(file_path)]["offsets"]
+        if start >= end:
+            return []
+        first = offsets[2 * start]
+        last = offsets[2 * (end - 1) + 1]
+        with open(file_path, 'rb') as f:
+            f.seek(first)
+            chunk = f.read(last - first)
+        return [
+            _universal_newline(chunk[offsets[2 * i] - first:offsets[2 * i + 1] - first].decode('utf-8'))
+            for i in range(start, end)
+        ]
+
+    def valid_lines(self, file_path):
+        return self.read_lines(file_path, 0, self.line_count(file_path))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    folder_path = sys.argv[1] if len(sys.argv) > 1 else r"C:\2002248\memo\song"
+    start = time.perf_counter()
+    corpus = SongCorpus(folder_path)
+    print(f"{len(corpus)} 曲の索引を読み込みました（{(time.perf_counter() - start) * 1000:.1f} ms）")
+
+    file_path = corpus.pick_random()
+    if file_path:
+        count = corpus.line_count(file_path)
+        print(f"{os.path.basename(file_path)}: 有効行数 {count}")
+        for line in corpus.read_lines(file_path, 0, min(3, count)):
+            print(line.strip())
@@ -0,0 +1,128 @@
+import random
+from collections import deque
+
+from quiz_sampler import FenwickTree
+
+# 成績（quiz_stats_store の曲ごとの集計）に応じて、苦手な曲ほど出やすくする曲の選択
+#   重み = 下限 + 不正解率 + 表示回数の多さ（正解までに何回表示が必要だったか）
+#   まだ出題していない曲は不正解率 0.5・表示回数は中間とみなす
+#   出題した曲は cooldown 回のあいだ重み 0 にし、その後で最新の成績から重みを付け直す（同じ曲がすぐには出ない）
+# 重みは整数にして FenwickTree に持つので、引く・重みを変えるはどちらも O(log n)（10 万曲でも数十 µs）
+SCALE = 1000
+MIN_WEIGHT = 0.2
+DISPLAY_WEIGHT = 0.5
+MAX_TIMES = 3
+DEFAULT_COOLDOWN = 5
+
+
+# stat: {"correct", "incorrect", "display_sum", "display_n"}（なければ未出題）
+def song_weight(stat=None, max_times=MAX_TIMES):
+    correct = stat.get("correct", 0) if stat else 0
+    incorrect = stat.get("incorrect", 0) if stat else 0
+    display_n = stat.get("display_n", 0) if stat else 0
+    # 回数が少ないうちは 0.5 に寄せる（1回まちがえただけで極端な重みにしない）
+    miss_rate = (incorrect + 1) / (correct + incorrect + 2)
+    if display_n:
+        need = (stat["display_sum"] / display_n - 1) / max(max_times - 1, 1)
+    else:
+        need = 0.5
+    return MIN_WEIGHT + miss_rate + DISPLAY_WEIGHT * min(max(need, 0.0), 1.0)
+
+
+class SongSelector:
+    def __init__(self, titles, stats=None, rng=random, cooldown=DEFAULT_COOLDOWN, max_times=MAX_TIMES):
+        self.titles = list(titles)
+        self.index = {title: i for i, title in enumerate(self.titles)}
+        self.stats = {title: dict(stats[title]) for title in self.titles if stats and title in stats}
+        self.rng = rng
+        self.cooldown = cooldown
+        self.max_times = max_times
+        self.weights = [self._scaled(title) for title in self.titles]
+        self.tree = FenwickTree.from_weights(self.weights)
+        self.cooling = deque()  # (戻す時点の draws, 曲名)
+        self.draws = 0
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _scaled(self, title):
+        return max(1, round(song_weight(self.stats.get(title), self.max_times) * SCALE))
+
+    def _set(self, i, weight):
+        if weight != self.weights[i]:
+            self.tree.add(i, weight - self.weights[i])
+            self.weights[i] = weight
+
+    def _restore(self, title):
+        self._set(self.index[title], self._scaled(title))
+
+    def draw(self):
+        if not self.titles:
+            return None
+        while self.cooling and (self.cooling[0][0] <= self.draws or self.tree.total == 0):
+            self._restore(self.cooling.popleft()[1])
+        i, _ = self.tree.find(self.rng.randrange(self.tree.total))
+        title = self.titles[i]
+        self.draws += 1
+        if self.cooldown:
+            self._set(i, 0)
+            self.cooling.append((self.draws + self.cooldown, title))
+        return title
+
+    # 回答の結果を反映する（quiz_stats_store.record と同じ数え方: 表示回数は正解時のみ）
+    def update(self, title, correct, display_count=0):
+        if title not in self.index:
+            return
+        stat = self.stats.setdefault(title, {"correct": 0, "incorrect": 0, "display_sum": 0, "display_n": 0})
+        if correct:
+            stat["correct"] += 1
+            stat["display_sum"] += display_count
+            stat["display_n"] += 1
+        else:
+            stat["incorrect"] += 1
+        # 休み中の曲は戻すときに付け直す
+        if self.weights[self.index[title]]:
+            self._restore(title)
+
+    # 次に引かれる確率（休み中の曲は 0）
+    def probability(self, title):
+        return self.weights[self.index[title]] / self.tree.total if self.tree.total else 0.0
+
+    def ranking(self, limit=20):
+        order = sorted(range(len(self.titles)), key=lambda i: -self.weights[i])[:limit]
+        return [(self.titles[i], self.weights[i] / self.tree.total) for i in order]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="成績に応じた曲の出やすさを表示する（--bench で速度を測る）")
+    parser.add_argument("--db", default="quiz_stats.db")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--bench", type=int, default=0, metavar="SONGS", help="合成した SONGS 曲で引く・更新するを測る")
+    args = parser.parse_args()
+
+    if args.bench:
+        rng = random.Random(0)
+        titles = [f"曲{i:06d}" for i in range(args.bench)]
+        stats = {t: {"correct": rng.randint(0, 5), "incorrect": rng.randint(0, 5), "display_sum": rng.randint(1, 15),
+                     "display_n": 5} for t in titles[::2]}
+        start = time.perf_counter()
+        selector = SongSelector(titles, stats, rng)
+        built = time.perf_counter() - start
+        n = 100_000
+        start = time.perf_counter()
+        for _ in range(n):
+            selector.update(selector.draw(), rng.random() < 0.5, rng.randint(1, 3))
+        per_op = (time.perf_counter() - start) / n * 1e6
+        print(f"{args.bench} 曲: 作成 {built * 1000:.1f} ms、引いて更新 {per_op:.1f} µs/回")
+    else:
+        from quiz_stats_store import open_store
+
+        with open_store(args.db) as store:
+            stats = store.stats()
+        selector = SongSelector(stats, stats, cooldown=0)
+        for title, p in selector.ranking(args.limit):
+            stat = stats[title]
+            print(f"{p * 100:6.2f}%  {title}  正解 {stat['correct']} / 不正解 {stat['incorrect']}")
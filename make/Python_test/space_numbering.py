@@ -0,0 +1,132 @@
+import json
+
+# 並び順の方向: 名前 -> (軸, 符号)
+DIRECTIONS = {
+    "left_to_right": ("x", 1),
+    "right_to_left": ("x", -1),
+    "top_to_bottom": ("y", 1),
+    "bottom_to_top": ("y", -1),
+}
+
+# レイアウト仕様の既定値
+#   prefix:     スペース番号の頭文字（例: "ア", "ス", "a"）
+#   start:      最初の番号
+#   digits:     番号のゼロ埋め桁数
+#   order:      "<列/行の並び>_<列/行の中の並び>"（例: "right_to_left_bottom_to_top"）
+#   serpentine: True なら列/行ごとに中の並びを折り返す（U字・蛇行）
+#   skip:       使わない番号のリスト（欠番）
+#   exclude:    並べた順番（0始まり）で除外するセルの位置（柱・通路など）
+#   tolerance:  同じ列/行とみなす座標のずれ（px）。None ならセルの大きさの半分（最大 1px）
+DEFAULT_SPEC = {
+    "prefix": "",
+    "start": 1,
+    "digits": 2,
+    "order": "top_to_bottom_left_to_right",
+    "serpentine": False,
+    "skip": [],
+    "exclude": [],
+    "tolerance": None,
+}
+
+SIZE_KEYS = {"x": "width", "y": "height"}
+
+
+def parse_order(order):
+    for major_name, major in DIRECTIONS.items():
+        if order.startswith(major_name + "_"):
+            minor = DIRECTIONS.get(order[len(major_name) + 1:])
+            if minor and minor[0] != major[0]:
+                return major, minor
+    raise ValueError(f"Invalid sort order: {order}")
+
+
+def _items(blocks):
+    if isinstance(blocks, dict):
+        return list(blocks.items())
+    # block_geometry.divide_blocks の構造化配列もそのまま受け取る
+    names = getattr(getattr(blocks, "dtype", None), "names", None)
+    if names:
+        xs, ys = blocks["x"].tolist(), blocks["y"].tolist()
+        ws, hs = blocks["width"].tolist(), blocks["height"].tolist()
+        return [
+            (i, {"x": x, "y": y, "width": w, "height": h})
+            for i, (x, y, w, h) in enumerate(zip(xs, ys, ws, hs))
+        ]
+    return list(blocks)
+
+
+# ブロックを仕様どおりの順番に並べる（ソート1回 + 線形走査で O(n log n)）
+def order_blocks(blocks, spec):
+    spec = dict(DEFAULT_SPEC, **spec)
+    (major_axis, major_sign), (minor_axis, minor_sign) = parse_order(spec["order"])
+    items = _items(blocks)
+    tolerance = spec["tolerance"]
+    if tolerance is None:
+        size_key = SIZE_KEYS[major_axis]
+        tolerance = min([1.0] + [v[size_key] / 2 for _, v in items])
+
+    keyed = sorted(
+        ((major_sign * v[major_axis], minor_sign * v[minor_axis], k, v) for k, v in items),
+        key=lambda t: (t[0], t[1])
+    )
+
+    # 同じ列（行）に属するものに同じ line 番号を振る
+    lines = []
+    line = -1
+    line_start = None
+    for major, minor, k, v in keyed:
+        if line_start is None or major - line_start > tolerance:
+            line += 1
+            line_start = major
+        flip = -1 if spec["serpentine"] and line % 2 == 1 else 1
+        lines.append((line, flip * minor, k, v))
+
+    lines.sort(key=lambda t: (t[0], t[1]))
+    return [(k, v) for _, _, k, v in lines]
+
+
+# ブロックに仕様どおりのスペース番号を振って ("ス20", rect), ... を番号順に1件ずつ返す
+def iter_numbered(blocks, spec):
+    spec = dict(DEFAULT_SPEC, **spec)
+    exclude = set(spec["exclude"])
+    skip = set(spec["skip"])
+    prefix, digits = spec["prefix"], spec["digits"]
+
+    number = spec["start"]
+    for position, (_, v) in enumerate(order_blocks(blocks, spec)):
+        if position in exclude:
+            continue
+        while number in skip:
+            number += 1
+        yield f"{prefix}{str(number).zfill(digits)}", v
+        number += 1
+
+
+# ブロックに仕様どおりのスペース番号を振って {"ス20": rect, ...} を返す
+def number_blocks(blocks, spec):
+    return dict(iter_numbered(blocks, spec))
+
+
+# 複数の島（ブロック群と仕様の組）をまとめて番号付けし、1つの dict にする
+def number_many(jobs):
+    merged = {}
+    for blocks, spec in jobs:
+        for name, rect in number_blocks(blocks, spec).items():
+            if name in merged:
+                raise ValueError(f"Duplicate space id: {name}")
+            merged[name] = rect
+    return merged
+
+
+if __name__ == "__main__":
+    from block_geometry import divide_block
+
+    # sorted_sub_block_coordinates.sort_blocks と同じ番号付け（右列を下から上、左列を上から下）
+    spec = {
+        "prefix": "ス",
+        "start": 20,
+        "order": "right_to_left_bottom_to_top",
+        "serpentine": True,
+    }
+    sub_blocks = divide_block(1413, 125, 37, 91, 5, 2)
+    print(json.dumps(number_blocks(sub_blocks, spec), indent=4, ensure_ascii=False))
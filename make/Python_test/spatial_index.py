@@ -0,0 +1,207 @@
+import json
+import math
+import random
+import statistics
+import time
+
+from place_map_shards import split_by_hall
+
+
+# スペース座標の一様グリッド索引
+# 各セルにそのセルと重なるスペースの番号を持たせ、点・矩形・最近傍の問い合わせをセル単位で行う
+class SpaceGrid:
+    def __init__(self, place_map, cell_size=None):
+        self.codes = list(place_map)
+        self.rects = [(r["x"], r["y"], r["width"], r["height"]) for r in place_map.values()]
+        if not self.rects:
+            raise ValueError("place_map is empty")
+
+        if cell_size is None:
+            # スペース1つの大きさ程度のセルにすると、1セルあたりの候補が数個になる
+            cell_size = max(1.0, 2 * statistics.median(max(w, h) for _, _, w, h in self.rects))
+        self.cell_size = cell_size
+        self.origin_x = min(x for x, _, _, _ in self.rects)
+        self.origin_y = min(y for _, y, _, _ in self.rects)
+        self.cols = int((max(x + w for x, _, w, _ in self.rects) - self.origin_x) // cell_size) + 1
+        self.rows = int((max(y + h for _, y, _, h in self.rects) - self.origin_y) // cell_size) + 1
+
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        for i, rect in enumerate(self.rects):
+            for cell in self._cells_for(*rect):
+                self.cells[cell].append(i)
+
+    def _col(self, x):
+        return min(max(int((x - self.origin_x) // self.cell_size), 0), self.cols - 1)
+
+    def _row(self, y):
+        return min(max(int((y - self.origin_y) // self.cell_size), 0), self.rows - 1)
+
+    def _cells_for(self, x, y, w, h):
+        c0, c1 = self._col(x), self._col(x + w)
+        r0, r1 = self._row(y), self._row(y + h)
+        return [r * self.cols + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    # 座標 (x, y) にあるスペース番号（なければ None）
+    def hit_test(self, x, y):
+        col = int((x - self.origin_x) // self.cell_size)
+        row = int((y - self.origin_y) // self.cell_size)
+        if not (0 <= col < self.cols and 0 <= row < self.rows):
+            return None
+        for i in self.cells[row * self.cols + col]:
+            rx, ry, rw, rh = self.rects[i]
+            if rx <= x <= rx + rw and ry <= y <= ry + rh:
+                return self.codes[i]
+        return None
+
+    # 表示範囲（矩形）と重なるスペース番号の一覧
+    def query(self, x, y, width, height):
+        found = set()
+        result = []
+        for cell in self._cells_for(x, y, width, height):
+            for i in self.cells[cell]:
+                if i in found:
+                    continue
+                rx, ry, rw, rh = self.rects[i]
+                if rx <= x + width and x <= rx + rw and ry <= y + height and y <= ry + rh:
+                    found.add(i)
+                    result.append(self.codes[i])
+        return result
+
+    # 座標 (x, y) から最も近いスペース番号と距離（スペースの枠までの距離。中なら 0）
+    def nearest(self, x, y):
+        col = int((x - self.origin_x) // self.cell_size)
+        row = int((y - self.origin_y) // self.cell_size)
+        best, best_dist = None, math.inf
+        # 点がグリッドの外なら、グリッドに届く輪から始めてグリッドの端で終える（空の輪は回らない）
+        first_ring = max(0, -col, col - (self.cols - 1), -row, row - (self.rows - 1))
+        last_ring = max(col, self.cols - 1 - col, row, self.rows - 1 - row)
+
+        # 近いセルから輪状に広げ、残りのセルが今の最短距離より遠くなったら打ち切る
+        for ring in range(first_ring, last_ring + 1):
+            if (ring - 1) * self.cell_size > best_dist:
+                break
+            for r in range(max(row - ring, 0), min(row + ring, self.rows - 1) + 1):
+                if r in (row - ring, row + ring):
+                    cols = range(max(col - ring, 0), min(col + ring, self.cols - 1) + 1)
+                else:
+                    cols = [c for c in {col - ring, col + ring} if 0 <= c < self.cols]
+                for c in cols:
+                    for i in self.cells[r * self.cols + c]:
+                        rx, ry, rw, rh = self.rects[i]
+                        dx = max(rx - x, 0, x - (rx + rw))
+                        dy = max(ry - y, 0, y - (ry + rh))
+                        dist = math.hypot(dx, dy)
+                        if dist < best_dist:
+                            best, best_dist = self.codes[i], dist
+        return best, best_dist
+
+    # JSON と一緒に配布できる形（セルは CSR 形式: cell_start[k]〜cell_start[k+1] が cell_items の範囲）
+    def to_dict(self):
+        cell_start = [0]
+        cell_items = []
+        for items in self.cells:
+            cell_items.extend(items)
+            cell_start.append(len(cell_items))
+        return {
+            "cell_size": self.cell_size,
+            "origin": [self.origin_x, self.origin_y],
+            "cols": self.cols,
+            "rows": self.rows,
+            "codes": self.codes,
+            "rects": [list(r) for r in self.rects],
+            "cell_start": cell_start,
+            "cell_items": cell_items,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        grid = cls.__new__(cls)
+        grid.cell_size = data["cell_size"]
+        grid.origin_x, grid.origin_y = data["origin"]
+        grid.cols, grid.rows = data["cols"], data["rows"]
+        grid.codes = data["codes"]
+        grid.rects = [tuple(r) for r in data["rects"]]
+        start, items = data["cell_start"], data["cell_items"]
+        grid.cells = [items[start[k]:start[k + 1]] for k in range(len(start) - 1)]
+        return grid
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# ホールごとの SpaceGrid（ホールごとに元の画像の座標系が違うので、1つのグリッドにまとめると別のホールのスペースが当たる）
+# 問い合わせにはホール（place_map_shards.HALLS の id）を渡す
+class HallGrids:
+    def __init__(self, place_map, cell_size=None):
+        self.grids = {hall_id: SpaceGrid(codes, cell_size) for hall_id, (_, codes) in split_by_hall(place_map).items()}
+
+    def __getitem__(self, hall_id):
+        return self.grids[hall_id]
+
+    def __contains__(self, hall_id):
+        return hall_id in self.grids
+
+    def __len__(self):
+        return sum(len(grid.codes) for grid in self.grids.values())
+
+    def hit_test(self, hall_id, x, y):
+        return self.grids[hall_id].hit_test(x, y)
+
+    def query(self, hall_id, x, y, width, height):
+        return self.grids[hall_id].query(x, y, width, height)
+
+    def nearest(self, hall_id, x, y):
+        return self.grids[hall_id].nearest(x, y)
+
+    def to_dict(self):
+        return {hall_id: grid.to_dict() for hall_id, grid in self.grids.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        grids = cls.__new__(cls)
+        grids.grids = {hall_id: SpaceGrid.from_dict(grid) for hall_id, grid in data.items()}
+        return grids
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    with open("../../client/src/assets/placeMap.json", 'r', encoding='utf-8') as f:
+        place_map = json.load(f)
+
+    start = time.perf_counter()
+    grids = HallGrids(place_map)
+    print(f"索引作成: {len(grids)} スペース / {len(grids.grids)} ホール, {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for hall_id, grid in grids.grids.items():
+        width = grid.cols * grid.cell_size
+        height = grid.rows * grid.cell_size
+        points = [(grid.origin_x + random.random() * width, grid.origin_y + random.random() * height)
+                  for _ in range(10000)]
+
+        for label, func in [
+            ("hit_test", lambda p: grid.hit_test(*p)),
+            ("query (300x200)", lambda p: grid.query(p[0], p[1], 300, 200)),
+            ("nearest", lambda p: grid.nearest(*p)),
+        ]:
+            start = time.perf_counter()
+            for p in points:
+                func(p)
+            elapsed = (time.perf_counter() - start) / len(points)
+            print(f"{hall_id} {label}: {elapsed * 1e6:.1f} µs / 回")
+
+    grids.save("placeMap.grid.json")
+    print("placeMap.grid.json に保存しました。")
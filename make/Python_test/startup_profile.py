@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import time
+
+# コマンドの起動時間を測る（python -X importtime で別プロセスとして実行し、import ごとの時間を集計する）
+HEAVY_MODULES = ("cv2", "numpy", "PIL")
+DEFAULT_BUDGET_MS = 50.0
+ENTRY_POINT = os.path.dirname(os.path.abspath(__file__))
+
+
+# -X importtime の出力（"import time: self [us] | cumulative | imported package"）を読む
+# 戻り値: [(モジュール名, 自身の時間 us, 累積 us, 入れ子の深さ), ...]
+def parse_importtime(stderr):
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def _run(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return (time.perf_counter() - start) * 1000, proc.returncode, proc.stderr
+
+
+# argv のコマンドを別プロセスで実行して起動プロファイルを返す
+# wall_ms は Python 自体の起動も含む実時間、baseline_ms は何も import しない Python の起動時間
+def profile_startup(argv, top=15):
+    env = dict(os.environ)
+    baseline_ms, _, _ = _run(["-c", "pass"], env)
+    wall_ms, returncode, stderr = _run([ENTRY_POINT, *argv], env)
+
+    entries = parse_importtime(stderr)
+    loaded = {name for name, _, _, _ in entries}
+    top_level = sorted((e for e in entries if e[3] == 0), key=lambda e: e[2], reverse=True)
+    return {
+        "argv": list(argv),
+        "returncode": returncode,
+        "wall_ms": wall_ms,
+        "baseline_ms": baseline_ms,
+        "import_ms": sum(e[2] for e in entries if e[3] == 0) / 1000,
+        "heavy_modules": [m for m in HEAVY_MODULES if m in loaded],
+        "top_imports": [{"module": name, "cumulative_ms": cum / 1000} for name, _, cum, _ in top_level[:top]],
+    }
+
+
+def format_report(report, budget_ms=DEFAULT_BUDGET_MS):
+    overhead_ms = report["wall_ms"] - report["baseline_ms"]
+    lines = [
+        f"起動プロファイル: {' '.join(report['argv'])}",
+        f"  実時間: {report['wall_ms']:.1f} ms（Python 起動のみ: {report['baseline_ms']:.1f} ms、"
+        f"差分: {overhead_ms:.1f} ms / 目標 {budget_ms:.0f} ms {'OK' if overhead_ms <= budget_ms else '超過'}）",
+        f"  import 合計: {report['import_ms']:.1f} ms",
+        f"  画像系ライブラリ: {', '.join(report['heavy_modules']) or 'なし'}",
+        "  import の内訳（累積）:",
+    ]
+    lines += [f"    {item['cumulative_ms']:8.1f} ms  {item['module']}" for item in report["top_imports"]]
+    return "\n".join(lines)
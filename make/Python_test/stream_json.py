@@ -0,0 +1,208 @@
+import contextlib
+import json
+import os
+
+# (space_id, rect) の並びを1件ずつファイルに書き出す / 読み込む
+# 形式:
+#   pretty   従来の json.dump(..., indent=4) と同じバイト列の JSON オブジェクト
+#   compact  区切りの空白なしの JSON オブジェクト（json.dump(..., separators=(",", ":")) と同じ）
+#   ndjson   1行1スペースの {"id": ..., "x": ..., ...}
+# 全体の dict を作らないので、ピークメモリは1件分＋重複確認用の id の集合だけで済む
+FORMATS = ("pretty", "compact", "ndjson")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+CHUNK_SIZE = 1 << 16
+
+
+def format_for(path):
+    return "ndjson" if path.lower().endswith(NDJSON_EXTENSIONS) else "compact"
+
+
+def _items(pairs):
+    return pairs.items() if isinstance(pairs, dict) else pairs
+
+
+# json.dump と同じくキー（space_id）を文字列にする（int / float / bool / None は文字列に直し、それ以外は TypeError）
+def _key(space_id):
+    if isinstance(space_id, str):
+        return space_id
+    if space_id is None or isinstance(space_id, (bool, float)):
+        return json.dumps(space_id)
+    if isinstance(space_id, int):
+        return int.__repr__(space_id)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(space_id).__name__}")
+
+
+# 有限の float / int は json と同じく repr（JSONEncoder.encode は数値1つでも毎回エンコーダを作るので避ける）
+def _scalar(value, encode):
+    if type(value) is float and value - value == 0:
+        return float.__repr__(value)
+    if type(value) is int:
+        return int.__repr__(value)
+    return encode(value)
+
+
+# indent=4 の dict の2段目の値を書く
+# 座標のような「文字列キー → スカラー」だけの dict は、インデント付きエンコーダ（pure Python）を通さずに組み立てる
+def _pretty_value(rect, encode_scalar, encode_indented):
+    if rect and isinstance(rect, dict) and all(
+            isinstance(k, str) and not isinstance(v, (dict, list, tuple)) for k, v in rect.items()):
+        body = ",\n        ".join(f"{encode_scalar(k)}: {_scalar(v, encode_scalar)}" for k, v in rect.items())
+        return "{\n        " + body + "\n    }"
+    return encode_indented(rect).replace("\n", "\n    ")
+
+
+# pairs: (space_id, rect) の iterable または dict。戻り値は書いた件数
+# unique=True なら同じ id が2回出てきた時点で ValueError（書きかけのファイルは残さない）
+def write_stream(pairs, path, fmt=None, unique=True, ensure_ascii=False):
+    fmt = fmt or format_for(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid output format: {fmt}")
+
+    # json.dumps は呼ぶたびにエンコーダを作るので、1回だけ作って使い回す
+    encode_key = json.JSONEncoder(ensure_ascii=ensure_ascii).encode
+    if fmt == "pretty":
+        encode_value = json.JSONEncoder(ensure_ascii=ensure_ascii, indent=4).encode
+    else:
+        encode_value = json.JSONEncoder(ensure_ascii=ensure_ascii, separators=(",", ":")).encode
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    seen = set()
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if fmt != "ndjson":
+                f.write("{")
+            for space_id, rect in _items(pairs):
+                space_id = _key(space_id)
+                if unique:
+                    if space_id in seen:
+                        raise ValueError(f"Duplicate space id: {space_id}")
+                    seen.add(space_id)
+                if fmt == "ndjson":
+                    f.write(encode_value(dict({"id": space_id}, **rect)) + "\n")
+                elif fmt == "compact":
+                    f.write(f"{',' if count else ''}{encode_key(space_id)}:{encode_value(rect)}")
+                else:
+                    f.write(f"{',' if count else ''}\n    {encode_key(space_id)}: {_pretty_value(rect, encode_key, encode_value)}")
+                count += 1
+            if fmt == "pretty" and count:
+                f.write("\n")
+            if fmt != "ndjson":
+                f.write("}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def _iter_ndjson(f):
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        try:
+            space_id = record.pop("id")
+        except KeyError:
+            raise ValueError(f"line {line_number}: 'id' がありません")
+        yield space_id, record
+
+
+# JSON オブジェクトのトップレベルのキーと値を、ファイル全体を読まずに順に取り出す
+def _iter_object(f, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            found = buffer[pos] if pos < len(buffer) else "EOF"
+            raise ValueError(f"'{chars}' が必要な位置に {found!r} があります")
+        pos += 1
+        return buffer[pos - 1]
+
+    def decode():
+        nonlocal pos
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # 値の途中でバッファが切れている場合は読み足してやり直す
+                if eof:
+                    raise
+                fill()
+                continue
+            # 数値はバッファの終わりで切れても decode できてしまうので、末尾に達していたら読み足す
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            pos = end
+            return value
+
+    fill()
+    expect("{")
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == "}":
+        return
+    while True:
+        key = decode()
+        if not isinstance(key, str):
+            raise ValueError(f"キーが文字列ではありません: {key!r}")
+        expect(":")
+        yield key, decode()
+        if expect(",}") == "}":
+            return
+
+
+# write_stream で書いたファイル（どの形式でも）から (space_id, rect) を1件ずつ返す
+def iter_stream(path, fmt=None):
+    fmt = fmt or format_for(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if fmt == "ndjson":
+            yield from _iter_ndjson(f)
+        else:
+            yield from _iter_object(f)
+
+
+# 複数のシャードを1件ずつ読みながら1つのファイルにまとめる（同じ id があれば ValueError）
+def merge_streams(paths, output, fmt=None):
+    def pairs():
+        for path in paths:
+            yield from iter_stream(path)
+    return write_stream(pairs(), output, fmt)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="placeMap 形式のファイルを1件ずつ読みながら変換・結合する")
+    parser.add_argument("inputs", nargs="+", help="入力ファイル（.ndjson / .jsonl は NDJSON、それ以外は JSON）")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--format", choices=FORMATS, default=None, help="省略時は出力先の拡張子で決める")
+    args = parser.parse_args()
+
+    count = merge_streams(args.inputs, args.output, args.format)
+    print(f"{count} スペースを {args.output} に保存しました。")
@@ -0,0 +1,61 @@
+import random
+
+from answer_matcher import MAX_DISTANCE, AnswerMatcher, bounded_distance
+
+# python -m pytest make/Python_test/test_answer_matcher.py
+
+
+def _levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def test_bounded_distance_matches_levenshtein():
+    words = ["", "a", "ab", "abc", "acb", "abcd", "bcda", "aabbcc", "abcabc"]
+    for a in words:
+        for b in words:
+            for bound in range(4):
+                d = _levenshtein(a, b)
+                assert bounded_distance(a, b, bound) == (d if d <= bound else None)
+
+
+# 2つの曲名から同じ距離にある答えは、どちらの曲名に対しても close にしない（曲名どうしは距離 2）
+def test_tie_with_title_two_edits_away_is_wrong():
+    matcher = AnswerMatcher(["abcdefgh", "abcdefxy"], readings=False)
+    assert matcher.grade("abcdefgy", "abcdefgh") == ("wrong", None)
+    assert matcher.grade("abcdefgy", "abcdefxy") == ("wrong", None)
+    assert matcher.grade("abcdefgz", "abcdefgh") == ("close", 1)
+    assert matcher.confusables("abcdefgh") == ("abcdefxy",)
+
+
+# 許す距離は答えではなく曲名の長さで決まる（2文字の曲名は完全に一致したときだけ）
+def test_bound_follows_title_length():
+    matcher = AnswerMatcher(["夜空", "アイネクライネ"], readings=False)
+    assert matcher.grade("夜空の", "夜空") == ("wrong", None)
+    assert matcher.grade("よぞら", "夜空") == ("wrong", None)
+    assert matcher.grade("アイネクライ", "アイネクライネ") == ("close", 1)
+
+
+def test_levels():
+    matcher = AnswerMatcher(["Lemon", "Melon", "ハナミズキ"], {"ハナミズキ": ["はなみずき"]}, readings=False)
+    assert matcher.grade("lemon", "Lemon") == ("perfect", 0)
+    assert matcher.grade("ﾊﾅﾐｽﾞｷ", "ハナミズキ") == ("partial", 0)
+    assert matcher.grade("Lemn", "Lemon") == ("close", 1)
+    assert matcher.grade("Melon", "Lemon") == ("wrong", None)
+
+
+# 区間の表で引いた候補に、編集距離 MAX_DISTANCE 以内の曲名がすべて入っている
+def test_neighbours_find_every_title_within_distance():
+    rng = random.Random(0)
+    titles = sorted({"".join(rng.choice("abc") for _ in range(rng.randint(1, 9))) for _ in range(300)})
+    matcher = AnswerMatcher(titles, readings=False)
+    for _ in range(100):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(1, 11)))
+        for bound in range(MAX_DISTANCE + 1):
+            expected = {title for title in titles if _levenshtein(text, title) <= bound}
+            assert expected <= matcher._neighbours(text, bound)
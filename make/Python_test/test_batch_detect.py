@@ -0,0 +1,41 @@
+import pytest
+
+from batch_detect import collect_images, detect_batch
+
+# python -m pytest make/Python_test/test_batch_detect.py
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+
+# 白地に黒いブロック（block_size と同じく暗い部分をブロックとして検出する）
+def _write_image(path, rects):
+    image = np.full((60, 80, 3), 255, dtype=np.uint8)
+    for x, y, w, h in rects:
+        image[y:y + h, x:x + w] = 0
+    cv2.imwrite(str(path), image)
+
+
+def test_collect_images_filters_extensions(tmp_path):
+    for name in ("b.png", "a.jpg", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    assert collect_images(str(tmp_path)) == [str(tmp_path / "a.jpg"), str(tmp_path / "b.png")]
+    assert collect_images(str(tmp_path / "*.png")) == [str(tmp_path / "b.png")]
+
+
+# 2回目は内容とパラメータが同じ画像をデコードせずにキャッシュから返し、変わった画像だけ検出し直す
+def test_detect_batch_uses_cache(tmp_path):
+    _write_image(tmp_path / "one.png", [(5, 5, 20, 10)])
+    _write_image(tmp_path / "two.png", [(5, 5, 20, 10), (40, 30, 15, 15)])
+    cache_file = str(tmp_path / "cache.json")
+
+    first = detect_batch(str(tmp_path), workers=1, cache_file=cache_file)
+    assert [len(r["blocks"]) for r in first] == [1, 2]
+    assert not any(r["cached"] for r in first)
+    assert first[0]["blocks"] == [{"x": 5, "y": 5, "width": 20, "height": 10}]
+
+    _write_image(tmp_path / "two.png", [(40, 30, 15, 15)])
+    second = detect_batch(str(tmp_path), workers=1, cache_file=cache_file)
+    assert [r["cached"] for r in second] == [True, False]
+    assert [len(r["blocks"]) for r in second] == [1, 1]
+    assert detect_batch(str(tmp_path), min_size=12, workers=1, cache_file=cache_file)[0]["cached"] is False
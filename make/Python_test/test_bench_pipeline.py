@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("numpy")
+
+from bench_pipeline import build_stages, compare, divide_each, divide_vectorized, make_venue, run_suite
+from block_detection import detect_blocks
+
+# python -m pytest make/Python_test/test_bench_pipeline.py
+
+
+# 合成マップはちょうど n スペースで、検出で親ブロックがすべて見つかる
+@pytest.mark.parametrize("spaces", [1, 7, 1000])
+def test_make_venue(spaces):
+    parents, vertical, horizontal, image = make_venue(spaces)
+    assert sum(v * h for v, h in zip(vertical, horizontal)) == spaces
+    found = {(b["x"], b["y"], b["width"] - 1, b["height"] - 1) for b in detect_blocks(image)[0]}
+    assert found == set(parents)
+    assert divide_each(parents, vertical, horizontal) == divide_vectorized(parents, vertical, horizontal)
+
+
+def test_stages_run_on_a_small_map(capsys):
+    stages, info = build_stages(200)
+    assert len(stages["sort_blocks"]()) == 200
+    results = run_suite([200], stages=["divide_blocks", "json_minified"], repeat=1)
+    assert set(results["200"]) == {"divide_blocks", "json_minified"}
+    assert all(r["time_ms"] > 0 for r in results["200"].values())
+
+
+# 比率を超えても差が小さければ合格（短いステージで結果がぶれないように）
+def test_compare_thresholds_and_noise_floor(capsys):
+    baseline = {"results": {"1000": {
+        "fast": {"time_ms": 0.5, "peak_kb": 10},
+        "slow": {"time_ms": 100, "peak_kb": 1000},
+        "heavy": {"time_ms": 100, "peak_kb": 1000},
+    }}}
+    results = {"1000": {
+        "fast": {"time_ms": 1.5, "peak_kb": 40},
+        "slow": {"time_ms": 140, "peak_kb": 1000},
+        "heavy": {"time_ms": 100, "peak_kb": 1200},
+        "new": {"time_ms": 1, "peak_kb": 1},
+    }}
+    assert compare(results, baseline) == [("1000", "slow"), ("1000", "heavy")]
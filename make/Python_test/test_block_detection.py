@@ -0,0 +1,62 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from block_detection import STRATEGIES, compare_strategies, detect_blocks, score_against
+
+# python -m pytest make/Python_test/test_block_detection.py
+
+
+# 白地に 1px 枠の小さなブロックと塗りつぶしのブロックを散らした画像
+def _sparse_map(size=1024, count=40):
+    rng = np.random.default_rng(1)
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    expected = set()
+    for i in range(count):
+        w, h = int(rng.integers(16, 40)), int(rng.integers(16, 40))
+        x, y = 8 + (i % 8) * 120 + int(rng.integers(0, 40)), 8 + (i // 8) * 200 + int(rng.integers(0, 80))
+        if i % 2:
+            cv2.rectangle(image, (x, y), (x + w - 1, y + h - 1), (0, 0, 0), 1)
+        else:
+            image[y:y + h, x:x + w] = 0
+        expected.add((x, y, w, h))
+    return image, expected
+
+
+def _as_tuples(blocks):
+    return {(b["x"], b["y"], b["width"], b["height"]) for b in blocks}
+
+
+def test_threshold_finds_every_block():
+    image, expected = _sparse_map()
+    blocks, metrics = detect_blocks(image, "threshold", min_size=10)
+    assert _as_tuples(blocks) == expected
+    assert metrics["count"] == len(expected)
+    assert metrics["min_width"] >= 16 and metrics["roi_coverage"] == 1.0
+
+
+# 縮小画像で候補を探しても 16px の 1px 枠は消えず、原寸検出と同じ結果になる
+@pytest.mark.parametrize("levels", [1, 2, 3])
+def test_pyramid_matches_full_resolution(levels):
+    image, expected = _sparse_map()
+    blocks, metrics = detect_blocks(image, "threshold", min_size=10, pyramid_levels=levels)
+    assert _as_tuples(blocks) == expected
+    assert 0 < metrics["roi_coverage"] < 1.0
+
+
+def test_compare_strategies_scores_against_full_resolution():
+    image, _ = _sparse_map()
+    results = compare_strategies(image, [{"strategy": name, "pyramid_levels": 2} for name in STRATEGIES], 10)
+    assert [m["strategy"] for m in results] == list(STRATEGIES)
+    threshold = results[0]
+    assert threshold["recall"] == 1.0 and threshold["precision"] == 1.0
+
+
+def test_score_and_invalid_strategy():
+    a = {"x": 0, "y": 0, "width": 10, "height": 10}
+    b = {"x": 50, "y": 0, "width": 10, "height": 10}
+    assert score_against([a], [a, b]) == {"recall": 0.5, "precision": 1.0}
+    assert score_against([], []) == {"recall": 1.0, "precision": 1.0}
+    with pytest.raises(ValueError):
+        detect_blocks(np.zeros((8, 8), dtype=np.uint8), "sobel")
@@ -0,0 +1,67 @@
+import pytest
+
+from block_geometry import cells_to_dict, divide_block, divide_blocks, iter_divide_block
+
+# python -m pytest make/Python_test/test_block_geometry.py
+
+
+# 置き換える前の divide_block（比較用にそのまま残す）
+def _legacy_divide_block(x, y, width, height, vertical_segments, horizontal_segments):
+    sub_blocks = {}
+    block_width = width / horizontal_segments
+    block_height = height / vertical_segments
+
+    block_id = 1
+    for i in range(vertical_segments):
+        for j in range(horizontal_segments):
+            sub_blocks[f"Block_{block_id}"] = {
+                "x": x + j * block_width,
+                "y": y + i * block_height,
+                "width": block_width,
+                "height": block_height
+            }
+            block_id += 1
+
+    return sub_blocks
+
+
+BLOCKS = [
+    (1413, 125, 37, 91, 5, 2),
+    (0.5, 10.25, 100, 133, 6, 1),
+    (7, 3, 22.2, 18.7, 3, 7),
+]
+
+
+@pytest.mark.parametrize("block", BLOCKS)
+def test_divide_block_matches_legacy(block):
+    assert divide_block(*block) == _legacy_divide_block(*block)
+    assert dict(iter_divide_block(*block)) == _legacy_divide_block(*block)
+
+
+# 一括版は1ブロックずつ分割した結果と同じ値・同じ順番になる
+@pytest.mark.parametrize("block", BLOCKS)
+def test_divide_blocks_matches_single_block(block):
+    pytest.importorskip("numpy")
+    x, y, w, h, v, s = block
+    cells = divide_blocks([(x, y, w, h)], v, s)
+    assert cells_to_dict(cells) == divide_block(*block)
+    assert cells["row"].tolist() == [i // s for i in range(v * s)]
+    assert cells["col"].tolist() == [i % s for i in range(v * s)]
+
+
+def test_divide_blocks_per_parent_segments():
+    pytest.importorskip("numpy")
+    parents = [{"x": b[0], "y": b[1], "width": b[2], "height": b[3]} for b in BLOCKS]
+    cells = divide_blocks(parents, [b[4] for b in BLOCKS], [b[5] for b in BLOCKS])
+    assert len(cells) == sum(b[4] * b[5] for b in BLOCKS)
+    for index, block in enumerate(BLOCKS):
+        assert cells_to_dict(cells[cells["parent"] == index]) == divide_block(*block)
+
+
+def test_non_positive_segments_raise():
+    with pytest.raises(ValueError):
+        divide_block(0, 0, 10, 10, 0, 2)
+    pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        divide_blocks([(0, 0, 10, 10), (0, 0, 5, 5)], [2, 0], 1)
+    assert len(divide_blocks([], 2, 2)) == 0
@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+from build_place_map import build_place_map, island_rect, load_layout
+
+# python -m pytest make/Python_test/test_build_place_map.py
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BLOCKS = [
+    {"x": 0, "y": 0, "width": 100, "height": 100},
+    {"x": 10, "y": 10, "width": 20, "height": 20},
+    {"x": 200, "y": 0, "width": 50, "height": 50},
+]
+
+
+# point は検出順によらず、その点を含む一番小さいブロックを選ぶ
+def test_island_rect_by_point():
+    assert island_rect({"point": [15, 15]}, BLOCKS) == BLOCKS[1]
+    assert island_rect({"point": [15, 15]}, BLOCKS[::-1]) == BLOCKS[1]
+    assert island_rect({"point": [50, 80]}, BLOCKS) == BLOCKS[0]
+    assert island_rect({"rect": [1, 2, 3, 4]}, None) == {"x": 1, "y": 2, "width": 3, "height": 4}
+    with pytest.raises(ValueError):
+        island_rect({"point": [150, 150]}, BLOCKS)
+
+
+# 同梱のレイアウト（各ホールの一部の島）から作ると、client の placeMap.json と同じ番号・座標になる
+def test_layout_matches_place_map(tmp_path):
+    pytest.importorskip("cv2")
+    layout = load_layout(os.path.join(HERE, "place_map_layout.json"))
+    built, _ = build_place_map(layout, str(tmp_path / "cache"), workers=1)
+    with open(os.path.join(HERE, "../../client/src/assets/placeMap.json"), 'r', encoding='utf-8') as f:
+        place_map = json.load(f)
+    assert len(built) == 110
+    assert {code: place_map[code] for code in built} == built
@@ -0,0 +1,64 @@
+import importlib
+import json
+
+import pytest
+
+from cli import load_jobs, main, run_batch, run_job
+
+# python -m pytest make/Python_test/test_cli.py
+
+DIVIDE = {"command": "divide", "x": 1413, "y": 125, "width": 37, "height": 91,
+          "vertical": 5, "horizontal": 2, "prefix": "ス", "start": 20,
+          "order": "right_to_left_bottom_to_top", "serpentine": True}
+
+
+def test_run_job_divide_and_defaults():
+    result = run_job(DIVIDE)
+    assert result["count"] == 10
+    assert list(result["spaces"])[:2] == ["ス20", "ス21"]
+    # defaults はジョブ側の値で上書きされ、"-" は "_" と同じ扱い
+    defaults = {"command": "divide", "x": 0, "y": 0, "width": 10, "height": 10, "prefix": "ア"}
+    result = run_job({"vertical": 2, "start": 5, "id": "ignored"}, defaults)
+    assert list(result["spaces"]) == ["ア05", "ア06"]
+    with pytest.raises(ValueError):
+        run_job({"command": "nope"})
+
+
+# 失敗したジョブは error を記録して続きを実行する
+def test_run_batch_records_errors():
+    jobs = [DIVIDE, {"command": "nope", "id": "bad"}, dict(DIVIDE, vertical=1, horizontal=1)]
+    logged = []
+    results = run_batch(jobs, log=logged.append)
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["id"] == "bad" and results[1]["error"].startswith("ValueError")
+    assert results[2]["result"]["count"] == 1
+    assert len(logged) == 3
+    assert len(run_batch(jobs, stop_on_error=True)) == 2
+
+
+def test_batch_file_through_main(tmp_path, capsys):
+    output = tmp_path / "spaces.json"
+    job_file = tmp_path / "jobs.json"
+    job_file.write_text(json.dumps({
+        "defaults": {"command": "divide", "vertical": 2, "horizontal": 1},
+        "jobs": [{"x": 0, "y": 0, "width": 10, "height": 10, "output": str(output)}],
+    }), encoding='utf-8')
+    assert load_jobs(str(job_file))[1] == {"command": "divide", "vertical": 2, "horizontal": 1}
+    assert main(["batch", str(job_file)]) == 0
+    assert json.loads(output.read_text(encoding='utf-8')) == run_job(
+        {"command": "divide", "x": 0, "y": 0, "width": 10, "height": 10, "vertical": 2})["spaces"]
+    assert json.loads(capsys.readouterr().out)[0]["ok"]
+
+    assert main(["divide", "0", "0", "10", "10", "--prefix", "a"]) == 0
+    assert json.loads(capsys.readouterr().out)["spaces"] == {"a01": {"x": 0.0, "y": 0.0, "width": 10.0, "height": 10.0}}
+
+
+# スクリプトを import しても実行例は走らない（画像の読み書きや入力待ちをしない）
+@pytest.mark.parametrize("name", ["block_size", "detect_blocks", "draw_grid", "create_line", "bunkatu",
+                                  "Quiz_song", "SELECT_song"])
+def test_scripts_are_import_safe(tmp_path, monkeypatch, name):
+    pytest.importorskip("cv2")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("builtins.input", lambda *a: pytest.fail("input() called on import"))
+    importlib.reload(importlib.import_module(name))
+    assert list(tmp_path.iterdir()) == []
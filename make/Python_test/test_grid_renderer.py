@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from grid_renderer import render_grid, write_tile_pyramid
+
+# python -m pytest make/Python_test/test_grid_renderer.py
+
+
+# 置き換える前の draw_grid の描画部分（比較用にそのまま残す）
+def _legacy_draw_grid(image, grid_size=40):
+    height, width, _ = image.shape
+    grid_image = image.copy()
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    for y in range(0, height, grid_size):
+        for x in range(0, width, grid_size):
+            cv2.rectangle(grid_image, (x, y), (x + grid_size, y + grid_size), (255, 0, 0), 1)
+            label = f"{chr(65 + (y // grid_size))}-{(x // grid_size) + 1}"
+            text_size, _ = cv2.getTextSize(label, font, 0.5, 1)
+            text_x = x + (grid_size - text_size[0]) // 2
+            text_y = y + (grid_size + text_size[1]) // 2
+            cv2.putText(grid_image, label, (text_x, text_y), font, 0.5, (0, 0, 255), 1)
+    return grid_image
+
+
+def _sample_image(height, width):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+# ラベルがセルに収まる大きさなら従来の draw_grid とピクセル単位で同じ
+@pytest.mark.parametrize("shape, grid_size", [((160, 200), 40), ((130, 250), 50), ((200, 400), 80)])
+def test_render_grid_matches_legacy(shape, grid_size):
+    image = _sample_image(*shape)
+    assert np.array_equal(render_grid(image, grid_size), _legacy_draw_grid(image, grid_size))
+
+
+def test_render_grid_leaves_input_untouched():
+    image = _sample_image(80, 80)
+    before = image.copy()
+    render_grid(image)
+    assert np.array_equal(image, before)
+
+
+def test_tile_pyramid(tmp_path):
+    image = _sample_image(600, 300)
+    meta = write_tile_pyramid(image, str(tmp_path), tile_size=256)
+    assert [(lv["width"], lv["height"], lv["rows"], lv["cols"]) for lv in meta["levels"]] == [
+        (300, 600, 3, 2), (150, 300, 2, 1), (75, 150, 1, 1)
+    ]
+    assert json.loads((tmp_path / "tiles.json").read_text(encoding='utf-8')) == meta
+    assert np.array_equal(cv2.imread(str(tmp_path / "0" / "2_1.png")), image[512:, 256:])
+    for level in meta["levels"]:
+        tiles = sorted(p.name for p in (tmp_path / str(level["z"])).iterdir())
+        assert len(tiles) == level["rows"] * level["cols"]
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from image_store import ImageStore, attach
+
+# python -m pytest make/Python_test/test_image_store.py
+
+
+def _noise(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def store():
+    store = ImageStore()
+    yield store
+    store.clear()
+
+
+def _write(tmp_path, name, image):
+    path = str(tmp_path / name)
+    assert cv2.imwrite(path, image)
+    return path
+
+
+# 同じ画像は1回だけデコードし、派生ラスタもパラメータごとに1回だけ作る
+def test_decode_once_and_cache_rasters(tmp_path, store):
+    path = _write(tmp_path, "map.png", _noise())
+    image = store.load(path)
+    assert store.load(path) is image and store.decodes == 1
+    assert not image.flags.writeable
+    binary = store.raster(path, "binary", threshold=100)
+    assert store.raster(path, "binary", threshold=100) is binary
+    assert store.raster(path, "binary", threshold=200) is not binary
+    assert np.array_equal(binary, cv2.threshold(cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY),
+                                                 100, 255, cv2.THRESH_BINARY_INV)[1])
+    assert store.decodes == 1
+    with pytest.raises(ValueError):
+        store.raster(path, "sobel")
+
+
+# 書き換えたファイル（更新時刻・サイズが変わったもの）はデコードし直す
+def test_edited_file_is_decoded_again(tmp_path, store):
+    path = _write(tmp_path, "map.png", _noise(0))
+    store.load(path)
+    cv2.imwrite(path, _noise(1)[:40])
+    os.utime(path, ns=(1, 1))
+    assert np.array_equal(store.load(path), _noise(1)[:40])
+    assert store.decodes == 2
+
+
+# 可逆形式は書いた配列をそのまま登録し、JPEG は登録せずに次の load でファイルから読む
+def test_put_lossless_vs_jpeg(tmp_path, store):
+    image = _noise()
+    png = _write(tmp_path, "out.png", image)
+    assert np.array_equal(store.put(png, image), image)
+    store.load(png)
+    assert store.decodes == 0
+
+    jpg = _write(tmp_path, "out.jpg", image)
+    store.load(jpg)
+    store.put(jpg, image)
+    assert np.array_equal(store.load(jpg), cv2.imread(jpg))
+    assert store.decodes == 2
+
+
+def test_budget_evicts_least_recently_used(tmp_path):
+    image = _noise()
+    store = ImageStore(budget_bytes=image.nbytes * 2)
+    try:
+        paths = [_write(tmp_path, f"{i}.png", _noise(i)) for i in range(3)]
+        for path in paths:
+            store.load(path)
+        assert store.evictions == 1 and store.lookup(paths[0]) is None
+        shared = store.lookup(paths[2])
+        assert np.array_equal(attach(shared), _noise(2))
+        with pytest.raises(FileNotFoundError):
+            store.load(str(tmp_path / "missing.png"))
+    finally:
+        store.clear()
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from json_atomic import write_json_atomic
+from startup_profile import parse_importtime, profile_startup
+
+# python -m pytest make/Python_test/test_json_atomic.py
+
+
+def test_write_json_atomic_replaces_file(tmp_path):
+    path = tmp_path / "out" / "placeMap.json"
+    write_json_atomic({"ア01": {"x": 1}}, str(path), indent=4)
+    write_json_atomic({"ア02": {"x": 2}}, str(path), indent=4)
+    assert path.read_text(encoding='utf-8') == json.dumps({"ア02": {"x": 2}}, ensure_ascii=False, indent=4)
+    assert [p.name for p in path.parent.iterdir()] == ["placeMap.json"]
+
+
+# 書き出しに失敗しても元のファイルと例外はそのまま、一時ファイルは残らない
+def test_failed_write_keeps_old_file_and_leaves_no_temp(tmp_path):
+    path = tmp_path / "placeMap.json"
+    write_json_atomic({"ok": 1}, str(path))
+    with pytest.raises(TypeError):
+        write_json_atomic({"bad": object()}, str(path))
+    assert json.loads(path.read_text(encoding='utf-8')) == {"ok": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["placeMap.json"]
+
+
+# 置き換えに失敗したときも同じ
+def test_replace_failure_leaves_no_temp(tmp_path):
+    (tmp_path / "dir.json").mkdir()
+    with pytest.raises(OSError):
+        write_json_atomic({}, str(tmp_path / "dir.json"))
+    assert [p.name for p in tmp_path.iterdir()] == ["dir.json"]
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   _io\n"
+              "import time:       300 |        900 | json\n"
+              "import time:        50 |        600 |   json.decoder\n")
+    assert parse_importtime(stderr) == [("_io", 120, 120, 1), ("json", 300, 900, 0), ("json.decoder", 50, 600, 1)]
+
+
+# 座標だけのコマンドは画像系ライブラリを読み込まない
+def test_divide_does_not_load_imaging_libraries():
+    report = profile_startup(["divide", "0", "0", "10", "10"])
+    assert report["returncode"] == 0
+    assert report["heavy_modules"] == []
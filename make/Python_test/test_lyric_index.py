@@ -0,0 +1,91 @@
+import os
+
+from lyric_index import LyricIndex, normalize
+from quiz_sampler import MASK
+from song_corpus import SongCorpus
+
+# python -m pytest make/Python_test/test_lyric_index.py
+
+SONGS = {
+    "夜に駆ける": "沈むように溶けてゆくように\n\n二人だけの空が広がる夜に\n",
+    "Lemon": "夢ならばどれほどよかったでしょう\n未だにあなたのことを夢にみる\n",
+    "アイドル": "無敵の笑顔で荒らすメディア\nキラキラの夜に\n",
+}
+
+
+def _write(folder, name, text):
+    path = folder / f"{name}.txt"
+    path.write_text(text, encoding='utf-8')
+    # 同じ時刻・同じサイズで書き換えても変更が見えるように、更新時刻を進める
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def _open(tmp_path):
+    corpus = SongCorpus(str(tmp_path / "songs"), index_file=str(tmp_path / "song_index.json"))
+    return LyricIndex(corpus, str(tmp_path / "lyric_index"))
+
+
+def _setup(tmp_path):
+    folder = tmp_path / "songs"
+    folder.mkdir()
+    for name, text in SONGS.items():
+        _write(folder, name, text)
+    return folder
+
+
+def test_search_normalizes_text(tmp_path):
+    _setup(tmp_path)
+    with _open(tmp_path) as index:
+        assert index.search("夢ならば") == [("Lemon", 1, "夢ならばどれほどよかったでしょう")]
+        assert index.search("きらきら") == [("アイドル", 2, "キラキラの夜に")]
+        assert index.search("ｷﾗｷﾗ") == [("アイドル", 2, "キラキラの夜に")]
+        assert sorted(song for song, _, _ in index.search("夜に")) == ["アイドル", "夜に駆ける"]
+        assert len(index.search("夜に", limit=1)) == 1
+        assert index.search("！？") == []
+    assert normalize("Ｌｅｍｏｎ　レモン!") == "lemonれもん"
+
+
+# 変わった曲だけ索引し直し、古い行は検索に出ない
+def test_update_only_changed_songs(tmp_path):
+    folder = _setup(tmp_path)
+    _open(tmp_path).close()
+    _write(folder, "Lemon", "苦いレモンの匂い\n")
+    (folder / "アイドル.txt").unlink()
+    with _open(tmp_path) as index:
+        assert index.update() == (0, 0)
+        assert index.search("夢ならば") == []
+        assert index.search("レモンの匂い") == [("Lemon", 1, "苦いレモンの匂い")]
+        assert index.search("キラキラ") == []
+        assert index.search("溶けてゆく") == [("夜に駆ける", 1, "沈むように溶けてゆくように")]
+
+
+# 書き換えが続いて古い行が増えたら、1つのセグメントに作り直す
+def test_compacts_when_dead_lines_pile_up(tmp_path):
+    folder = _setup(tmp_path)
+    for i in range(4):
+        _write(folder, "Lemon", f"{i}回目の夢\n" * 20)
+        with _open(tmp_path) as index:
+            assert index.search(f"{i}回目") and len(index.segments) <= 2
+            assert index.next_line_id <= 2 * sum(song["count"] for song in index.songs.values()) + 20
+
+
+# meta.json にあるセグメントのファイルが消えていたら作り直す
+def test_missing_segment_is_rebuilt(tmp_path):
+    _setup(tmp_path)
+    _open(tmp_path).close()
+    for name in os.listdir(tmp_path / "lyric_index"):
+        if name.endswith(".post"):
+            os.remove(tmp_path / "lyric_index" / name)
+    with _open(tmp_path) as index:
+        assert index.search("夢ならば") == [("Lemon", 1, "夢ならばどれほどよかったでしょう")]
+
+
+# 伏せ字の前後が同じ行に並ぶ別の曲があれば、問題があいまい
+def test_ambiguous(tmp_path):
+    _setup(tmp_path)
+    with _open(tmp_path) as index:
+        assert index.ambiguous([f"{MASK}の夜に"], title="アイドル") == []
+        assert index.ambiguous([f"広がる{MASK}"], title="アイドル") == ["夜に駆ける"]
+        assert index.ambiguous([f"広がる{MASK}", "夢ならば"], title="アイドル") == []
+        assert index.songs_matching_line(MASK) is None
@@ -0,0 +1,42 @@
+import json
+import os
+
+from ocr_resolver import SpaceResolver, extract_tokens, load_resolver
+
+# python -m pytest make/Python_test/test_ocr_resolver.py
+
+CODES = ["ア01", "ア02", "マ01", "A12", "a12", "あ05"]
+
+
+def test_extract_tokens_keeps_the_desk_half():
+    assert extract_tokens("ア01b") == ["ア01b"]
+    assert extract_tokens("ア０１ａ と A-12") == ["ア01a", "A12"]
+    assert extract_tokens("ア0l") == ["ア01"]
+    assert extract_tokens("アOO") == []
+
+
+def test_resolve_text_reports_the_half_separately():
+    resolver = SpaceResolver(CODES)
+    first, second = resolver.resolve_text("ア01b あ05")
+    assert (first["code"], first["half"], first["method"]) == ("ア01", "b", "exact")
+    assert (second["code"], second["half"]) == ("あ05", None)
+
+
+def test_confusion_and_ambiguity():
+    resolver = SpaceResolver(CODES)
+    assert resolver.resolve("ア03")["candidates"] == ["ア01", "ア02"]
+    assert resolver.resolve("ア03")["code"] is None
+    assert (resolver.resolve("マ02")["code"], resolver.resolve("マ02")["method"]) == ("ア02", "confusion")
+
+
+# ファイルが変わったら作り直す
+def test_load_resolver_reloads_changed_file(tmp_path):
+    path = tmp_path / "placeMap.json"
+    rect = {"x": 0, "y": 0, "width": 1, "height": 1}
+    path.write_text(json.dumps({"ア01": rect}), encoding='utf-8')
+    first = load_resolver(str(path))
+    assert load_resolver(str(path)) is first
+    path.write_text(json.dumps({"ア01": rect, "ア02": rect}), encoding='utf-8')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_resolver(str(path)).codes == {"ア01", "ア02"}
@@ -0,0 +1,55 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+import overlay_compositor
+from overlay_compositor import composite, render_variants
+
+# python -m pytest make/Python_test/test_overlay_compositor.py
+
+
+def _base():
+    return np.full((60, 80, 3), 200, dtype=np.uint8)
+
+
+# 太さ 1px の枠は cv2.rectangle で1つずつ描いたものと同じ
+def test_outlines_match_cv2_rectangle():
+    base = _base()
+    rects = [
+        {"x": 5, "y": 5, "width": 20, "height": 10},
+        {"x": 30, "y": 8, "width": 15, "height": 30, "color": (0, 0, 255)},
+        {"x": 70, "y": 50, "width": 30, "height": 30},  # 画像からはみ出す
+    ]
+    expected = base.copy()
+    for r in rects:
+        x1 = min(r["x"] + r["width"], 80) - 1
+        y1 = min(r["y"] + r["height"], 60) - 1
+        cv2.rectangle(expected, (r["x"], r["y"]), (x1, y1), r.get("color", (0, 255, 0)), 1)
+    assert np.array_equal(composite(base, rects, thickness=1), expected)
+    assert np.array_equal(base, _base())
+
+
+def test_place_map_dict_and_fill():
+    spaces = {"ア01": {"x": 10, "y": 10, "width": 10, "height": 10, "fill": 0.5, "color": (0, 0, 0)}}
+    canvas = composite(_base(), spaces, thickness=0)
+    assert canvas[15, 15].tolist() == [100, 100, 100]
+    assert canvas[5, 5].tolist() == [200, 200, 200]
+    labelled = composite(_base(), spaces, thickness=0, label_rects=True)
+    assert not np.array_equal(labelled, canvas)
+
+
+# 複数パターンを作ってもデコードは1回
+def test_render_variants_decodes_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(overlay_compositor, "load_image", lambda path: calls.append(path) or _base())
+    variants = {
+        "route_a": {"lines": [((0, 0), (79, 59))]},
+        "route_b": {"rects": [{"x": 1, "y": 1, "width": 5, "height": 5}]},
+    }
+    results = dict(render_variants("east_456.jpg", variants))
+    assert calls == ["east_456.jpg"]
+    assert list(results) == ["route_a", "route_b"]
+    assert results["route_a"][30, 40].tolist() == [0, 255, 0]
+    assert results["route_b"][1, 1].tolist() == [0, 255, 0]
+    assert results["route_b"][30, 40].tolist() == [200, 200, 200]
@@ -0,0 +1,45 @@
+from place_map_shards import from_columnar, load_shard, split_by_hall, to_columnar, write_shards
+from place_map_validation import validate
+
+# python -m pytest make/Python_test/test_place_map_shards.py
+
+
+# divide_block のように割り切れない幅で分けた、接しているスペース（.5 や 22.1666... の座標）
+def _divided_map():
+    place_map = {}
+    for col in range(6):
+        for row in range(3):
+            height = 66.5 / 3
+            place_map[f"A{col * 3 + row + 1:02d}"] = {"x": 100.5 + col * 23.5, "y": 296.5 + row * height,
+                                                     "width": 23.5, "height": height}
+    place_map["ア01"] = {"x": 0.5, "y": 0.5, "width": 10.5, "height": 10.5}
+    place_map["ア02"] = {"x": 11.0, "y": 0.5, "width": 10.5, "height": 10.5}
+    return place_map
+
+
+def _problems(place_map):
+    return [issue for issue in validate(place_map) if issue["kind"] != "drift"]
+
+
+def test_round_trip_keeps_spaces_touching():
+    place_map = _divided_map()
+    assert _problems(place_map) == []
+    for scale in (1, 2, 10):
+        restored = {}
+        for hall, codes in split_by_hall(place_map).values():
+            restored.update(from_columnar(to_columnar(codes, hall["name"], scale)))
+        assert sorted(restored) == sorted(place_map)
+        assert _problems(restored) == []
+        for code, rect in place_map.items():
+            for key in rect:
+                assert abs(restored[code][key] - rect[key]) <= 1 / scale
+
+
+def test_write_and_load_shards(tmp_path):
+    place_map = _divided_map()
+    index = write_shards(place_map, tmp_path, scale=2)
+    assert {hall_id: info["count"] for hall_id, info in index.items()} == {"east7": 18, "east456": 2}
+    assert load_shard(tmp_path, "east456") == {
+        "ア01": {"x": 0.5, "y": 0.5, "width": 10.5, "height": 10.5},
+        "ア02": {"x": 11.0, "y": 0.5, "width": 10.5, "height": 10.5},
+    }
@@ -0,0 +1,55 @@
+import pytest
+
+from block_geometry import divide_block
+from place_map_validation import check_place_map, summarize, validate
+from space_numbering import number_blocks
+
+# python -m pytest make/Python_test/test_place_map_validation.py
+
+
+def _rect(x, y, width=10, height=10):
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def _issues(pairs, **options):
+    return sorted((i["kind"], tuple(i["ids"])) for i in validate(pairs, **options))
+
+
+# divide_block → number_blocks の出力は問題なし（辺が接しているだけなら重なりではない）
+def test_divided_block_is_clean():
+    spaces = number_blocks(divide_block(1413, 125, 37, 91, 5, 2), {"prefix": "ス", "start": 20})
+    assert validate(spaces) == []
+    assert check_place_map(spaces) == []
+
+
+def test_duplicate_and_invalid():
+    pairs = [("ア01", _rect(0, 0)), ("ア01", _rect(100, 0)), ("ア01", _rect(200, 0)),
+             ("ア02", {"x": 0, "y": "1", "width": 1, "height": 1}),
+             ("ア03", _rect(300, 0, width=0)), ("ア04", [0, 0, 1, 1]), ("ア05", _rect(400, float("nan")))]
+    assert _issues(pairs) == [("duplicate", ("ア01",))] + [("invalid", (f"ア0{i}",)) for i in range(2, 6)]
+
+
+def test_overlap_gap_and_drift():
+    pairs = {
+        "ア01": _rect(0, 0), "ア02": _rect(5, 5),                     # 重なり
+        "ア03": _rect(100, 0), "ア04": _rect(111.5, 0),              # 同じ行で 1.5px のすき間
+        "ア05": _rect(200, 0), "ア06": _rect(200, 10.000000000000002),  # 誤差だけずれて接している
+        "ア07": _rect(300, 0), "ア08": _rect(320, 0),                # 離れているのは問題なし
+    }
+    assert _issues(pairs) == [("drift", ("ア06",)), ("gap", ("ア03", "ア04")), ("overlap", ("ア01", "ア02"))]
+    assert _issues(pairs, max_gap=1.0) == [("drift", ("ア06",)), ("overlap", ("ア01", "ア02"))]
+    assert summarize(validate(pairs, integer=True))["fractional"] == 1
+
+
+# ホールが違えば同じ座標でも重なりではない
+def test_halls_are_checked_separately():
+    assert validate({"ア01": _rect(0, 0), "A01": _rect(0, 0), "あ01": _rect(0, 0)}) == []
+
+
+def test_check_place_map_raises_on_errors():
+    with pytest.raises(ValueError, match="overlap 1"):
+        check_place_map({"ア01": _rect(0, 0), "ア02": _rect(5, 5)})
+    warnings = check_place_map({"ア01": _rect(0, 0), "ア02": _rect(11, 0)})
+    assert [w["kind"] for w in warnings] == ["gap"]
+    with pytest.raises(ValueError):
+        check_place_map({"ア01": _rect(0, 0), "ア02": _rect(11, 0)}, strict=True)
@@ -0,0 +1,53 @@
+import random
+
+from quiz_sampler import MASK, FenwickTree, RangeSampler, TitleMasker, masker_for
+
+# python -m pytest make/Python_test/test_quiz_sampler.py
+
+
+def test_fenwick_find_and_from_weights():
+    weights = [3, 0, 5, 1, 0, 2]
+    built = FenwickTree.from_weights(weights)
+    added = FenwickTree(len(weights))
+    for i, w in enumerate(weights):
+        added.add(i, w)
+    assert built.tree == added.tree and built.total == added.total == 11
+
+    # value 番目の重みがどの位置に落ちるか
+    expected = [i for i, w in enumerate(weights) for _ in range(w)]
+    for value, index in enumerate(expected):
+        assert built.find(value) == (index, sum(weights[:index]))
+
+
+# 引いた範囲は重ならず、全行を使い切るまで None を返さない
+def test_range_sampler_never_overlaps_and_exhausts():
+    for seed in range(20):
+        rng = random.Random(seed)
+        total = rng.randrange(1, 60)
+        sampler = RangeSampler(total, rng=rng)
+        used = set()
+        while sampler.free_lines():
+            span = sampler.draw(rng.randint(1, 3))
+            assert span is not None
+            start, end = span
+            lines = set(range(start, end))
+            assert 1 <= len(lines) <= 3 and not lines & used
+            used |= lines
+            assert sampler.free_lines() == total - len(used)
+        assert used == set(range(total))
+        assert sampler.draw(1) is None and sampler.free_intervals() == []
+
+
+def test_range_sampler_falls_back_to_shorter_window():
+    sampler = RangeSampler(4, rng=random.Random(0))
+    sampler.draw(3)
+    assert not sampler.can_draw(3)
+    assert sampler.draw(3) is not None
+
+
+def test_title_masker_variants():
+    masker = TitleMasker("ハルジオン", aliases=("halzion",))
+    assert masker.mask("はるじおん が咲く") == f"{MASK} が咲く"
+    assert masker.mask("HALZION と ｈａｌｚｉｏｎ") == f"{MASK} と {MASK}"
+    assert TitleMasker("").mask("そのまま") == "そのまま"
+    assert masker_for("夜に駆ける") is masker_for("夜に駆ける")
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from quiz_engine import QuizLibrary
+from quiz_server import HTTPError, QuizServer, _rounds
+
+# python -m pytest make/Python_test/test_quiz_server.py
+
+SONGS = {
+    "Lemon": ("夢ならばどれほどよかったでしょう", "未だにあなたのことを夢にみる", "忘れた物を取りに帰るように"),
+    "夜に駆ける": ("沈むように溶けてゆくように", "二人だけの空が広がる夜に", "さよならだけだった"),
+}
+
+
+@pytest.mark.parametrize("value, expected", [(None, 10), (3, 3), ("3", 3), ("12", 12)])
+def test_rounds_accepts_positive_integers(value, expected):
+    assert _rounds(value, 10) == expected
+
+
+@pytest.mark.parametrize("value", [0, -1, "0", "-1", "abc", "1.5", " 3", "３", 1.5, 2.0, float("inf"), True, [], {}])
+def test_rounds_rejects_everything_else(value):
+    with pytest.raises(HTTPError) as e:
+        _rounds(value, 10)
+    assert e.value.status == 400
+
+
+async def _post(port, path, body):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    return status, json.loads(response.split(b"\r\n\r\n", 1)[1] or b"null")
+
+
+# 1e999（inf）や 1.5 は接続を落とさず 400 を返す
+def test_create_session_validates_rounds_over_http():
+    async def run():
+        server = QuizServer(QuizLibrary(SONGS))
+        await server.start(port=0)
+        try:
+            results = [await _post(server.port, "/sessions", body)
+                       for body in (b'{"rounds": 1e999}', b'{"rounds": 1.5}', b'{"rounds": 0}', b'{"rounds": "2"}')]
+        finally:
+            await server.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [status for status, _ in results] == [400, 400, 400, 201]
+    assert results[-1][1]["summary"]["rounds"] == 2
+
+
+class _FakeConnection:
+    def __init__(self, conn_id):
+        self.id = conn_id
+        self.session = None
+        self.room = None
+        self.host = False
+        self.name = None
+        self.sent_at = None
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+# 別の部屋を作る・別の部屋に入ると、前の部屋から抜ける（司会が作り直した部屋は閉じる）
+def test_switching_rooms_leaves_the_previous_room():
+    server = QuizServer(QuizLibrary(SONGS))
+    host, player = _FakeConnection("host"), _FakeConnection("player")
+    first = server._dispatch(host, "create_room", {}, 0)["room"]
+    server._dispatch(player, "join", {"room": first, "name": "a"}, 0)
+    second = server._dispatch(host, "create_room", {}, 0)["room"]
+    assert list(server.rooms) == [second]
+    assert player.room is None and player.sent[-1] == {"type": "room_closed", "room": first}
+
+    third = server._dispatch(_FakeConnection("other"), "create_room", {}, 0)["room"]
+    server._dispatch(player, "join", {"room": second, "name": "a"}, 0)
+    server._dispatch(player, "join", {"room": third, "name": "a"}, 0)
+    assert player.id not in server.rooms[second][2] and player.id not in server.rooms[second][0].players
+    assert player.id in server.rooms[third][0].players
+
+    server._disconnect(host)
+    assert list(server.rooms) == [third]
+
+
+# 想定外の例外でも接続は切らずにエラーを返す
+def test_unexpected_error_is_replied(monkeypatch):
+    server = QuizServer(QuizLibrary(SONGS))
+    conn = _FakeConnection("c")
+
+    def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server, "_dispatch", broken)
+    server._ws_message(conn, b'{"type": "state", "id": 7}', 0)
+    assert conn.sent == [{"error": "Internal error", "reply_to": "state", "id": 7}]
+
+
+# 部屋の締め切りで、参加者の回答を成績（on_result）と曲の選択（library.record）に渡す
+def test_room_results_are_recorded():
+    library = QuizLibrary(SONGS)
+    library_records, results = [], []
+    library.record = lambda *args: library_records.append(args)
+    server = QuizServer(library)
+    server.stats = type("Stats", (), {"record": lambda self, *args: results.append(args)})()
+    host, player = _FakeConnection("host"), _FakeConnection("player")
+
+    async def run():
+        room_id = server._dispatch(host, "create_room", {}, 0)["room"]
+        server._dispatch(player, "join", {"room": room_id, "name": "a"}, 0)
+        server._dispatch(host, "room_next", {}, 0)
+        server._dispatch(host, "room_reveal", {}, 0)
+        title = server.rooms[room_id][0].round.title
+        server._dispatch(player, "room_answer", {"answer": title}, player.sent_at)
+        server._dispatch(host, "room_close", {}, 0)
+        return room_id, title
+
+    room_id, title = asyncio.run(run())
+    assert library_records == [(title, True, 1)]
+    assert results == [(title, True, 1, 10, f"{room_id}:player")]
+
+
+# 採点器は起動時に作っておく（最初の問題でイベントループを止めない）
+def test_matcher_is_built_at_start():
+    library = QuizLibrary(SONGS)
+
+    async def run():
+        server = QuizServer(library)
+        await server.start(port=0)
+        await server.close()
+
+    asyncio.run(run())
+    assert library._matcher is not None
@@ -0,0 +1,73 @@
+import json
+import sqlite3
+
+import pytest
+
+from quiz_stats_store import QuizStatsStore, open_store
+
+# python -m pytest make/Python_test/test_quiz_stats_store.py
+
+LEGACY = {
+    "Lemon": {"correct": 2, "incorrect": 1, "display_counts": [1, 3]},
+    "夜に駆ける": {"correct": 0, "incorrect": 2, "display_counts": []},
+}
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    path = tmp_path / "quiz_stats.json"
+    path.write_text(json.dumps(LEGACY, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+# record と record_many は同じ集計になる（表示回数は正解のときだけ数える）
+def test_record_and_record_many_aggregate_alike(tmp_path):
+    answers = [("Lemon", True, 2, 10, "s1"), ("Lemon", False, 3, 0, "s1"), ("Lemon", True, 2, 10, "s2")]
+    with QuizStatsStore(str(tmp_path / "a.db")) as one, QuizStatsStore(str(tmp_path / "b.db")) as many:
+        for song, correct, display_count, score, session in answers:
+            one.record(song, correct, display_count, score, session)
+        many.record_many(answers)
+        assert one.stats() == many.stats() == {
+            "Lemon": {"correct": 2, "incorrect": 1, "display_sum": 4, "display_n": 2, "display_hist": {2: 2}}
+        }
+        assert one.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 3
+        assert one.compact() == 3
+        assert one.song("Lemon")["correct"] == 2
+
+
+def test_import_legacy_once_and_export(tmp_path, legacy_file):
+    db_file = str(tmp_path / "quiz_stats.db")
+    with open_store(db_file, legacy_file) as store:
+        assert store.legacy_imported()
+        assert store.export_legacy() == LEGACY
+    # 2回目以降は取り込まない
+    with open_store(db_file, legacy_file) as store:
+        assert store.import_legacy(legacy_file, once=True) is None
+        assert store.export_legacy() == LEGACY
+
+
+# 取り込みに失敗したら印は残らず、次回やり直す
+def test_failed_import_is_retried(tmp_path, legacy_file):
+    broken = tmp_path / "broken.json"
+    broken.write_text(json.dumps({"Lemon": {"correct": 1, "display_counts": 5}}), encoding='utf-8')
+    db_file = str(tmp_path / "quiz_stats.db")
+    with QuizStatsStore(db_file) as store:
+        with pytest.raises(TypeError):
+            store.import_legacy(str(broken), once=True)
+        assert not store.legacy_imported()
+        assert store.stats() == {}
+    with open_store(db_file, legacy_file) as store:
+        assert store.export_legacy() == LEGACY
+
+
+# meta ができる前の DB は取り込み済みとみなす
+def test_old_db_without_meta_is_marked_imported(tmp_path, legacy_file):
+    db_file = str(tmp_path / "quiz_stats.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE song_stats (song TEXT PRIMARY KEY, correct INTEGER NOT NULL DEFAULT 0, "
+                 "incorrect INTEGER NOT NULL DEFAULT 0, display_sum INTEGER NOT NULL DEFAULT 0, "
+                 "display_n INTEGER NOT NULL DEFAULT 0)")
+    conn.close()
+    with open_store(db_file, legacy_file) as store:
+        assert store.legacy_imported()
+        assert store.stats() == {}
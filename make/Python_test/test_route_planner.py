@@ -0,0 +1,79 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from block_geometry import divide_block
+from route_planner import UNREACHABLE, RoutePlanner, hall_distances, plan_routes, solve_order
+from space_numbering import number_blocks
+
+# python -m pytest make/Python_test/test_route_planner.py
+
+
+def _path_length(dist, order):
+    return sum(dist[a][b] for a, b in zip(order, order[1:]))
+
+
+def _brute_force(dist, start):
+    starts = [start] if start is not None else range(len(dist))
+    return min(_path_length(dist, [s, *p]) for s in starts
+               for p in itertools.permutations([i for i in range(len(dist)) if i != s]))
+
+
+# 少ない地点なら全探索の最短に近い（開始地点を決めた場合は必ずそこから始まる）
+@pytest.mark.parametrize("start", [None, 0])
+def test_solve_order_close_to_optimum(start):
+    rng = random.Random(3)
+    for _ in range(30):
+        n = rng.randint(1, 7)
+        points = [(rng.random() * 100, rng.random() * 100) for _ in range(n)]
+        dist = [[math.dist(a, b) for b in points] for a in points]
+        order = solve_order(dist, start)
+        assert sorted(order) == list(range(n))
+        if start is not None:
+            assert order[0] == start
+        assert _path_length(dist, order) <= _brute_force(dist, start) * 1.1 + 1e-9
+
+
+def test_hall_distances_take_the_shortest_chain():
+    table = hall_distances(["a", "b", "c", "d"], [("a", "b", 5), ("b", "c", 2), ("a", "c", 10)])
+    assert table["a"]["c"] == 7 and table["c"]["a"] == 7
+    assert table["a"]["d"] == UNREACHABLE
+
+
+# 東456 に2つの島（ア・イ）、東7 に1つの島（A）
+def _place_map():
+    spaces = {}
+    spaces.update(number_blocks(divide_block(0, 0, 20, 100, 10, 2), {"prefix": "ア"}))
+    spaces.update(number_blocks(divide_block(80, 0, 20, 100, 10, 2), {"prefix": "イ"}))
+    spaces.update(number_blocks(divide_block(0, 0, 20, 100, 10, 2), {"prefix": "A"}))
+    return spaces
+
+
+def test_walks_around_islands_and_between_halls():
+    planner = RoutePlanner(_place_map())
+    # 島の左右の列は背中合わせなので、島の中ほどでは隣の机へも島を回り込む
+    assert planner.distance("ア09", "ア11") == 10
+    assert planner.distance("ア09", "ア10") > 100
+    assert planner.distance("ア01", "イ01") == planner.distance("イ01", "ア01")
+    # ホールをまたぐと出入口までとホール間の距離がかかる
+    assert planner.distance("ア01", "A01") > 1500
+    with pytest.raises(ValueError):
+        planner.distance("ア01", "ア99")
+
+
+def test_plan_orders_stops_by_hall():
+    planner = RoutePlanner(_place_map())
+    plan = planner.plan(["A01", "ア01", "A19", "ア19", "ア01"], start="ア03")
+    assert plan["order"][0] == "ア03" and sorted(plan["order"]) == sorted(["ア03", "A01", "ア01", "A19", "ア19"])
+    assert plan["halls"] == ["east456", "east7"]
+    assert plan["distance"] == sum(plan["legs"]) and plan["unreachable"] == []
+
+
+# 知らないスペースを含む人は error にして、ほかの人の計画は続ける
+def test_plan_routes_reports_errors_per_user():
+    requests = [{"user": "u1", "stops": ["ア01", "イ20"]}, {"user": "u2", "stops": ["ア99"]}]
+    routes = plan_routes(_place_map(), requests, workers=1)
+    assert routes[0]["user"] == "u1" and len(routes[0]["order"]) == 2
+    assert routes[1] == {"user": "u2", "error": "Unknown space: ア99"}
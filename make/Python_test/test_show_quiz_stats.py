@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+from quiz_stats_store import QuizStatsStore
+from show_quiz_stats import load_stats, query_stats
+
+# python -m pytest make/Python_test/test_show_quiz_stats.py
+
+
+@pytest.fixture
+def stats_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # 索引のキャッシュ（quiz_metrics_index.json）は作業ディレクトリに書かれる
+    db_file = str(tmp_path / "quiz_stats.db")
+    with QuizStatsStore(db_file) as store:
+        for song, correct in [("Lemon", True), ("Lemon", True), ("夜に駆ける", False), ("アイネクライネ", True)]:
+            store.record(song, correct, 1)
+    return db_file
+
+
+# 0 / None は従来の display_stats と同じく「すべて」
+@pytest.mark.parametrize("limit", [0, None])
+def test_limit_zero_or_none_returns_all(stats_file, limit):
+    assert len(query_stats(stats_file, "correct", limit=limit)) == 3
+    assert len(query_stats(stats_file, limit=limit)) == 3
+
+
+def test_limit_and_sort(stats_file):
+    assert [row["song"] for row in query_stats(stats_file, "correct", limit=1)] == ["Lemon"]
+    assert [row["song"] for row in query_stats(stats_file, "correct", ascending=True, limit=1)] == ["夜に駆ける"]
+
+
+# 表示のための読み出しでは DB に書かない（スキーマを作らない）
+def test_load_stats_opens_the_store_read_only(tmp_path):
+    db_file = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_file)
+    conn.executescript("CREATE TABLE song_stats (song TEXT PRIMARY KEY, correct INTEGER, incorrect INTEGER, "
+                       "display_sum INTEGER, display_n INTEGER);"
+                       "CREATE TABLE display_hist (song TEXT, display_count INTEGER, n INTEGER);"
+                       "INSERT INTO song_stats VALUES ('Lemon', 1, 0, 1, 1);")
+    conn.close()
+    assert load_stats(db_file)["Lemon"]["correct"] == 1
+    conn = sqlite3.connect(db_file)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"song_stats", "display_hist"}
+    with QuizStatsStore(db_file, read_only=True) as store, pytest.raises(sqlite3.OperationalError):
+        store.record("Lemon", True, 1)
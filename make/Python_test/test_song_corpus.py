@@ -0,0 +1,47 @@
+import os
+
+from SELECT_song import pick_random_file
+from song_corpus import SongCorpus
+
+# python -m pytest make/Python_test/test_song_corpus.py
+
+
+def _readlines(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line for line in f.readlines() if line.strip() != '']
+
+
+# \r\n・\r・\n が混ざっていても、テキストモードの readlines() と同じ行になる
+def test_lines_match_text_mode_readlines(tmp_path):
+    folder = tmp_path / "songs"
+    folder.mkdir()
+    (folder / "mixed.txt").write_bytes("一行目\r\n\r\n二行目\r三行目\n\r\r\n  \n最後".encode('utf-8'))
+    (folder / "plain.txt").write_bytes("夜空\n\n星\n".encode('utf-8'))
+    corpus = SongCorpus(str(folder), index_file=str(tmp_path / "index.json"))
+    for path in corpus.paths:
+        assert corpus.valid_lines(path) == _readlines(path)
+    path = str(folder / "mixed.txt")
+    assert corpus.read_lines(path, 1, 3) == ["二行目\n", "三行目\n"]
+
+
+# 読めないファイルは変わるまで読み直さず、直ったら曲に戻る
+def test_unreadable_files_are_remembered(tmp_path):
+    folder = tmp_path / "songs"
+    folder.mkdir()
+    bad = folder / "bad.txt"
+    bad.write_bytes(b"\xff\xfe\n")
+    index_file = str(tmp_path / "index.json")
+    corpus = SongCorpus(str(folder), index_file=index_file)
+    assert len(corpus) == 0 and "bad.txt" in corpus.unreadable
+    assert SongCorpus(str(folder), index_file=index_file).refresh() == (0, 0)
+    bad.write_bytes("直った\n".encode('utf-8'))
+    stat = os.stat(bad)
+    os.utime(bad, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    corpus = SongCorpus(str(folder), index_file=index_file)
+    assert len(corpus) == 1 and not corpus.unreadable
+
+
+# SELECT_song はテキストでないファイルも選べる（選ぶだけなら中身は読まない）
+def test_pick_random_file_includes_binary_files(tmp_path):
+    (tmp_path / "image.bin").write_bytes(b"\xff\xd8\xff")
+    assert pick_random_file(str(tmp_path)) == str(tmp_path / "image.bin")
@@ -0,0 +1,64 @@
+import random
+from collections import Counter
+
+import pytest
+
+from song_selector import MIN_WEIGHT, SCALE, SongSelector, song_weight
+
+# python -m pytest make/Python_test/test_song_selector.py
+
+
+def test_song_weight_prefers_missed_and_slow_songs():
+    unseen = song_weight(None)
+    assert unseen == pytest.approx(MIN_WEIGHT + 0.5 + 0.25)
+    missed = song_weight({"correct": 0, "incorrect": 4, "display_sum": 0, "display_n": 0})
+    known = song_weight({"correct": 4, "incorrect": 0, "display_sum": 4, "display_n": 4})
+    slow = song_weight({"correct": 4, "incorrect": 0, "display_sum": 12, "display_n": 4})
+    assert known < slow < unseen < missed
+    assert known == pytest.approx(MIN_WEIGHT + 1 / 6)
+
+
+# 出題した曲は cooldown 回のあいだ出ない
+def test_cooldown():
+    selector = SongSelector(["a", "b", "c", "d"], rng=random.Random(0), cooldown=3)
+    drawn = [selector.draw() for _ in range(200)]
+    for i, title in enumerate(drawn):
+        assert title not in drawn[max(0, i - 3):i]
+    # 曲数より cooldown が長くても止まらない
+    short = SongSelector(["a", "b"], rng=random.Random(0), cooldown=5)
+    assert all(short.draw() for _ in range(10))
+    assert SongSelector([]).draw() is None
+
+
+# 引かれる頻度は重みに比例する
+def test_draw_frequency_follows_probability():
+    stats = {"missed": {"correct": 0, "incorrect": 9, "display_sum": 0, "display_n": 0},
+             "known": {"correct": 9, "incorrect": 0, "display_sum": 9, "display_n": 9}}
+    selector = SongSelector(["missed", "known", "new"], stats, rng=random.Random(1), cooldown=0)
+    expected = {t: selector.probability(t) for t in selector.titles}
+    assert sum(expected.values()) == pytest.approx(1.0)
+    counts = Counter(selector.draw() for _ in range(20000))
+    for title, p in expected.items():
+        assert counts[title] / 20000 == pytest.approx(p, abs=0.02)
+    assert [t for t, _ in selector.ranking()] == ["missed", "new", "known"]
+
+
+def test_update_reweights_and_cooling_song_waits():
+    selector = SongSelector(["a", "b"], rng=random.Random(0), cooldown=0)
+    before = selector.probability("a")
+    for _ in range(5):
+        selector.update("a", False)
+    assert selector.probability("a") > before
+    selector.update("unknown", True, 1)
+
+    # 休み中に反映した結果は、休みが明けたときの重みに入る
+    cooling = SongSelector(["a", "b", "c"], rng=random.Random(0), cooldown=1)
+    title = cooling.draw()
+    cooling.update(title, False)
+    assert cooling.probability(title) == 0.0
+    assert cooling.draw() != title
+    third = cooling.draw()
+    expected = 0 if third == title else round(song_weight(cooling.stats[title]) * SCALE)
+    assert cooling.weights[cooling.index[title]] == expected
+    assert cooling.stats[title]["incorrect"] == 1
+    assert song_weight(cooling.stats[title]) > song_weight(None)
@@ -0,0 +1,72 @@
+import pytest
+
+from block_geometry import divide_block
+from space_numbering import number_blocks, number_many, order_blocks, parse_order
+
+# python -m pytest make/Python_test/test_space_numbering.py
+
+
+# 置き換える前の sorted_sub_block_coordinates.sort_blocks（比較用にそのまま残す）
+def _legacy_sort_blocks(blocks):
+    even_blocks = {k: v for k, v in blocks.items() if int(k.split('_')[1]) % 2 == 0}
+    odd_blocks = {k: v for k, v in blocks.items() if int(k.split('_')[1]) % 2 != 0}
+
+    sorted_even = sorted(even_blocks.items(), key=lambda x: int(x[0].split('_')[1]), reverse=True)
+    sorted_odd = sorted(odd_blocks.items(), key=lambda x: int(x[0].split('_')[1]))
+
+    renamed_blocks = {}
+    for idx, (k, v) in enumerate(sorted_even):
+        renamed_blocks[f"ス{str(20 + idx).zfill(2)}"] = v
+    for idx, (k, v) in enumerate(sorted_odd):
+        renamed_blocks[f"ス{str(25 + idx)}"] = v
+    return renamed_blocks
+
+
+SU_SPEC = {"prefix": "ス", "start": 20, "order": "right_to_left_bottom_to_top", "serpentine": True}
+
+
+# ス20 の例: 右列を下から上、左列を上から下（従来の偶数/奇数の並べ方と同じ結果・同じ順番）
+def test_su_layout_matches_legacy():
+    blocks = divide_block(1413, 125, 37, 91, 5, 2)
+    numbered = number_blocks(blocks, SU_SPEC)
+    assert list(numbered.items()) == list(_legacy_sort_blocks(blocks).items())
+
+
+def test_orders_and_serpentine():
+    # 2列 x 3行（Block_1 が左上）
+    blocks = divide_block(0, 0, 20, 30, 3, 2)
+    order = lambda **spec: [k for k, _ in order_blocks(blocks, spec)]
+    assert order(order="top_to_bottom_left_to_right") == [f"Block_{i}" for i in (1, 2, 3, 4, 5, 6)]
+    assert order(order="left_to_right_top_to_bottom") == [f"Block_{i}" for i in (1, 3, 5, 2, 4, 6)]
+    assert order(order="left_to_right_top_to_bottom", serpentine=True) == [
+        f"Block_{i}" for i in (1, 3, 5, 6, 4, 2)
+    ]
+    assert order(order="bottom_to_top_right_to_left", serpentine=True) == [
+        f"Block_{i}" for i in (6, 5, 3, 4, 2, 1)
+    ]
+
+
+def test_skip_exclude_and_digits():
+    blocks = divide_block(0, 0, 10, 50, 5, 1)
+    spec = {"prefix": "a", "start": 1, "digits": 3, "skip": [2, 3], "exclude": [1]}
+    numbered = number_blocks(blocks, spec)
+    assert list(numbered) == ["a001", "a004", "a005", "a006"]
+    assert numbered["a004"] == blocks["Block_3"]
+
+
+# 数 px のずれは同じ列とみなす
+def test_tolerance_groups_jittered_cells():
+    blocks = {
+        "p": {"x": 0.0, "y": 10, "width": 10, "height": 10},
+        "q": {"x": 0.4, "y": 0, "width": 10, "height": 10},
+        "r": {"x": 10.2, "y": 0, "width": 10, "height": 10},
+    }
+    assert [k for k, _ in order_blocks(blocks, {"order": "left_to_right_top_to_bottom"})] == ["q", "p", "r"]
+
+
+def test_invalid_order_and_duplicates():
+    with pytest.raises(ValueError):
+        parse_order("left_to_right_right_to_left")
+    blocks = divide_block(0, 0, 10, 10, 1, 1)
+    with pytest.raises(ValueError):
+        number_many([(blocks, {"prefix": "ア"}), (blocks, {"prefix": "ア"})])
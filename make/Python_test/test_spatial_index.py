@@ -0,0 +1,29 @@
+import math
+
+from spatial_index import HallGrids, SpaceGrid
+
+# python -m pytest make/Python_test/test_spatial_index.py
+
+
+def _rect(x, y, w=10, h=10):
+    return {"x": x, "y": y, "width": w, "height": h}
+
+
+# 東7（A..）と南12（a..）は別の画像の座標なので、同じ座標でもホールごとに別のスペースが当たる
+def test_halls_do_not_share_coordinates():
+    grids = HallGrids({"A01": _rect(0, 0), "A02": _rect(10, 0), "a01": _rect(0, 0), "a02": _rect(0, 10)})
+    assert grids.hit_test("east7", 5, 5) == "A01"
+    assert grids.hit_test("south12", 5, 5) == "a01"
+    assert grids.hit_test("east7", 5, 15) is None
+    assert sorted(grids.query("south12", 0, 0, 20, 20)) == ["a01", "a02"]
+    assert grids.nearest("east7", 5, 30)[0] == "A01"
+    assert HallGrids.from_dict(grids.to_dict()).hit_test("south12", 5, 15) == "a02"
+
+
+def test_nearest_matches_brute_force():
+    place_map = {f"A{i:02d}": _rect((i % 7) * 13, (i // 7) * 17, 10 + i % 3, 10) for i in range(40)}
+    grid = SpaceGrid(place_map)
+    for x, y in [(-50, -50), (40, 30), (1000, 20), (45, 5000), (-3e5, 2e5)]:
+        best = min(math.hypot(max(r["x"] - x, 0, x - r["x"] - r["width"]), max(r["y"] - y, 0, y - r["y"] - r["height"]))
+                   for r in place_map.values())
+        assert math.isclose(grid.nearest(x, y)[1], best)
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from stream_json import FORMATS, iter_stream, write_stream
+
+# python -m pytest make/Python_test/test_stream_json.py
+
+PLACE_MAP = {
+    "ア01": {"x": 0, "y": 0.5, "width": 10, "height": 22.166666666666668},
+    "A12": {"x": 1e-7, "y": -3, "width": 1, "height": 1, "note": [1, {"a": None}]},
+}
+
+
+# pretty / compact は json.dump と同じバイト列
+@pytest.mark.parametrize("fmt, kwargs", [("pretty", {"indent": 4}), ("compact", {"separators": (",", ":")})])
+def test_same_bytes_as_json_dump(tmp_path, fmt, kwargs):
+    path = tmp_path / "placeMap.json"
+    write_stream(PLACE_MAP, str(path), fmt)
+    assert path.read_text(encoding='utf-8') == json.dumps(PLACE_MAP, ensure_ascii=False, **kwargs)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(tmp_path, fmt):
+    path = str(tmp_path / "placeMap.out")
+    assert write_stream(PLACE_MAP.items(), path, fmt) == 2
+    assert dict(iter_stream(path, fmt)) == PLACE_MAP
+
+
+# 文字列でないキーは json.dump と同じく文字列にする（出力が JSON として読めなくならない）
+@pytest.mark.parametrize("fmt", ["pretty", "compact"])
+def test_non_string_keys_are_converted(tmp_path, fmt):
+    data = {1: {"x": 1}, 2.5: {"x": 2}, True: {"x": 3}, None: {"x": 4}}
+    path = tmp_path / "keys.json"
+    write_stream(data, str(path), fmt)
+    assert json.loads(path.read_text(encoding='utf-8')) == json.loads(json.dumps(data))
+    with pytest.raises(TypeError):
+        write_stream({(1, 2): {"x": 1}}, str(tmp_path / "bad.json"))
+    assert not (tmp_path / "bad.json").exists()
+
+
+def test_duplicate_ids_leave_no_file(tmp_path):
+    path = tmp_path / "dup.json"
+    with pytest.raises(ValueError):
+        write_stream([(1, {"x": 1}), ("1", {"x": 2})], str(path))
+    assert list(tmp_path.iterdir()) == []